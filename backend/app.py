@@ -1,24 +1,27 @@
 # Main Flask application file
-# Sets up the Flask app and registers all routes
+# create_app() builds the Flask app and registers the configured routes;
+# the student store, report rules and model load on first use unless
+# the PRELOAD setting names them
+
+import importlib
 
 from flask import Flask
 from flask_cors import CORS
-from routes.auth import auth_bp
-from routes.student import student_bp
-from routes.teacher import teacher_bp
-
-# Create Flask app instance
-app = Flask(__name__)
+from config import Config
 
-# Enable CORS for Streamlit frontend to communicate
-CORS(app)
+# Route modules by name: (module, blueprint attribute)
+BLUEPRINTS = {
+    'auth': ('routes.auth', 'auth_bp'),
+    'student': ('routes.student', 'student_bp'),
+    'teacher': ('routes.teacher', 'teacher_bp'),
+    'prediction': ('routes.prediction', 'prediction_bp'),
+    'metrics': ('routes.metrics', 'metrics_bp'),
+    'profiling': ('routes.profiling', 'profiling_bp')
+}
 
-# Register blueprints (route modules)
-app.register_blueprint(auth_bp)
-app.register_blueprint(student_bp)
-app.register_blueprint(teacher_bp)
+# Subsystems the PRELOAD setting can load before the first request
+PRELOAD_SUBSYSTEMS = ['model', 'rules', 'store', 'search']
 
-@app.route('/', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return {
@@ -26,7 +29,6 @@ def health_check():
         'message': 'Student Performance Management API is running!'
     }, 200
 
-@app.route('/api/health', methods=['GET'])
 def api_health():
     """API health check endpoint"""
     return {
@@ -34,6 +36,74 @@ def api_health():
         'message': 'API is operational'
     }, 200
 
+def preload(subsystems):
+    """Load subsystems now instead of on the first request that needs them"""
+    unknown = set(subsystems) - set(PRELOAD_SUBSYSTEMS)
+    if unknown:
+        raise ValueError("Unknown PRELOAD subsystem: %s" % ', '.join(sorted(unknown)))
+    if 'model' in subsystems:
+        from services.prediction_service import PredictionService
+        PredictionService.get_model()
+    if {'rules', 'store', 'search'} & set(subsystems):
+        from services.data_service import DataService
+        if 'rules' in subsystems:
+            DataService.get_report_engine()
+        if 'store' in subsystems:
+            # Opening the store also builds its indexes
+            DataService.get_store()
+        if 'search' in subsystems:
+            DataService.get_search_index()
+
+def create_app(config=None):
+    """
+    Build the Flask app
+    config: a Config for this app, or None to read the environment now
+    The app's settings are copied into app.config; the data and prediction
+    services, their caches and the profiler are built from them here, so
+    settings never carry over from one create_app() call to the next
+    Only the route modules named in the BLUEPRINTS setting are imported
+    """
+    settings = config if config is not None else Config()
+
+    unknown = set(settings.BLUEPRINTS) - set(BLUEPRINTS)
+    if unknown:
+        raise ValueError("Unknown blueprint: %s" % ', '.join(sorted(unknown)))
+
+    # Create Flask app instance
+    app = Flask(__name__)
+    app.config.from_mapping(settings.settings())
+
+    # Enable CORS for Streamlit frontend to communicate
+    CORS(app)
+
+    # The services are shared by the whole process, so the newest app's
+    # settings are the ones in use
+    from services.data_service import DataService
+    from services.prediction_service import PredictionService
+    DataService.configure(settings)
+    PredictionService.configure(settings)
+
+    # Register blueprints (route modules)
+    for name in settings.BLUEPRINTS:
+        module, attribute = BLUEPRINTS[name]
+        app.register_blueprint(getattr(importlib.import_module(module), attribute))
+
+    app.add_url_rule('/', 'health_check', health_check, methods=['GET'])
+    app.add_url_rule('/api/health', 'api_health', api_health, methods=['GET'])
+
+    # Time every request for /api/metrics
+    if settings.METRICS_ENABLED:
+        from routes.metrics import instrument_app
+        instrument_app(app)
+
+    # Profile sampled requests while profiling is switched on
+    if 'profiling' in settings.BLUEPRINTS:
+        from routes.profiling import install_profiler
+        install_profiler(app, settings)
+
+    preload(settings.PRELOAD)
+    return app
+
 if __name__ == '__main__':
     # Run Flask app in debug mode
     # This will reload the app when code changes
@@ -43,10 +113,26 @@ if __name__ == '__main__':
     print("  POST   /api/login - Login (student/teacher)")
     print("  GET    /api/student/<reg_no> - Get student dashboard")
     print("  GET    /api/student/<reg_no>/report - Get student report")
+    print("  GET    /api/student/<reg_no>/dashboard - Get student details and report")
     print("  GET    /api/students - Get all students (teacher)")
+    print("  GET    /api/students/at-risk?k=<k> - Get the k students most at risk (teacher)")
     print("  POST   /api/student/add - Add new student (teacher)")
     print("  PUT    /api/student/update/<reg_no> - Update student (teacher)")
+    print("  POST   /api/students/import - Add students from CSV / NDJSON (teacher)")
+    print("  PUT    /api/students/update - Update many students in one batch (teacher)")
     print("  GET    /api/teacher/<teacher_id> - Get teacher dashboard")
+    print("  GET    /api/teacher/<teacher_id>/dashboard - Get teacher profile and all students")
+    print("  GET    /api/teacher/<teacher_id>/students - Get students in teacher's subjects")
+    print("  GET    /api/reports?subject=<subject> - Get reports for a class (teacher)")
+    print("  POST   /api/predict - Predict final score for one student")
+    print("  POST   /api/predict/batch - Predict final scores for many students")
+    print("  GET    /api/model - Get model versions")
+    print("  POST   /api/model/retrain - Refit the model from recorded marks")
+    print("  POST   /api/model/rollback - Roll back to an older model version")
+    print("  GET    /api/metrics - Request, DataService and cache metrics (Prometheus)")
+    print("  GET    /api/profiling - Get or change (PUT) request profiling settings")
+    print("  GET    /api/profiling/stacks - Merged stacks of profiled requests")
     print()
     
+    app = create_app()
     app.run(debug=True, host='localhost', port=5000)
\ No newline at end of file
@@ -0,0 +1,256 @@
+# Load test and latency benchmark for the API routes
+# Replays a seeded mix of login, dashboard, report, roster, prediction, add
+# and update requests through Flask's test client, or over real sockets
+# with --socket, and reports throughput and p50/p95/p99 latency per route
+# Usage: python benchmarks/bench_api.py [--students 1000,100000] [--requests 5000]
+#        [--threads 8] [--socket] [--output run.json] [--baseline old.json]
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from app import create_app
+from bench_student_store import SUBJECTS, make_students
+from services.data_service import DataService
+from services.student_store import create_student_store
+
+# Relative weight of each operation in the default traffic mix
+# teacher_dashboard returns the whole roster, so it is left out by default
+DEFAULT_MIX = {
+    'login': 5,
+    'student_dashboard': 20,
+    'student_report': 10,
+    'roster_page': 15,
+    'teacher_students': 5,
+    'at_risk': 5,
+    'predict': 15,
+    'predict_batch': 5,
+    'add': 5,
+    'update': 15,
+    'teacher_dashboard': 0
+}
+
+TEACHER_ID = 'TCH001'
+app = create_app()
+_new_students = itertools.count()
+
+
+def make_request(op, rng, students):
+    """Build one request for an operation: (method, path, json body)"""
+    reg_no = "STU%07d" % rng.randrange(students)
+    if op == 'login':
+        if rng.random() < 0.8:
+            return 'POST', '/api/login', {'role': 'student', 'username': reg_no, 'password': 'pw@%d' % int(reg_no[3:])}
+        return 'POST', '/api/login', {'role': 'teacher', 'username': TEACHER_ID, 'password': 'teacher@123'}
+    if op == 'student_dashboard':
+        return 'GET', '/api/student/%s/dashboard' % reg_no, None
+    if op == 'student_report':
+        return 'GET', '/api/student/%s/report' % reg_no, None
+    if op == 'roster_page':
+        sort = rng.choice(['reg_no', '-cgpa', 'marks', '-attendance'])
+        return 'GET', '/api/students?sort=%s&limit=50&min_attendance=%d' % (sort, rng.randrange(50, 90)), None
+    if op == 'teacher_students':
+        return 'GET', '/api/teacher/%s/students?subject=Mathematics' % TEACHER_ID, None
+    if op == 'at_risk':
+        return 'GET', '/api/students/at-risk?k=20&teacher_id=%s' % TEACHER_ID, None
+    if op == 'predict':
+        return 'POST', '/api/predict', {
+            'study_hours': rng.randrange(0, 21) / 2, 'attendance': rng.randrange(50, 101), 'previous_marks': rng.randrange(30, 101)
+        }
+    if op == 'predict_batch':
+        rows = [[rng.randrange(0, 21) / 2, rng.randrange(50, 101), rng.randrange(30, 101)] for _ in range(100)]
+        return 'POST', '/api/predict/batch', {'rows': rows}
+    if op == 'add':
+        number = next(_new_students)
+        return 'POST', '/api/student/add', {
+            'reg_no': 'NEW%07d' % number, 'password': 'pw', 'name': 'New %d' % number,
+            'email': 'new%d@school.com' % number, 'attendance': rng.randrange(50, 101),
+            'assignments': rng.randrange(0, 16), 'marks': rng.randrange(30, 101),
+            'study_hours': rng.randrange(0, 21) / 2, 'cgpa': round(rng.uniform(4, 10), 1),
+            'subjects': rng.sample(SUBJECTS, 2)
+        }
+    if op == 'update':
+        return 'PUT', '/api/student/update/%s' % reg_no, {'marks': rng.randrange(30, 101), 'attendance': rng.randrange(50, 101)}
+    if op == 'teacher_dashboard':
+        return 'GET', '/api/teacher/%s/dashboard' % TEACHER_ID, None
+    raise ValueError("Unknown operation: %s" % op)
+
+
+def test_client_sender():
+    """Send requests through a Flask test client (one per thread)"""
+    local = threading.local()
+
+    def send(method, path, body):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        return local.client.open(path, method=method, json=body).status_code
+    return send
+
+
+def socket_sender():
+    """Serve the app on a local port and send requests over HTTP keep-alive"""
+    import requests
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = 'http://127.0.0.1:%d' % server.server_port
+    local = threading.local()
+
+    def send(method, path, body):
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session.request(method, base + path, json=body).status_code
+    return send, server
+
+
+def percentiles(latencies):
+    values = np.percentile(latencies, [50, 95, 99])
+    return {'p50_ms': float(values[0]), 'p95_ms': float(values[1]), 'p99_ms': float(values[2])}
+
+
+def run(send, students, requests, threads, mix, seed):
+    """Replay one seeded request mix; returns the per-route results"""
+    rng = random.Random(seed)
+    ops = rng.choices(list(mix), weights=list(mix.values()), k=requests)
+    plan = [(op, make_request(op, rng, students)) for op in ops]
+
+    results = [[] for _ in range(threads)]
+
+    def worker(slot):
+        for op, (method, path, body) in plan[slot::threads]:
+            start = time.perf_counter()
+            status = send(method, path, body)
+            results[slot].append((op, (time.perf_counter() - start) * 1000, status < 400))
+
+    workers = [threading.Thread(target=worker, args=(slot,)) for slot in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    endpoints = {}
+    for op in mix:
+        samples = [(ms, ok) for slot in results for name, ms, ok in slot if name == op]
+        if not samples:
+            continue
+        latencies = [ms for ms, _ in samples]
+        endpoints[op] = {
+            'requests': len(samples),
+            'errors': sum(1 for _, ok in samples if not ok),
+            'throughput_rps': len(samples) / elapsed,
+            'mean_ms': float(np.mean(latencies)),
+            **percentiles(latencies)
+        }
+    return {
+        'students': students,
+        'requests': requests,
+        'elapsed_s': elapsed,
+        'throughput_rps': requests / elapsed,
+        'endpoints': endpoints
+    }
+
+
+def compare(runs, baseline, tolerance):
+    """Print p95 changes against a baseline file; returns the regressed routes"""
+    with open(baseline) as f:
+        old_runs = {run['students']: run for run in json.load(f)['runs']}
+    regressions = []
+    for run in runs:
+        old = old_runs.get(run['students'])
+        if old is None:
+            continue
+        for op, stats in run['endpoints'].items():
+            before = old['endpoints'].get(op)
+            if before is None or before['p95_ms'] == 0:
+                continue
+            change = stats['p95_ms'] / before['p95_ms'] - 1
+            flag = ' REGRESSION' if change > tolerance else ''
+            print("%10d %-18s p95 %8.2f -> %8.2f ms (%+.0f%%)%s" % (
+                run['students'], op, before['p95_ms'], stats['p95_ms'], change * 100, flag))
+            if flag:
+                regressions.append((run['students'], op))
+    return regressions
+
+
+def parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, text.split(',')):
+        op, _, weight = item.partition('=')
+        if op not in DEFAULT_MIX:
+            raise SystemExit("Unknown operation in --mix: %s" % op)
+        mix[op] = float(weight)
+    return {op: weight for op, weight in mix.items() if weight > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test every API route and report latency percentiles')
+    parser.add_argument('--students', default='1000', help='comma-separated roster sizes, e.g. 1000,100000,1000000')
+    parser.add_argument('--requests', type=int, default=5000, help='requests per roster size')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--store', default='columnar')
+    parser.add_argument('--mix', default='', help='weight overrides, e.g. add=0,teacher_dashboard=1')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--socket', action='store_true', help='serve on a local port and send real HTTP requests')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare p95 latency with an earlier --output file')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='p95 increase counted as a regression')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    server = None
+    if args.socket:
+        send, server = socket_sender()
+    else:
+        send = test_client_sender()
+
+    runs = []
+    for students in [int(n) for n in args.students.split(',')]:
+        store = create_student_store(args.store)
+        store.add_many(list(make_students(students)))
+        DataService.use_store(store)
+
+        result = run(send, students, args.requests, args.threads, mix, args.seed)
+        runs.append(result)
+
+        print("\n%d students, %d requests, %d threads: %.0f req/s" % (
+            students, args.requests, args.threads, result['throughput_rps']))
+        print("%-18s %8s %7s %9s %9s %9s %9s" % ('route', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+        for op, stats in result['endpoints'].items():
+            print("%-18s %8d %7d %9.0f %9.2f %9.2f %9.2f" % (
+                op, stats['requests'], stats['errors'], stats['throughput_rps'],
+                stats['p50_ms'], stats['p95_ms'], stats['p99_ms']))
+
+    if server is not None:
+        server.shutdown()
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')}
+        with open(args.output, 'w') as f:
+            json.dump({'config': config, 'mix': mix, 'runs': runs}, f, indent=2)
+            f.write('\n')
+
+    if args.baseline:
+        print()
+        if compare(runs, args.baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
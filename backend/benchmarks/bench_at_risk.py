@@ -0,0 +1,37 @@
+# Latency benchmark for the top-k at-risk ranking
+# Usage: python benchmarks/bench_at_risk.py [--students 1000000] [--k 50]
+
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_student_store import make_students, timed
+from services.data_service import DataService
+from services.student_store import create_student_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the at-risk ranking over a large roster')
+    parser.add_argument('--students', type=int, default=1000000)
+    parser.add_argument('--k', type=int, default=50)
+    parser.add_argument('--store', default='columnar')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = create_student_store(args.store)
+    store.add_many(list(make_students(args.students)))
+    DataService.use_store(store)
+    print("built %d students in %.1fs" % (args.students, time.perf_counter() - start))
+
+    print("%-24s %10s" % ('query', 'best ms'))
+    print("%-24s %10.1f" % ('all students', timed(lambda: DataService.get_at_risk_students(args.k))))
+    print("%-24s %10.1f" % ('Mathematics', timed(lambda: DataService.get_at_risk_students(args.k, ['Mathematics']))))
+
+
+if __name__ == '__main__':
+    main()
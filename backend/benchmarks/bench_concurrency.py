@@ -0,0 +1,181 @@
+# Concurrency stress test for DataService and the student stores
+# Many threads read, page, scan, add and update through DataService at once,
+# and every read is checked for torn or inconsistent records
+# Usage: python benchmarks/bench_concurrency.py [--threads 32] [--writers 8] [--seconds 5]
+#
+# Writers keep one invariant on every student: marks == attendance and
+# cgpa == marks / 10. A reader that sees a record breaking it has observed
+# a half-applied update.
+
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_student_store import make_students
+from services.data_service import DataService
+from services.student_store import create_student_store
+
+
+def consistent(student):
+    """True if a record satisfies the writers' invariant"""
+    return student['marks'] == student['attendance'] and student['cgpa'] == student['marks'] / 10
+
+
+def seed_students(count):
+    """Synthetic students that satisfy the invariant"""
+    for student in make_students(count):
+        student['attendance'] = student['marks']
+        student['cgpa'] = student['marks'] / 10
+        yield student
+
+
+class Worker(threading.Thread):
+    """Runs one operation in a loop, counting calls and invariant violations"""
+
+    def __init__(self, name, operation, stop):
+        super().__init__(name=name)
+        self.operation = operation
+        self.stop = stop
+        self.calls = 0
+        self.violations = 0
+        self.errors = []
+
+    def run(self):
+        while not self.stop.is_set():
+            try:
+                self.violations += self.operation()
+            except Exception as e:
+                self.errors.append(repr(e))
+            self.calls += 1
+
+
+def make_operations(reg_nos, added):
+    """The reader and writer operations; each returns a violation count"""
+
+    def get_student():
+        student = DataService.get_student(random.choice(reg_nos))
+        return 0 if consistent(student) else 1
+
+    def query_page():
+        sort = random.choice(['reg_no', 'marks', 'cgpa', 'attendance'])
+        students, _ = DataService.query_students(sort=sort, ranges={'marks': (40, 90)}, limit=50)
+        return sum(not consistent(student) for student in students)
+
+    def scan():
+        # Whole-roster iteration while writers add students
+        return sum(not consistent(student) for student in DataService.get_all_students())
+
+    def reports():
+        result = DataService.get_performance_reports('Physics')
+        return sum(not consistent(report) for report in result['reports'])
+
+    def update():
+        value = random.randint(30, 100)
+        DataService.update_student(random.choice(reg_nos), {
+            'marks': value, 'attendance': value, 'cgpa': value / 10
+        })
+        return 0
+
+    def add():
+        student = next(added)
+        result = DataService.add_student(student)
+        return 0 if result['success'] else 1
+
+    readers = [get_student, query_page, scan, reports]
+    writers = [update, update, update, add]
+    return readers, writers
+
+
+def run(kind, count, threads, writers, seconds, sqlite_path):
+    """Run one store; returns a dict of results"""
+    store = create_student_store(kind, sqlite_path=sqlite_path)
+    store.add_many(list(seed_students(count)))
+    DataService.use_store(store)
+    reg_nos = [student['reg_no'] for student in store.all()]
+
+    # New students for the add operations, shared by every writer thread
+    lock = threading.Lock()
+    fresh = seed_students(count * 10)
+    for _ in range(count):
+        next(fresh)
+
+    def take():
+        with lock:
+            return next(fresh)
+
+    added = iter(take, None)
+    readers, writer_ops = make_operations(reg_nos, added)
+
+    stop = threading.Event()
+    workers = []
+    for i in range(threads):
+        if i < writers:
+            operation = writer_ops[i % len(writer_ops)]
+        else:
+            operation = readers[i % len(readers)]
+        workers.append(Worker(operation.__name__, operation, stop))
+
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    final = sum(not consistent(student) for student in DataService.get_all_students())
+    if hasattr(store, 'close'):
+        store.close()
+
+    calls = {}
+    for worker in workers:
+        calls[worker.name] = calls.get(worker.name, 0) + worker.calls
+    errors = list(itertools.chain.from_iterable(worker.errors for worker in workers))
+    return {
+        'reads_s': sum(w.calls for w in workers[writers:]) / seconds,
+        'writes_s': sum(w.calls for w in workers[:writers]) / seconds,
+        'violations': sum(w.violations for w in workers),
+        'final_violations': final,
+        'errors': errors,
+        'calls': calls
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress DataService with concurrent readers and writers')
+    parser.add_argument('--students', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--stores', default='dict,columnar,sqlite')
+    args = parser.parse_args()
+
+    print("%d students, %d threads (%d writers), %.0fs per store" % (
+        args.students, args.threads, args.writers, args.seconds))
+    print("%-9s %10s %10s %11s %8s" % ('store', 'reads/s', 'writes/s', 'violations', 'errors'))
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in args.stores.split(','):
+            result = run(kind, args.students, args.threads, args.writers, args.seconds,
+                         os.path.join(tmp, '%s.db' % kind))
+            violations = result['violations'] + result['final_violations']
+            print("%-9s %10.0f %10.0f %11d %8d" % (
+                kind, result['reads_s'], result['writes_s'], violations, len(result['errors'])))
+            print("    " + ", ".join("%s %.0f/s" % (name, calls / args.seconds)
+                                      for name, calls in sorted(result['calls'].items())))
+            for error in sorted(set(result['errors']))[:5]:
+                print("    %s" % error)
+            failed = failed or violations or result['errors']
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
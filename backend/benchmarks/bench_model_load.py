@@ -0,0 +1,54 @@
+# Startup benchmark for the two model load paths
+# Each path runs in a fresh interpreter, like a newly forked worker
+# Usage: python benchmarks/bench_model_load.py [--runs 5]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Code run in the child process; prints one JSON line with its measurements
+CHILD = r'''
+import json, resource, sys, time, warnings
+warnings.simplefilter('ignore')
+start = time.perf_counter()
+from services.prediction_service import PredictionService, load_compact
+if sys.argv[1] == 'pickle':
+    model = PredictionService.load_pickle()
+else:
+    model = load_compact()
+model.predict([[4.0, 85.0, 78.0]])
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'load_ms': elapsed * 1000,
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'sklearn_imported': 'sklearn' in sys.modules
+}))
+'''
+
+def run_once(path):
+    """Load the model through one path in a fresh interpreter"""
+    output = subprocess.check_output([sys.executable, '-c', CHILD, path], cwd=BACKEND_DIR)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare pickle and compact model startup')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per load path')
+    args = parser.parse_args()
+
+    print("%-8s %12s %12s %8s" % ('path', 'load ms', 'max RSS MB', 'sklearn'))
+    for path in ('pickle', 'compact'):
+        runs = [run_once(path) for _ in range(args.runs)]
+        print("%-8s %12.1f %12.1f %8s" % (
+            path,
+            statistics.median(r['load_ms'] for r in runs),
+            statistics.median(r['max_rss_mb'] for r in runs),
+            'yes' if runs[0]['sklearn_imported'] else 'no'
+        ))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# Restart benchmark for the durable in-memory stores
+# Builds a store in a data dir, snapshots it, applies more updates to the log,
+# then restarts in a fresh interpreter and times snapshot load + log replay
+# Usage: python benchmarks/bench_recovery.py [--students 1000000] [--updates 100000]
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_student_store import make_students
+from services.student_store import create_student_store
+
+# Code run in the child process; prints one JSON line with its measurements
+CHILD = r'''
+import json, resource, sys, time
+start = time.perf_counter()
+from services.student_store import create_student_store
+store = create_student_store(sys.argv[1], data_dir=sys.argv[2], snapshot_interval=3600)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'recover_s': elapsed,
+    'students': len(store),
+    'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+store.close()
+'''
+
+
+def random_update(reg_nos):
+    return random.choice(reg_nos), {
+        'marks': random.randint(30, 100),
+        'attendance': random.randint(50, 100)
+    }
+
+
+def run(kind, count, updates, data_dir):
+    """Fill a data dir, then time a restart; returns a dict of results"""
+    store = create_student_store(kind, data_dir=data_dir, snapshot_interval=3600)
+    reg_nos = []
+    batch = []
+    for student in make_students(count):
+        reg_nos.append(student['reg_no'])
+        batch.append(student)
+        if len(batch) == 100000:
+            store.add_many(batch)
+            batch = []
+    store.add_many(batch)
+
+    # The same updates straight on the wrapped store show the logging cost;
+    # they run before the snapshot so it still covers them
+    start = time.perf_counter()
+    for _ in range(updates):
+        store.store.update(*random_update(reg_nos))
+    plain_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store.snapshot()
+    snapshot_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(updates):
+        store.update(*random_update(reg_nos))
+    logged_s = time.perf_counter() - start
+    store.close()
+
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, kind, data_dir],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result.update({
+        'snapshot_s': snapshot_s,
+        'update_us_logged': logged_s / updates * 1e6,
+        'update_us_plain': plain_s / updates * 1e6,
+        'disk_mb': sum(os.path.getsize(os.path.join(data_dir, name)) for name in os.listdir(data_dir)) / 1e6
+    })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time restarts of the durable student stores')
+    parser.add_argument('--students', type=int, default=1000000)
+    parser.add_argument('--updates', type=int, default=100000)
+    parser.add_argument('--stores', default='dict,columnar')
+    args = parser.parse_args()
+
+    print("%d students, %d logged updates after the snapshot" % (args.students, args.updates))
+    print("%-9s %10s %10s %10s %12s %12s %10s" % (
+        'store', 'snapshot s', 'restart s', 'rss MB', 'update us', 'no log us', 'disk MB'))
+    for kind in args.stores.split(','):
+        with tempfile.TemporaryDirectory() as data_dir:
+            result = run(kind, args.students, args.updates, data_dir)
+        assert result['students'] == args.students
+        print("%-9s %10.2f %10.2f %10.0f %12.1f %12.1f %10.1f" % (
+            kind, result['snapshot_s'], result['recover_s'], result['max_rss_mb'],
+            result['update_us_logged'], result['update_us_plain'], result['disk_mb']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# JSON vs Arrow roster export benchmark
+# Times the server encode (query + serialize) and the client decode into a
+# pandas DataFrame for the whole roster; "arrow" is the streamed export and
+# "arrow-num" the same export limited to reg_no and the numeric columns
+# Usage: python benchmarks/bench_roster_export.py [--students 100000,1000000]
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from bench_student_store import make_students
+from services import arrow_export
+from services.data_service import DataService
+from services.student_store import NUMERIC_FIELDS, PUBLIC_FIELDS, create_student_store
+
+
+def timed(fn, repeat=3):
+    """Best wall time of fn() in milliseconds, and its last result"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def encode_json():
+    students, _ = DataService.query_students()
+    data = [{field: student[field] for field in PUBLIC_FIELDS} for student in students]
+    return json.dumps({'success': True, 'count': len(data), 'next_cursor': None, 'data': data}).encode('utf-8')
+
+
+def encode_arrow():
+    # Same path as the streamed /api/students.arrow response
+    reg_nos, columns, rows = DataService.get_roster_columns([f for f in PUBLIC_FIELDS if f in NUMERIC_FIELDS])
+    batches = arrow_export.roster_batches(reg_nos, columns, rows, PUBLIC_FIELDS, DataService.get_roster_fields)
+    return b''.join(arrow_export.stream_batches(arrow_export.roster_schema(PUBLIC_FIELDS), batches))
+
+
+def encode_arrow_numeric():
+    # reg_no and the numeric columns only
+    fields = ['reg_no'] + [f for f in PUBLIC_FIELDS if f in NUMERIC_FIELDS]
+    reg_nos, columns, rows = DataService.get_roster_columns(fields[1:])
+    batches = arrow_export.roster_batches(reg_nos, columns, rows, fields, DataService.get_roster_fields)
+    return b''.join(arrow_export.stream_batches(arrow_export.roster_schema(fields), batches))
+
+
+def encode_parquet():
+    # Same path as a whole-roster /api/students.parquet response
+    reg_nos, columns, rows = DataService.get_roster_columns([f for f in PUBLIC_FIELDS if f in NUMERIC_FIELDS])
+    batches = arrow_export.roster_batches(reg_nos, columns, rows, PUBLIC_FIELDS, DataService.get_roster_fields)
+    return arrow_export.encode_parquet(arrow_export.batches_table(PUBLIC_FIELDS, batches))
+
+
+FORMATS = [
+    ('json', encode_json, lambda body: pd.DataFrame(json.loads(body)['data'])),
+    ('arrow', encode_arrow, lambda body: pa.ipc.open_stream(body).read_pandas()),
+    ('arrow-num', encode_arrow_numeric, lambda body: pa.ipc.open_stream(body).read_pandas()),
+    ('parquet', encode_parquet, lambda body: pq.read_table(io.BytesIO(body)).to_pandas())
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JSON and Arrow roster exports')
+    parser.add_argument('--students', default='100000,1000000', help='comma-separated roster sizes')
+    parser.add_argument('--store', default='columnar')
+    args = parser.parse_args()
+
+    print("%10s %-8s %12s %12s %12s %10s" % ('students', 'format', 'encode ms', 'decode ms', 'total ms', 'MB'))
+    for count in [int(n) for n in args.students.split(',')]:
+        store = create_student_store(args.store)
+        store.add_many(list(make_students(count)))
+        DataService.use_store(store)
+
+        for name, encode, decode in FORMATS:
+            encode_ms, body = timed(encode)
+            decode_ms, frame = timed(lambda: decode(body))
+            assert len(frame) == count
+            print("%10d %-8s %12.1f %12.1f %12.1f %10.1f" % (
+                count, name, encode_ms, decode_ms, encode_ms + decode_ms, len(body) / (1024 * 1024)))
+
+
+if __name__ == '__main__':
+    main()
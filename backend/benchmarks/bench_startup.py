@@ -0,0 +1,142 @@
+# Startup benchmark: time to first response and memory per worker
+# Each scenario starts a fresh interpreter that builds the app with
+# create_app(), forks workers the way gunicorn does and has every worker
+# answer its first requests, then reports per-worker RSS / PSS / private memory
+# Point STUDENT_STORE / SQLITE_PATH at a roster from generate_roster.py to
+# include a realistic store load
+# Usage: python benchmarks/bench_startup.py [--workers 4] [--scenarios lazy,preload]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Environment of each scenario
+SCENARIOS = {
+    'lazy': {'PRELOAD': ''},
+    'preload': {'PRELOAD': 'model,rules,store'},
+    'auth-only': {'PRELOAD': '', 'BLUEPRINTS': 'auth'}
+}
+
+# First requests every worker answers, in order
+FIRST_REQUESTS = [
+    ('GET', '/api/health', None),
+    ('POST', '/api/login', {'role': 'student', 'username': 'STU101', 'password': 'stu@101'}),
+    ('GET', '/api/student/STU101/dashboard', None),
+    ('POST', '/api/predict', {'study_hours': 4, 'attendance': 85, 'previous_marks': 78})
+]
+
+# Runs in the scenario's interpreter; argv[1] is the parent's launch time
+CHILD = r'''
+import json, os, sys, time
+launched = float(sys.argv[1])
+workers = int(sys.argv[2])
+first_requests = json.loads(sys.argv[3])
+
+def memory():
+    """RSS, PSS and private memory of this process in MB"""
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    except OSError:
+        import resource
+        return {'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    return {
+        'rss_mb': fields.get('Rss', 0),
+        'pss_mb': fields.get('Pss', 0),
+        'private_mb': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+start = time.time()
+from app import create_app
+app = create_app()
+master = {'create_app_s': time.time() - start, 'ready_s': time.time() - launched}
+
+pipes = []
+for _ in range(workers):
+    read_fd, write_fd = os.pipe()
+    if os.fork() == 0:
+        os.close(read_fd)
+        # Same as gunicorn.conf.py's post_fork hook
+        if 'services.data_service' in sys.modules:
+            sys.modules['services.data_service'].DataService.after_fork()
+        client = app.test_client()
+        result = {'routes': {}}
+        for method, path, body in first_requests:
+            begin = time.time()
+            status = client.open(path, method=method, json=body).status_code
+            result['routes'][path] = {'first_ms': (time.time() - begin) * 1000, 'status': status}
+            result.setdefault('first_response_s', time.time() - launched)
+        result.update(memory())
+        os.write(write_fd, json.dumps(result).encode())
+        os._exit(0)
+    os.close(write_fd)
+    pipes.append(read_fd)
+
+results = []
+for read_fd in pipes:
+    chunks = []
+    while True:
+        data = os.read(read_fd, 65536)
+        if not data:
+            break
+        chunks.append(data)
+    results.append(json.loads(b''.join(chunks)))
+    os.wait()
+master.update(memory())
+print(json.dumps({'master': master, 'workers': results}))
+'''
+
+
+def run(name, workers):
+    env = dict(os.environ, **SCENARIOS[name])
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, repr(time.time()), str(workers), json.dumps(FIRST_REQUESTS)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def mean(values):
+    return sum(values) / len(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure time to first response and per-worker memory')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--output', help='write the results to this JSON file')
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenarios.split(','):
+        result = results[name] = run(name, args.workers)
+        master, workers = result['master'], result['workers']
+        print("\n%s: create_app %.3fs, master ready after %.3fs, master RSS %.1f MB" % (
+            name, master['create_app_s'], master['ready_s'], master['rss_mb']))
+        print("  first response after %.3fs (mean of %d workers)" % (
+            mean([w['first_response_s'] for w in workers]), len(workers)))
+        print("  per worker: RSS %.1f MB, PSS %.1f MB, private %.1f MB" % (
+            mean([w['rss_mb'] for w in workers]), mean([w.get('pss_mb', 0) for w in workers]),
+            mean([w.get('private_mb', 0) for w in workers])))
+        for path in workers[0]['routes']:
+            statuses = sorted({w['routes'][path]['status'] for w in workers})
+            print("  %-32s first request %8.2f ms  status %s" % (
+                path, mean([w['routes'][path]['first_ms'] for w in workers]), ','.join(map(str, statuses))))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# Read/write throughput benchmark for the student store backends
+# Reader and writer threads call DataService concurrently, like request threads
+# Usage: python benchmarks/bench_storage_backends.py [--students 10000] [--readers 8] [--writers 1]
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_student_store import make_students
+from services.data_service import DataService
+from services.student_store import create_student_store
+
+
+def worker(fn, stop, counts, slot):
+    """Call fn() until stop is set, counting calls"""
+    done = 0
+    while not stop.is_set():
+        fn()
+        done += 1
+    counts[slot] = done
+
+
+def run(kind, students, readers, writers, seconds, path):
+    """Run one backend; returns (reads/s, writes/s)"""
+    store = create_student_store(kind, sqlite_path=path, shared_path=path)
+    store.add_many([dict(student) for student in students])
+    DataService.use_store(store)
+    reg_nos = [student['reg_no'] for student in students]
+
+    def read():
+        reg_no = random.choice(reg_nos)
+        DataService.get_student(reg_no)
+        DataService.get_student_performance_report(reg_no)
+
+    def write():
+        DataService.update_student(random.choice(reg_nos), {
+            'marks': random.randint(30, 100),
+            'attendance': random.randint(50, 100)
+        })
+
+    stop = threading.Event()
+    counts = [0] * (readers + writers)
+    threads = [threading.Thread(target=worker, args=(read, stop, counts, i)) for i in range(readers)]
+    threads += [threading.Thread(target=worker, args=(write, stop, counts, readers + i)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    if hasattr(store, 'close'):
+        store.close()
+    return sum(counts[:readers]) / seconds, sum(counts[readers:]) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare store backends under concurrent reads and writes')
+    parser.add_argument('--students', type=int, default=10000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=1)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--stores', default='dict,columnar,sqlite,shared')
+    args = parser.parse_args()
+
+    students = list(make_students(args.students))
+    print("%d students, %d reader / %d writer threads, %.0fs per backend" % (
+        args.students, args.readers, args.writers, args.seconds))
+    print("%-9s %14s %14s" % ('store', 'reads/s', 'writes/s'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for kind in args.stores.split(','):
+            reads, writes = run(kind, students, args.readers, args.writers, args.seconds,
+                                os.path.join(tmp, '%s.db' % kind))
+            print("%-9s %14.0f %14.0f" % (kind, reads, writes))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# Memory and scan-time benchmark for the dict and columnar student stores
+# Each store is built in its own process so RSS numbers do not mix
+# Also times single-student add() and update() calls on the full store,
+# which keep every index up to date one student at a time
+# Usage: python benchmarks/bench_student_store.py [--students 1000000]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Computer Science", "English", "History"]
+
+# Single-student writes timed after the bulk load
+SINGLE_WRITES = 200
+
+
+def rss_mb():
+    """Resident set size of this process in MB"""
+    with open('/proc/self/statm') as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def make_students(count, seed=42):
+    """Yield synthetic student dicts shaped like dummy_data.STUDENTS"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    attendance = rng.integers(50, 101, count).tolist()
+    assignments = rng.integers(0, 16, count).tolist()
+    marks = rng.integers(30, 101, count).tolist()
+    study_hours = (rng.integers(0, 21, count) / 2).tolist()
+    cgpa = rng.uniform(4, 10, count).round(1).tolist()
+    first = rng.integers(0, len(SUBJECTS), count).tolist()
+    second = rng.integers(0, len(SUBJECTS), count).tolist()
+
+    for i in range(count):
+        reg_no = "STU%07d" % i
+        yield {
+            "reg_no": reg_no,
+            "password": "pw@%d" % i,
+            "name": "Student %d" % i,
+            "email": "%s@school.com" % reg_no.lower(),
+            "attendance": attendance[i],
+            "assignments": assignments[i],
+            "marks": marks[i],
+            "study_hours": study_hours[i],
+            "cgpa": cgpa[i],
+            "subjects": sorted({SUBJECTS[first[i]], SUBJECTS[second[i]]})
+        }
+
+
+def timed(fn, repeat=3):
+    """Best wall time of fn() in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_child(kind, count):
+    """Build one store and measure it; returns a dict of results"""
+    import random
+
+    from services.student_store import create_student_store
+
+    base = rss_mb()
+    start = time.perf_counter()
+    store = create_student_store(kind)
+    batch = []
+    for student in make_students(count):
+        batch.append(student)
+        if len(batch) == 100000:
+            store.add_many(batch)
+            batch = []
+    store.add_many(batch)
+    build_s = time.perf_counter() - start
+    memory = rss_mb() - base
+
+    if kind == 'dict':
+        students = store.all()
+        low_attendance = lambda: sum(1 for s in students if s['attendance'] < 80)
+        mean_cgpa = lambda: sum(s['cgpa'] for s in students) / len(students)
+    else:
+        _, cols = store.columns()
+        low_attendance = lambda: int((cols['attendance'] < 80).sum())
+        mean_cgpa = lambda: float(cols['cgpa'].mean())
+
+    keys = ["STU%07d" % random.randrange(count) for _ in range(100000)]
+
+    # Mean time of one add() / update() on the full store
+    extra = list(make_students(SINGLE_WRITES, seed=7))
+    for i, student in enumerate(extra):
+        student['reg_no'] = "NEW%07d" % i
+    start = time.perf_counter()
+    for student in extra:
+        store.add(student)
+    add_one_ms = (time.perf_counter() - start) * 1000 / SINGLE_WRITES
+    start = time.perf_counter()
+    for i, key in enumerate(keys[:SINGLE_WRITES]):
+        store.update(key, {'cgpa': float(i % 10), 'subjects': [SUBJECTS[i % len(SUBJECTS)]]})
+    update_one_ms = (time.perf_counter() - start) * 1000 / SINGLE_WRITES
+
+    return {
+        'store': kind,
+        'students': count,
+        'build_s': build_s,
+        'memory_mb': memory,
+        'count_attendance_lt_80_ms': timed(low_attendance),
+        'mean_cgpa_ms': timed(mean_cgpa),
+        'columns_ms': timed(store.columns),
+        'get_100k_ms': timed(lambda: [store.get(k) for k in keys]),
+        'page_50_ms': timed(lambda: store.query('cgpa', True, {'attendance': (80, None)}, None, None, 50)),
+        'add_one_ms': add_one_ms,
+        'update_one_ms': update_one_ms
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare dict and columnar student stores')
+    parser.add_argument('--students', type=int, default=1000000)
+    parser.add_argument('--child', choices=['dict', 'columnar'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.students)))
+        return
+
+    columns = ['build_s', 'memory_mb', 'count_attendance_lt_80_ms', 'mean_cgpa_ms', 'columns_ms', 'get_100k_ms', 'page_50_ms',
+               'add_one_ms', 'update_one_ms']
+    print("%-9s" % 'store' + ''.join("%16s" % c[:15] for c in columns))
+    for kind in ('dict', 'columnar'):
+        output = subprocess.check_output(
+            [sys.executable, os.path.abspath(__file__), '--students', str(args.students), '--child', kind],
+            cwd=BACKEND_DIR
+        )
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        print("%-9s" % kind + ''.join("%16.1f" % result[c] for c in columns))
+
+
+if __name__ == '__main__':
+    main()
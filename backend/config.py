@@ -0,0 +1,113 @@
+# Application configuration
+# Every setting can be overridden with an environment variable of the same name,
+# or per app by passing a Config to create_app()
+
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BACKEND_DIR)
+
+
+class Config:
+    """
+    Configuration for one app
+    Config() reads every setting from the environment when it is created, so
+    each create_app() call sees the environment as it is at that moment
+    Keyword arguments replace single settings, e.g. Config(STUDENT_STORE='columnar')
+    """
+
+    def __init__(self, environ=None, **overrides):
+        if environ is None:
+            environ = os.environ
+
+        # Student storage backend: "dict" (dummy_data.STUDENTS), "columnar", "sqlite" or "shared"
+        self.STUDENT_STORE = environ.get('STUDENT_STORE', 'dict')
+
+        # Database file used when STUDENT_STORE is "sqlite"
+        self.SQLITE_PATH = environ.get('SQLITE_PATH', os.path.join(BACKEND_DIR, 'students.db'))
+
+        # Memory-mapped table used when STUDENT_STORE is "shared"; every worker
+        # process maps the same file, so keep it on a RAM-backed filesystem
+        self.SHARED_TABLE_PATH = environ.get(
+            'SHARED_TABLE_PATH',
+            '/dev/shm/student_table' if os.path.isdir('/dev/shm') else os.path.join(BACKEND_DIR, 'student_table')
+        )
+
+        # If set, the dict and columnar stores log every write to this directory,
+        # snapshot themselves in the background and are restored from it on startup
+        self.DATA_DIR = environ.get('DATA_DIR') or None
+
+        # Seconds between fsyncs of the change log (writes in between share one fsync)
+        self.WAL_FSYNC_INTERVAL = float(environ.get('WAL_FSYNC_INTERVAL', 0.05))
+
+        # Seconds between background snapshots (only taken if something changed)
+        self.SNAPSHOT_INTERVAL = float(environ.get('SNAPSHOT_INTERVAL', 300))
+
+        # Rule table for performance report suggestions
+        self.REPORT_RULES_PATH = environ.get('REPORT_RULES_PATH', os.path.join(BACKEND_DIR, 'report_rules.json'))
+
+        # Maximum number of cached student payloads
+        self.REPORT_CACHE_SIZE = int(environ.get('REPORT_CACHE_SIZE', 10000))
+
+        # Maximum number of cached roster responses, and their total size in bytes
+        self.ROSTER_CACHE_SIZE = int(environ.get('ROSTER_CACHE_SIZE', 256))
+        self.ROSTER_CACHE_BYTES = int(environ.get('ROSTER_CACHE_BYTES', 256 * 1024 * 1024))
+
+        # Rows validated and inserted per batch by the bulk import endpoint
+        self.IMPORT_CHUNK_SIZE = int(environ.get('IMPORT_CHUNK_SIZE', 1000))
+
+        # Dataset the online trainer always includes in its fit
+        self.TRAINING_DATA_PATH = environ.get('TRAINING_DATA_PATH', os.path.join(PROJECT_DIR, 'data', 'student_data.csv'))
+
+        # Refit and swap the score model after this many new training rows (0 = only on request)
+        self.RETRAIN_EVERY = int(environ.get('RETRAIN_EVERY', 50))
+
+        # Number of model versions kept for rollback
+        self.MODEL_HISTORY = int(environ.get('MODEL_HISTORY', 20))
+
+        # Maximum number of cached single predictions
+        self.PREDICTION_CACHE_SIZE = int(environ.get('PREDICTION_CACHE_SIZE', 4096))
+
+        # Risk points each fired report rule adds on top of (100 - predicted score)
+        self.RISK_RULE_WEIGHT = float(environ.get('RISK_RULE_WEIGHT', 10))
+
+        # Record per-route latency, size and error metrics for GET /api/metrics ("0" to turn off)
+        self.METRICS_ENABLED = environ.get('METRICS_ENABLED', '1') != '0'
+
+        # Profile a sample of requests ("1" to start enabled; can be toggled at /api/profiling)
+        self.PROFILE_ENABLED = environ.get('PROFILE_ENABLED', '0') == '1'
+
+        # Fraction of requests profiled while profiling is enabled
+        self.PROFILE_SAMPLE_RATE = float(environ.get('PROFILE_SAMPLE_RATE', 0.01))
+
+        # "cprofile" writes one pstats dump per request, "stacks" merges sampled stacks per route
+        self.PROFILE_MODE = environ.get('PROFILE_MODE', 'cprofile')
+
+        # Directory for profiles, and the number of pstats dumps kept in it
+        self.PROFILE_DIR = environ.get('PROFILE_DIR', os.path.join(BACKEND_DIR, 'profiles'))
+        self.PROFILE_KEEP = int(environ.get('PROFILE_KEEP', 200))
+
+        # Seconds between stack samples in "stacks" mode
+        self.PROFILE_INTERVAL = float(environ.get('PROFILE_INTERVAL', 0.005))
+
+        # Secret for the X-Profile-Token header, which profiles that request and
+        # authorizes /api/profiling; both are refused while it is unset
+        self.PROFILE_TOKEN = environ.get('PROFILE_TOKEN') or None
+
+        # Route modules to serve; a worker that only needs some routes imports only those
+        self.BLUEPRINTS = [name.strip() for name in environ.get(
+            'BLUEPRINTS', 'auth,student,teacher,prediction,metrics,profiling'
+        ).split(',') if name.strip()]
+
+        # Subsystems loaded by create_app() instead of on first use: any of "model",
+        # "rules", "store" and "search" (under gunicorn, loaded in the master before forking)
+        self.PRELOAD = [name.strip() for name in environ.get('PRELOAD', '').split(',') if name.strip()]
+
+        for key, value in overrides.items():
+            if key not in vars(self):
+                raise ValueError("Unknown setting: %s" % key)
+            setattr(self, key, value)
+
+    def settings(self):
+        """Every setting as a dict, e.g. for Flask's app.config"""
+        return {key: value for key, value in vars(self).items() if key.isupper()}
@@ -0,0 +1,23 @@
+# Export the pickled model to the compact coefficient format
+# Usage: python export_model.py [model.pkl] [model.json]
+
+import os
+import sys
+
+from services.prediction_service import COMPACT_MODEL_PATH, MODEL_PATH, PredictionService, export_compact
+
+def main(argv):
+    source = argv[1] if len(argv) > 1 else MODEL_PATH
+    target = argv[2] if len(argv) > 2 else COMPACT_MODEL_PATH
+
+    model = PredictionService.load_pickle(source)
+    payload = export_compact(model, target, source=os.path.basename(source))
+
+    print("Exported %s -> %s" % (source, target))
+    print("  version:   %s" % payload['version'])
+    print("  features:  %s" % ', '.join(payload['features']))
+    print("  checksum:  %s" % payload['checksum'])
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
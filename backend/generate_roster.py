@@ -0,0 +1,57 @@
+# Generate a synthetic roster for scale testing
+# Usage: python generate_roster.py 1000000 --csv students.csv
+#        python generate_roster.py 1000000 --arrow students.arrow
+#        python generate_roster.py 1000000 --store sqlite --path students.db
+#        python generate_roster.py 50 --teachers-json teachers.json
+
+import argparse
+import json
+import sys
+import time
+
+from services.student_store import create_student_store
+from services.synthetic_roster import SyntheticRoster, generate_teachers
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build a deterministic synthetic roster')
+    parser.add_argument('students', type=int, help='number of students')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--csv', help='write the students to a CSV file')
+    parser.add_argument('--arrow', help='write the students to an Arrow IPC stream file')
+    parser.add_argument('--store', choices=['sqlite', 'shared'], help='add the students to a persistent store')
+    parser.add_argument('--path', help='database or table file for --store')
+    parser.add_argument('--teachers', type=int, default=0, help='number of teachers for --teachers-json')
+    parser.add_argument('--teachers-json', help='write the teachers to a JSON file')
+    args = parser.parse_args()
+
+    if args.store and not args.path:
+        parser.error("--store needs --path")
+
+    start = time.perf_counter()
+    roster = SyntheticRoster(args.students, args.seed)
+    print("generated %d students in %.2fs" % (args.students, time.perf_counter() - start))
+
+    if args.csv:
+        start = time.perf_counter()
+        roster.write_csv(args.csv)
+        print("wrote %s in %.2fs" % (args.csv, time.perf_counter() - start))
+    if args.arrow:
+        start = time.perf_counter()
+        roster.write_arrow(args.arrow)
+        print("wrote %s in %.2fs" % (args.arrow, time.perf_counter() - start))
+    if args.store:
+        start = time.perf_counter()
+        store = create_student_store(args.store, sqlite_path=args.path, shared_path=args.path)
+        failed = roster.load_into(store)
+        print("added %d students to %s in %.2fs" % (args.students - failed, args.path, time.perf_counter() - start))
+    if args.teachers_json:
+        with open(args.teachers_json, 'w') as f:
+            json.dump(generate_teachers(args.teachers or 1, args.seed), f, indent=2)
+            f.write('\n')
+        print("wrote %s" % args.teachers_json)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
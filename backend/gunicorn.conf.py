@@ -0,0 +1,29 @@
+# Gunicorn launcher for running the API under several worker processes
+# Every worker maps the same shared student table, so a write made through
+# one worker is visible to all of them at once
+# Usage (from backend/): gunicorn -c gunicorn.conf.py
+# WORKERS sets the number of processes (default: one per CPU core)
+
+import multiprocessing
+import os
+import sys
+
+# Workers inherit this environment, so they all pick the shared store
+os.environ.setdefault('STUDENT_STORE', 'shared')
+
+wsgi_app = 'app:create_app()'
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('THREADS', 4))
+
+# Without PRELOAD every worker builds its own app and loads subsystems on
+# first use. With PRELOAD (e.g. "model,store") the master builds the app and
+# loads them once before forking, so workers start warm and share those
+# pages copy-on-write
+preload_app = bool(os.environ.get('PRELOAD'))
+
+
+def post_fork(server, worker):
+    # Only a preloaded master has a store to hand down
+    if 'services.data_service' in sys.modules:
+        sys.modules['services.data_service'].DataService.after_fork()
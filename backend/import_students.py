@@ -0,0 +1,46 @@
+# Upload a CSV or NDJSON file of students to the running API
+# The file is streamed, so large intakes never have to fit in memory
+# Usage: python import_students.py students.csv [--update] [--url http://localhost:5000/api]
+
+import argparse
+import json
+import os
+import sys
+
+import requests
+
+# Content type sent for each file extension
+CONTENT_TYPES = {
+    '.csv': 'text/csv',
+    '.ndjson': 'application/x-ndjson',
+    '.jsonl': 'application/x-ndjson'
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk add or update students from a CSV or NDJSON file')
+    parser.add_argument('path', help='.csv, .ndjson or .jsonl file')
+    parser.add_argument('--update', action='store_true', help='apply the rows as partial updates in one batch')
+    parser.add_argument('--url', default='http://localhost:5000/api', help='API base URL')
+    args = parser.parse_args()
+
+    content_type = CONTENT_TYPES.get(os.path.splitext(args.path)[1].lower())
+    if content_type is None:
+        parser.error("file must end in .csv, .ndjson or .jsonl")
+
+    with open(args.path, 'rb') as f:
+        if args.update:
+            response = requests.put(args.url + '/students/update', data=f, headers={'Content-Type': content_type})
+        else:
+            response = requests.post(args.url + '/students/import', data=f, headers={'Content-Type': content_type})
+
+    result = response.json()
+    for error in result.get('errors', []):
+        print("line %s (%s): %s" % (error['line'], error['reg_no'], error['message']), file=sys.stderr)
+    summary = {key: value for key, value in result.items() if key != 'errors'}
+    print(json.dumps(summary))
+    return 0 if result.get('success') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+# Helpers for cached JSON responses with ETag / 304 support
+from flask import Response, current_app, request
+
+def cached_json_response(cache, key, version, build_payload):
+    """
+    Return a JSON response for key, reusing the cached body when the
+    version has not changed
+    Answers If-None-Match with 304 Not Modified when the ETag matches,
+    and sends the gzip variant to clients that accept it
+    build_payload: called only on a cache miss
+    """
+    entry = cache.get(key, version)
+    if entry is None:
+        payload = build_payload()
+        body = (current_app.json.dumps(payload) + '\n').encode('utf-8')
+        entry = cache.put(key, version, payload, body)
+
+    return entry_response(entry, 'application/json')
+
+def entry_response(entry, mimetype, compress=True):
+    """
+    Return a response for a cache entry's body
+    Answers If-None-Match with 304 Not Modified when the ETag matches
+    compress: send the gzip variant to clients that accept it
+    """
+    # Pick the representation first: the gzip variant has its own ETag
+    body = None
+    etag = entry.etag
+    if compress and request.accept_encodings.quality('gzip') > 0:
+        body = entry.gzip_body()
+        if body is not None:
+            etag = entry.etag + '-gzip'
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body if body is not None else entry.body, status=200, mimetype=mimetype)
+        if body is not None:
+            response.headers['Content-Encoding'] = 'gzip'
+
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
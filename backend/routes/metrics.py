@@ -0,0 +1,84 @@
+# Request instrumentation and the Prometheus metrics endpoint
+from time import perf_counter
+
+from flask import Blueprint, Response, g, request
+
+from services.data_service import DataService
+from services.metrics import (
+    CONTENT_TYPE, REGISTRY, REQUEST_ERRORS, REQUEST_LATENCY, REQUESTS, REQUESTS_IN_FLIGHT, RESPONSE_SIZE,
+    Counter, Gauge
+)
+from services.prediction_service import PredictionService
+
+# Create blueprint for the metrics route
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/api')
+
+# Endpoint label for requests that matched no route
+UNMATCHED = '<unmatched>'
+
+def _before_request():
+    # Label by route pattern, not path, so every student shares one series
+    rule = request.url_rule
+    labels = (rule.rule if rule is not None else UNMATCHED, request.method)
+    # [labels, start time, status]; the status stays 500 if the view raises
+    g.metrics = [labels, perf_counter(), 500]
+    REQUESTS_IN_FLIGHT.inc(labels)
+
+def _after_request(response):
+    state = g.get('metrics')
+    if state is not None:
+        state[2] = response.status_code
+        size = response.content_length
+        if size is not None:
+            RESPONSE_SIZE.observe(state[0], size)
+    return response
+
+def _teardown_request(exc):
+    state = g.pop('metrics', None)
+    if state is None:
+        return
+    labels, start, status = state
+    REQUEST_LATENCY.observe(labels, perf_counter() - start)
+    REQUESTS_IN_FLIGHT.dec(labels)
+    REQUESTS.inc(labels + (str(status),))
+    if status >= 500:
+        REQUEST_ERRORS.inc(labels)
+
+def instrument_app(app):
+    """Record latency, status, size and in-flight counts for every request to app"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+def _collect_caches():
+    """Cache counters, read from the caches when metrics are rendered"""
+    hits = Counter('cache_hits_total', 'Cache lookups that found a current entry', ('cache',))
+    misses = Counter('cache_misses_total', 'Cache lookups that missed or found a stale entry', ('cache',))
+    evictions = Counter('cache_evictions_total', 'Entries dropped to stay within the size limits', ('cache',))
+    entries = Gauge('cache_entries', 'Entries currently cached', ('cache',))
+    ratio = Gauge('cache_hit_ratio', 'Hits divided by lookups since startup', ('cache',))
+    caches = {
+        'report': DataService.report_cache,
+        'roster': DataService.roster_cache,
+        'prediction': PredictionService.cache
+    }
+    for name, cache in caches.items():
+        stats = cache.stats()
+        labels = (name,)
+        hits.set(labels, stats['hits'])
+        misses.set(labels, stats['misses'])
+        evictions.set(labels, stats['evictions'])
+        entries.set(labels, stats['size'])
+        lookups = stats['hits'] + stats['misses']
+        ratio.set(labels, stats['hits'] / lookups if lookups else 0.0)
+    return [hits, misses, evictions, entries, ratio]
+
+REGISTRY.add_collector(_collect_caches)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Request, DataService and cache metrics in the Prometheus text format
+    Each worker process reports its own counters
+    """
+    return Response(REGISTRY.render(), status=200, content_type=CONTENT_TYPE)
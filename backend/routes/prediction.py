@@ -0,0 +1,127 @@
+# Prediction routes for final score predictions
+from flask import Blueprint, request, jsonify
+from services.prediction_service import PredictionService
+
+# Create blueprint for prediction routes
+prediction_bp = Blueprint('prediction', __name__, url_prefix='/api')
+
+@prediction_bp.route('/predict', methods=['POST'])
+def predict():
+    """
+    Predict the final score for a single student
+    Expected JSON:
+    {
+        "study_hours": 4,
+        "attendance": 85,
+        "previous_marks": 78
+    }
+    """
+    try:
+        data = request.get_json(silent=True)
+
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'message': 'No data provided'}), 400
+
+        try:
+            score = PredictionService.predict(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            'predicted_score': round(score, 2)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@prediction_bp.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Predict final scores for many students at once
+    Expected JSON:
+    {
+        "rows": [[4, 85, 78], [5, 92, 88]]
+    }
+    Rows can also be objects with study_hours, attendance and previous_marks
+    """
+    try:
+        data = request.get_json(silent=True)
+
+        if not isinstance(data, dict) or 'rows' not in data:
+            return jsonify({'success': False, 'message': 'Missing required field: rows'}), 400
+
+        try:
+            scores = PredictionService.predict_batch(data['rows'])
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            'count': int(scores.shape[0]),
+            'predicted_scores': scores.round(2).tolist()
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@prediction_bp.route('/model', methods=['GET'])
+def get_model_versions():
+    """
+    Get the live model version, the versions kept for rollback and the
+    prediction cache counters
+    """
+    try:
+        trainer = PredictionService.get_trainer()
+
+        return jsonify({
+            'success': True,
+            'active_version': PredictionService.get_model().version,
+            'training_rows': trainer.count,
+            'last_retrain_error': PredictionService.last_retrain_error,
+            'versions': PredictionService.model_versions(),
+            'prediction_cache': PredictionService.cache.stats()
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@prediction_bp.route('/model/retrain', methods=['POST'])
+def retrain_model():
+    """
+    Refit the model from the trainer's statistics and swap it in without a restart
+    """
+    try:
+        model = PredictionService.retrain()
+
+        return jsonify({
+            'success': True,
+            'active_version': model.version,
+            'coef': model.coef.tolist(),
+            'intercept': model.intercept
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@prediction_bp.route('/model/rollback', methods=['POST'])
+def rollback_model():
+    """
+    Make an older model version live again
+    Optional JSON: {"version": "online-3"}; without it the previous version is used
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+
+        try:
+            model = PredictionService.rollback(data.get('version'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+
+        return jsonify({
+            'success': True,
+            'active_version': model.version
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
@@ -0,0 +1,101 @@
+# Request profiling hooks and the admin route that controls them
+import hmac
+from time import perf_counter
+
+from flask import Blueprint, Response, current_app, g, jsonify, request
+
+from services.profiler import RequestProfiler
+
+# Create blueprint for the profiling admin routes
+profiling_bp = Blueprint('profiling', __name__, url_prefix='/api')
+
+# Header that asks for a request to be profiled and authorizes the admin routes
+TOKEN_HEADER = 'X-Profile-Token'
+
+def _profiler():
+    """The app's profiler, shared by every thread of this worker process"""
+    return current_app.extensions['profiler']
+
+def _has_token():
+    """Whether the request carries the app's profiling token"""
+    expected = current_app.config['PROFILE_TOKEN']
+    token = request.headers.get(TOKEN_HEADER)
+    return expected is not None and token is not None and hmac.compare_digest(token, expected)
+
+def _before_request():
+    profiler = _profiler()
+    # One attribute check while profiling is off
+    if not profiler.enabled:
+        return
+    requested = TOKEN_HEADER in request.headers and _has_token()
+    if profiler.should_profile(requested):
+        handle = profiler.start()
+        if handle is not None:
+            g.profile = (handle, perf_counter())
+
+def _teardown_request(exc):
+    state = g.pop('profile', None)
+    if state is None:
+        return
+    handle, start = state
+    rule = request.url_rule
+    _profiler().finish(handle, rule.rule if rule is not None else request.path, request.method, perf_counter() - start)
+
+def install_profiler(app, settings):
+    """Build app's profiler from settings and profile sampled requests while it is enabled"""
+    app.extensions['profiler'] = RequestProfiler(
+        settings.PROFILE_DIR, settings.PROFILE_ENABLED, settings.PROFILE_SAMPLE_RATE,
+        settings.PROFILE_MODE, settings.PROFILE_KEEP, settings.PROFILE_INTERVAL
+    )
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+
+@profiling_bp.route('/profiling', methods=['GET', 'PUT'])
+def profiling_settings():
+    """
+    Get or change this worker's profiling settings
+    Needs the X-Profile-Token header
+    Optional JSON for PUT: {"enabled": true, "sample_rate": 0.05, "mode": "stacks"}
+    """
+    try:
+        if not _has_token():
+            return jsonify({'success': False, 'message': 'Profiling token required'}), 403
+
+        if request.method == 'PUT':
+            data = request.get_json(silent=True)
+            if not isinstance(data, dict):
+                return jsonify({'success': False, 'message': 'No data provided'}), 400
+
+            enabled = data.get('enabled')
+            if enabled is not None and not isinstance(enabled, bool):
+                return jsonify({'success': False, 'message': 'enabled must be true or false'}), 400
+            sample_rate = data.get('sample_rate')
+            if sample_rate is not None and (isinstance(sample_rate, bool) or not isinstance(sample_rate, (int, float))):
+                return jsonify({'success': False, 'message': 'sample_rate must be a number'}), 400
+
+            try:
+                _profiler().configure(enabled, sample_rate, data.get('mode'))
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+
+        return jsonify({'success': True, **_profiler().status()}), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@profiling_bp.route('/profiling/stacks', methods=['GET'])
+def profiling_stacks():
+    """
+    Merged collapsed stacks from "stacks" mode, one "frame;frame;... count"
+    line per stack, ready for flamegraph.pl or speedscope
+    Optional query: ?route=/api/students
+    Needs the X-Profile-Token header
+    """
+    try:
+        if not _has_token():
+            return jsonify({'success': False, 'message': 'Profiling token required'}), 403
+
+        return Response(_profiler().stacks(request.args.get('route')), status=200, mimetype='text/plain')
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
@@ -1,6 +1,7 @@
 # Student routes for student-specific operations
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, jsonify
 from services.data_service import DataService
+from routes.caching import cached_json_response
 
 # Create blueprint for student routes
 student_bp = Blueprint('student', __name__, url_prefix='/api')
@@ -10,30 +11,36 @@ def get_student_dashboard(reg_no):
     """
     Get student dashboard data
     Returns student's academic details
+    Cached per student version; supports If-None-Match
     """
     try:
-        student = DataService.get_student(reg_no)
+        version = DataService.get_student_version(reg_no)
         
-        if not student:
+        if version is None:
             return jsonify({'success': False, 'message': 'Student not found'}), 404
         
-        # Return student data (without password)
-        student_data = {
-            'reg_no': student['reg_no'],
-            'name': student['name'],
-            'email': student['email'],
-            'attendance': student['attendance'],
-            'assignments': student['assignments'],
-            'marks': student['marks'],
-            'study_hours': student['study_hours'],
-            'cgpa': student['cgpa'],
-            'subjects': student['subjects']
-        }
-        
-        return jsonify({
-            'success': True,
-            'data': student_data
-        }), 200
+        def build_payload():
+            student = DataService.get_student(reg_no)
+            
+            # Return student data (without password)
+            student_data = {
+                'reg_no': student['reg_no'],
+                'name': student['name'],
+                'email': student['email'],
+                'attendance': student['attendance'],
+                'assignments': student['assignments'],
+                'marks': student['marks'],
+                'study_hours': student['study_hours'],
+                'cgpa': student['cgpa'],
+                'subjects': student['subjects']
+            }
+            
+            return {
+                'success': True,
+                'data': student_data
+            }
+        
+        return cached_json_response(DataService.report_cache, ('student', reg_no), version, build_payload)
     
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -42,17 +49,45 @@ def get_student_dashboard(reg_no):
 def get_student_report(reg_no):
     """
     Get student performance report with suggestions
+    Cached per student version; supports If-None-Match
     """
     try:
-        report = DataService.get_student_performance_report(reg_no)
+        version = DataService.get_student_version(reg_no)
         
-        if not report:
+        if version is None:
             return jsonify({'success': False, 'message': 'Student not found'}), 404
         
-        return jsonify({
-            'success': True,
-            'data': report
-        }), 200
+        def build_payload():
+            return {
+                'success': True,
+                'data': DataService.get_student_performance_report(reg_no)
+            }
+        
+        return cached_json_response(DataService.report_cache, ('report', reg_no), version, build_payload)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@student_bp.route('/student/<reg_no>/dashboard', methods=['GET'])
+def get_student_dashboard_page(reg_no):
+    """
+    Get the student's details and performance report in one response
+    Both are built from a single lookup of the student
+    Cached per student version; supports If-None-Match
+    """
+    try:
+        version = DataService.get_student_version(reg_no)
+        
+        if version is None:
+            return jsonify({'success': False, 'message': 'Student not found'}), 404
+        
+        def build_payload():
+            return {
+                'success': True,
+                'data': DataService.get_student_dashboard(reg_no)
+            }
+        
+        return cached_json_response(DataService.report_cache, ('dashboard', reg_no), version, build_payload)
     
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
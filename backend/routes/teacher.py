@@ -1,6 +1,13 @@
 # Teacher routes for teacher-specific operations
-from flask import Blueprint, request, jsonify
+import io
+import math
+
+from flask import Blueprint, Response, request, jsonify
+from services.bulk_import import reader_for
 from services.data_service import DataService
+from services.prediction_service import PredictionService
+from services.student_store import NUMERIC_FIELDS, PUBLIC_FIELDS
+from routes.caching import cached_json_response, entry_response
 
 # Create blueprint for teacher routes
 teacher_bp = Blueprint('teacher', __name__, url_prefix='/api')
@@ -34,35 +41,330 @@ def get_teacher_dashboard(teacher_id):
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@teacher_bp.route('/teacher/<teacher_id>/dashboard', methods=['GET'])
+def get_teacher_dashboard_page(teacher_id):
+    """
+    Get the teacher profile and the full roster (without passwords) in one response
+    Pre-serialized per store generation; supports If-None-Match
+    """
+    try:
+        if not DataService.get_teacher(teacher_id):
+            return jsonify({'success': False, 'message': 'Teacher not found'}), 404
+        
+        def build_payload():
+            dashboard = DataService.get_teacher_dashboard(teacher_id)
+            return {
+                'success': True,
+                'count': len(dashboard['students']),
+                'data': dashboard
+            }
+        
+        key = ('teacher_dashboard', teacher_id)
+        return cached_json_response(DataService.roster_cache, key, DataService.get_generation(), build_payload)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@teacher_bp.route('/teacher/<teacher_id>/students', methods=['GET'])
+def get_teacher_students(teacher_id):
+    """
+    Get the students enrolled in the teacher's subjects (without passwords)
+    Optional query parameter: subject (one of the teacher's subjects)
+    """
+    try:
+        if not DataService.get_teacher(teacher_id):
+            return jsonify({'success': False, 'message': 'Teacher not found'}), 404
+        
+        subject = request.args.get('subject')
+        
+        def build_payload():
+            students = DataService.get_teacher_students(teacher_id, subject)
+            students_data = [{field: student[field] for field in PUBLIC_FIELDS} for student in students]
+            return {
+                'success': True,
+                'teacher_id': teacher_id,
+                'subjects': DataService.get_teacher_subjects(teacher_id),
+                'count': len(students_data),
+                'data': students_data
+            }
+        
+        key = ('teacher_students', teacher_id, subject)
+        return cached_json_response(DataService.roster_cache, key, DataService.get_generation(), build_payload)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+# Fields /api/students can filter on with min_<field> / max_<field>
+RANGE_FILTER_FIELDS = ['cgpa', 'marks', 'attendance']
+
+# Largest page a client can ask for
+MAX_PAGE_SIZE = 1000
+
+# Most results and longest query /api/students/search accepts
+MAX_SEARCH_RESULTS = 100
+MAX_SEARCH_LENGTH = 100
+
+def parse_float_arg(args, name):
+    """Read an optional float query parameter; raises ValueError if malformed"""
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError("%s must be a number" % name)
+    if not math.isfinite(number):
+        raise ValueError("%s must be a finite number" % name)
+    return number
+
+def parse_roster_query(args):
+    """
+    Parse /api/students query parameters
+    Returns keyword arguments for DataService.query_students and the
+    projected field list; raises ValueError for invalid parameters
+    """
+    sort = args.get('sort', 'reg_no')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    
+    ranges = {}
+    for field in RANGE_FILTER_FIELDS:
+        low = parse_float_arg(args, 'min_' + field)
+        high = parse_float_arg(args, 'max_' + field)
+        if low is not None or high is not None:
+            ranges[field] = (low, high)
+    
+    limit = args.get('limit')
+    if limit is not None:
+        if not limit.isdecimal() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+            raise ValueError("limit must be between 1 and %d" % MAX_PAGE_SIZE)
+        limit = int(limit)
+    
+    fields = PUBLIC_FIELDS
+    if args.get('fields'):
+        fields = [field.strip() for field in args['fields'].split(',') if field.strip()]
+        unknown = [field for field in fields if field not in PUBLIC_FIELDS]
+        if unknown:
+            raise ValueError("Unknown fields: %s" % ', '.join(unknown))
+    
+    query = {
+        'sort': sort,
+        'descending': descending,
+        'ranges': ranges,
+        'subject': args.get('subject') or None,
+        'cursor': args.get('cursor') or None,
+        'limit': limit
+    }
+    return query, fields
+
 @teacher_bp.route('/students', methods=['GET'])
 def get_all_students():
     """
-    Get all student records for teacher view
-    Returns list of all students (without passwords)
-    """
-    try:
-        students = DataService.get_all_students()
-        
-        # Remove passwords from student data
-        students_data = []
-        for student in students:
-            student_info = {
-                'reg_no': student['reg_no'],
-                'name': student['name'],
-                'email': student['email'],
-                'attendance': student['attendance'],
-                'assignments': student['assignments'],
-                'marks': student['marks'],
-                'study_hours': student['study_hours'],
-                'cgpa': student['cgpa'],
-                'subjects': student['subjects']
-            }
-            students_data.append(student_info)
+    Get student records for teacher view (without passwords)
+    Optional query parameters:
+        sort=reg_no|cgpa|marks|attendance (prefix with - for descending)
+        min_cgpa, max_cgpa, min_marks, max_marks, min_attendance, max_attendance
+        subject=Mathematics
+        fields=reg_no,name,cgpa (projection)
+        limit=50 and cursor=<next_cursor> for pagination
+    Without limit every matching student is returned
+    Responses are pre-serialized per query and store generation, with
+    gzip variants and ETag / 304 support
+    """
+    try:
+        query, fields = parse_roster_query(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    def build_payload():
+        students, next_cursor = DataService.query_students(**query)
         
-        return jsonify({
+        # Only return the requested fields (never the password)
+        students_data = [{field: student[field] for field in fields} for student in students]
+        
+        return {
             'success': True,
+            'count': len(students_data),
+            'next_cursor': next_cursor,
             'data': students_data
-        }), 200
+        }
+    
+    try:
+        key = ('roster', tuple(sorted(request.args.items(multi=True))))
+        return cached_json_response(DataService.roster_cache, key, DataService.get_generation(), build_payload)
+    
+    except ValueError as e:
+        # Raised by an invalid cursor or sort while building the page
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+def roster_record_batches(arrow_export, query, fields):
+    """
+    Record batches of the whole roster matching a query, built from the
+    store's columns; rows are selected before the first batch is built
+    """
+    reg_nos, columns, rows = DataService.get_roster_columns(
+        [field for field in fields if field in NUMERIC_FIELDS],
+        query['sort'], query['descending'], query['ranges'], query['subject']
+    )
+    return arrow_export.roster_batches(reg_nos, columns, rows, fields, DataService.get_roster_fields)
+
+def columnar_roster_response(kind):
+    """
+    Answer /api/students.arrow or /api/students.parquet
+    Takes the same query parameters as /api/students; the next page cursor
+    is sent in the X-Next-Cursor header
+    Whole-roster exports (no limit or cursor) are built from the store's
+    columns: Arrow is streamed batch by batch, Parquet is encoded whole
+    and cached like every page
+    """
+    try:
+        from services import arrow_export
+    except ImportError:
+        return jsonify({'success': False, 'message': 'Columnar export needs pyarrow installed'}), 501
+    
+    try:
+        query, fields = parse_roster_query(request.args)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        whole = query['limit'] is None and query['cursor'] is None
+        if kind == 'arrow' and whole:
+            batches = roster_record_batches(arrow_export, query, fields)
+            response = Response(
+                arrow_export.stream_batches(arrow_export.roster_schema(fields), batches),
+                status=200, mimetype=arrow_export.ARROW_MIMETYPE
+            )
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        
+        key = ('roster_' + kind, tuple(sorted(request.args.items(multi=True))))
+        version = DataService.get_generation()
+        entry = DataService.roster_cache.get(key, version)
+        if entry is None:
+            if whole:
+                batches = roster_record_batches(arrow_export, query, fields)
+                table = arrow_export.batches_table(fields, batches)
+                next_cursor = None
+            else:
+                students, next_cursor = DataService.query_students(**query)
+                table = arrow_export.roster_table(students, fields)
+            if kind == 'arrow':
+                body = arrow_export.encode_stream(table)
+            else:
+                body = arrow_export.encode_parquet(table)
+            entry = DataService.roster_cache.put(key, version, next_cursor, body)
+        
+        if kind == 'arrow':
+            # Record batches are uncompressed, so gzip still pays off
+            response = entry_response(entry, arrow_export.ARROW_MIMETYPE)
+        else:
+            response = entry_response(entry, arrow_export.PARQUET_MIMETYPE, compress=False)
+            response.headers['Content-Disposition'] = 'attachment; filename=students.parquet'
+        if entry.payload:
+            response.headers['X-Next-Cursor'] = entry.payload
+        return response
+    
+    except ValueError as e:
+        # Raised by an invalid cursor or sort while building the page
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@teacher_bp.route('/students.arrow', methods=['GET'])
+def get_students_arrow():
+    """
+    Get the roster as an Arrow IPC stream of record batches
+    Same query parameters as /api/students; numeric fields are float64
+    """
+    return columnar_roster_response('arrow')
+
+@teacher_bp.route('/students.parquet', methods=['GET'])
+def get_students_parquet():
+    """
+    Get the roster as a Parquet file
+    Same query parameters as /api/students; numeric fields are float64
+    """
+    return columnar_roster_response('parquet')
+
+@teacher_bp.route('/students/at-risk', methods=['GET'])
+def get_at_risk_students():
+    """
+    Get the k students most likely to fail, highest risk first
+    Query parameters:
+        k=10 (at most MAX_PAGE_SIZE)
+        teacher_id=TCH001 to rank only students in that teacher's subjects
+        subject=Mathematics to rank only one subject
+    Risk combines the model's predicted score with the report rules
+    """
+    k = request.args.get('k', '10')
+    if not k.isdecimal() or not 1 <= int(k) <= MAX_PAGE_SIZE:
+        return jsonify({'success': False, 'message': 'k must be between 1 and %d' % MAX_PAGE_SIZE}), 400
+    k = int(k)
+    
+    teacher_id = request.args.get('teacher_id')
+    subject = request.args.get('subject')
+    subjects = None
+    if teacher_id:
+        if not DataService.get_teacher(teacher_id):
+            return jsonify({'success': False, 'message': 'Teacher not found'}), 404
+        subjects = DataService.get_teacher_subjects(teacher_id)
+        if subject:
+            subjects = [subject] if subject in subjects else []
+    elif subject:
+        subjects = [subject]
+    
+    def build_payload():
+        students = DataService.get_at_risk_students(k, subjects)
+        return {
+            'success': True,
+            'count': len(students),
+            'data': students
+        }
+    
+    try:
+        # Scores depend on both the roster and the live model
+        version = (DataService.get_generation(), PredictionService.get_model().version)
+        key = ('at_risk', k, teacher_id, subject)
+        return cached_json_response(DataService.roster_cache, key, version, build_payload)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@teacher_bp.route('/students/search', methods=['GET'])
+def search_students():
+    """
+    Find students by name, reg_no or email, for search-as-you-type
+    Query parameters:
+        q=ani sh (every word must match the start of a word, or a name word with one typo)
+        limit=20 (at most MAX_SEARCH_RESULTS)
+    Returns reg_no, name and email of the best matches
+    """
+    query = ' '.join(request.args.get('q', '').lower().split())
+    if not query:
+        return jsonify({'success': False, 'message': 'q is required'}), 400
+    if len(query) > MAX_SEARCH_LENGTH:
+        return jsonify({'success': False, 'message': 'q is longer than %d characters' % MAX_SEARCH_LENGTH}), 400
+    limit = request.args.get('limit', '20')
+    if not limit.isdecimal() or not 1 <= int(limit) <= MAX_SEARCH_RESULTS:
+        return jsonify({'success': False, 'message': 'limit must be between 1 and %d' % MAX_SEARCH_RESULTS}), 400
+    limit = int(limit)
+    
+    def build_payload():
+        students = DataService.search_students(query, limit)
+        return {
+            'success': True,
+            'count': len(students),
+            'data': students
+        }
+    
+    try:
+        key = ('search', query, limit)
+        return cached_json_response(DataService.roster_cache, key, DataService.get_generation(), build_payload)
     
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -103,6 +405,66 @@ def add_student():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def upload_rows():
+    """
+    Stream the request body through the CSV or NDJSON row reader
+    Raises ValueError for an unsupported content type
+    """
+    read_rows = reader_for(request.mimetype)
+    return read_rows(io.TextIOWrapper(request.stream, encoding='utf-8', newline=''))
+
+@teacher_bp.route('/students/import', methods=['POST'])
+def import_students():
+    """
+    Add many students from a streamed upload
+    Body: CSV with a header row of field names (subjects separated by ";")
+    sent as text/csv, or one JSON student per line sent as application/x-ndjson
+    Rows are validated and inserted in chunks; invalid rows are skipped and
+    reported with their line number
+    """
+    try:
+        rows = upload_rows()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 415
+    
+    try:
+        result = DataService.import_students(rows)
+        
+        return jsonify({'success': True, **result}), 200
+    
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'message': 'Upload must be UTF-8'}), 400
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@teacher_bp.route('/students/update', methods=['PUT'])
+def update_students():
+    """
+    Apply many partial updates as one batch
+    Body: CSV or NDJSON like /api/students/import, where each row has a
+    reg_no and the fields to change (empty CSV cells are left unchanged)
+    Can update: attendance, assignments, marks, study_hours, cgpa, email
+    If any row is invalid, nothing is applied and every bad row is reported
+    """
+    try:
+        rows = upload_rows()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 415
+    
+    try:
+        result = DataService.update_students(rows)
+        
+        if result['errors']:
+            return jsonify({'success': False, 'message': 'No students were updated', **result}), 400
+        return jsonify({'success': True, **result}), 200
+    
+    except UnicodeDecodeError:
+        return jsonify({'success': False, 'message': 'Upload must be UTF-8'}), 400
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @teacher_bp.route('/student/update/<reg_no>', methods=['PUT'])
 def update_student(reg_no):
     """
@@ -115,12 +477,15 @@ def update_student(reg_no):
         if not data:
             return jsonify({'success': False, 'message': 'No data provided'}), 400
         
+        if DataService.get_student_version(reg_no) is None:
+            return jsonify({'success': False, 'message': 'Student not found'}), 404
+        
         result = DataService.update_student(reg_no, data)
         
         if result['success']:
             return jsonify(result), 200
         else:
-            return jsonify(result), 404
+            return jsonify(result), 400
     
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -129,18 +494,43 @@ def update_student(reg_no):
 def get_student_suggestions(reg_no):
     """
     Get improvement suggestions for a student based on performance
+    Cached per student version; supports If-None-Match
     """
     try:
-        report = DataService.get_student_performance_report(reg_no)
+        version = DataService.get_student_version(reg_no)
         
-        if not report:
+        if version is None:
             return jsonify({'success': False, 'message': 'Student not found'}), 404
         
+        def build_payload():
+            report = DataService.get_student_performance_report(reg_no)
+            return {
+                'success': True,
+                'reg_no': report['reg_no'],
+                'name': report['name'],
+                'suggestions': report['suggestions']
+            }
+        
+        return cached_json_response(DataService.report_cache, ('suggestions', reg_no), version, build_payload)
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@teacher_bp.route('/reports', methods=['GET'])
+def get_performance_reports():
+    """
+    Get performance reports with suggestions for a whole class
+    Optional query parameter: subject (e.g. /api/reports?subject=Physics)
+    """
+    try:
+        subject = request.args.get('subject')
+        result = DataService.get_performance_reports(subject)
+        
         return jsonify({
             'success': True,
-            'reg_no': report['reg_no'],
-            'name': report['name'],
-            'suggestions': report['suggestions']
+            'count': len(result['reports']),
+            'summary': result['summary'],
+            'data': result['reports']
         }), 200
     
     except Exception as e:
@@ -0,0 +1,105 @@
+# Columnar roster export for analytics consumers
+# Encodes student lists as Arrow IPC streams or Parquet files (needs pyarrow)
+# Whole-roster Arrow exports are streamed: record batches are built from
+# the store's numeric columns one at a time and sent as they are encoded
+
+import io
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from services.student_store import NUMERIC_FIELDS
+
+# Arrow type of every field the roster can return
+FIELD_TYPES = {
+    'reg_no': pa.string(),
+    'name': pa.string(),
+    'email': pa.string(),
+    'subjects': pa.list_(pa.string())
+}
+FIELD_TYPES.update({field: pa.float64() for field in NUMERIC_FIELDS})
+
+# Rows per record batch in an IPC stream
+BATCH_ROWS = 65536
+
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+
+
+def roster_schema(fields):
+    """Arrow schema with one column per requested field"""
+    return pa.schema([(field, FIELD_TYPES[field]) for field in fields])
+
+
+def roster_table(students, fields):
+    """Build an Arrow table with one column per requested field"""
+    return pa.table({
+        field: pa.array([student[field] for student in students], type=FIELD_TYPES[field])
+        for field in fields
+    })
+
+
+def batches_table(fields, batches):
+    """Collect record batches into one table"""
+    return pa.Table.from_batches(list(batches), schema=roster_schema(fields))
+
+
+def encode_stream(table, batch_rows=BATCH_ROWS):
+    """Serialize a table as an Arrow IPC stream of record batches"""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=batch_rows):
+            writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_parquet(table):
+    """Serialize a table as a Parquet file"""
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+def roster_batches(reg_nos, columns, rows, fields, read_fields, batch_rows=BATCH_ROWS):
+    """
+    Yield record batches for the given rows, in order
+    reg_nos / columns / rows: as returned by DataService.get_roster_columns
+    Numeric fields are sliced straight from the columns; the others come
+    from read_fields(reg_nos, rows, fields), one batch at a time
+    """
+    schema = roster_schema(fields)
+    other_fields = [field for field in fields if field not in columns and field != 'reg_no']
+    for start in range(0, len(rows), batch_rows):
+        chunk = rows[start:start + batch_rows]
+        others = read_fields(reg_nos, chunk, other_fields) if other_fields else {}
+        arrays = []
+        for field in fields:
+            if field in columns:
+                arrays.append(pa.array(np.ascontiguousarray(columns[field][chunk]), type=pa.float64()))
+            elif field == 'reg_no':
+                arrays.append(pa.array([reg_nos[row] for row in chunk.tolist()], type=pa.string()))
+            else:
+                arrays.append(pa.array(others[field], type=FIELD_TYPES[field]))
+        yield pa.record_batch(arrays, schema=schema)
+
+
+def stream_batches(schema, batches):
+    """
+    Encode record batches as an Arrow IPC stream, yielding the bytes of
+    each batch as soon as it is written, so the body is never held whole
+    """
+    buffer = io.BytesIO()
+
+    def drain():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    with pa.ipc.new_stream(buffer, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield drain()
+    # End-of-stream marker (and the schema, if there were no batches)
+    yield drain()
@@ -0,0 +1,92 @@
+# Streaming readers for bulk student uploads
+# CSV files use a header row of field names, like data/student_data.csv;
+# NDJSON files have one JSON object per line. Rows are parsed one at a
+# time, so an upload is never held in memory as a whole
+
+import csv
+import json
+
+from services.student_store import NUMERIC_FIELDS
+
+# Separator between subjects in a CSV cell ("Mathematics;Physics")
+SUBJECT_SEPARATOR = ';'
+
+CSV_MIMETYPES = ('text/csv', 'application/csv')
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+def _number(field, text):
+    """Parse a CSV number, keeping whole numbers as ints like the JSON API"""
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        raise ValueError("%s must be a number" % field)
+
+
+def read_csv(lines):
+    """
+    Yield (line, record, error) for each CSV row
+    Empty cells are left out of the record, so an update only changes the
+    columns that have a value
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        record = {}
+        try:
+            for field, text in row.items():
+                if field is None:
+                    raise ValueError("Row has more cells than the header")
+                text = (text or '').strip()
+                if not text:
+                    continue
+                if field in NUMERIC_FIELDS:
+                    record[field] = _number(field, text)
+                elif field == 'subjects':
+                    record[field] = [s.strip() for s in text.split(SUBJECT_SEPARATOR) if s.strip()]
+                else:
+                    record[field] = text
+        except ValueError as e:
+            yield reader.line_num, None, str(e)
+            continue
+        yield reader.line_num, record, None
+
+
+def read_ndjson(lines):
+    """Yield (line, record, error) for each non-blank NDJSON line"""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "Each line must be a JSON object"
+            continue
+        yield number, record, None
+
+
+def reader_for(mimetype):
+    """Pick the row reader for a request content type; raises ValueError if unsupported"""
+    if mimetype in CSV_MIMETYPES:
+        return read_csv
+    if mimetype in NDJSON_MIMETYPES:
+        return read_ndjson
+    raise ValueError("Upload must be text/csv or application/x-ndjson")
+
+
+def chunks(rows, size):
+    """Group an iterable into lists of at most `size` items"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,416 @@
+# Columnar student store
+# Numeric fields live in contiguous NumPy arrays instead of one dict per student
+
+import numbers
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from services.student_indexes import INDEXED_FIELDS, IndexedQueryMixin, StudentIndexes
+from services.student_store import NUMERIC_FIELDS, check_fields, check_new_student
+
+# Text fields kept as Python lists, one entry per row
+TEXT_FIELDS = ['reg_no', 'password', 'name', 'email']
+
+# Bit in the int-flags column for each numeric field
+INT_FLAG_BITS = {field: 1 << i for i, field in enumerate(NUMERIC_FIELDS)}
+
+# Lock-free attempts at a consistent columns() copy before waiting for writers
+COLUMN_COPY_RETRIES = 8
+
+
+class ColumnarStudentStore(IndexedQueryMixin):
+    """
+    Array-backed student store with the same interface as DictStudentStore
+    - numeric fields are float64 columns, one row per student
+    - reg_no -> row index for O(1) lookups
+    - subjects are interned: each row points at a shared tuple of subject ids
+    - sorted secondary indexes over INDEXED_FIELDS
+    Rows are only ever appended, so row numbers stay stable and double as
+    index ordinals
+    Writers are serialized by a lock. Readers never lock: each row has a
+    sequence number that is odd while the row is being written, and a
+    reader that sees it change while copying a row simply copies it again
+    """
+
+    name = 'columnar'
+
+    def __init__(self, capacity=1024):
+        self._size = 0
+        self._rows = {}
+        self._text = {field: [] for field in TEXT_FIELDS}
+        self._numeric = {field: np.zeros(capacity, dtype=np.float64) for field in NUMERIC_FIELDS}
+
+        # Bit i is set when NUMERIC_FIELDS[i] was given as an int,
+        # so records come back with the same JSON types they went in with
+        self._int_flags = np.zeros(capacity, dtype=np.uint8)
+
+        # Per-row version, bumped on every write, and the store-wide write count
+        self._versions = np.zeros(capacity, dtype=np.int64)
+        self.generation = 0
+
+        # Seqlock counters: per row, and store-wide for whole-column copies
+        self._row_seq = np.zeros(capacity, dtype=np.uint32)
+        self._write_seq = 0
+        self._write_lock = threading.Lock()
+
+        # Interned subject names and subject lists
+        self._subject_ids = {}
+        self._subject_names = []
+        self._subject_set_ids = {}
+        self._subject_sets = []
+        self._subject_set = np.zeros(capacity, dtype=np.int32)
+
+        self._indexes = StudentIndexes()
+
+    def __contains__(self, reg_no):
+        return reg_no in self._rows
+
+    def __len__(self):
+        return self._size
+
+    # ============ INTERNAL HELPERS ============
+
+    def _grow(self, needed):
+        """Double the array capacity until `needed` rows fit"""
+        capacity = self._int_flags.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+
+        def resized(array):
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            return grown
+
+        self._numeric = {field: resized(array) for field, array in self._numeric.items()}
+        self._int_flags = resized(self._int_flags)
+        self._versions = resized(self._versions)
+        self._row_seq = resized(self._row_seq)
+        self._subject_set = resized(self._subject_set)
+
+    def _intern_subjects(self, subjects):
+        """Get the id of a subject list, interning new names and lists"""
+        ids = []
+        for subject in subjects:
+            subject_id = self._subject_ids.get(subject)
+            if subject_id is None:
+                subject_id = len(self._subject_names)
+                self._subject_ids[subject] = subject_id
+                self._subject_names.append(subject)
+            ids.append(subject_id)
+
+        key = tuple(ids)
+        set_id = self._subject_set_ids.get(key)
+        if set_id is None:
+            set_id = len(self._subject_sets)
+            self._subject_set_ids[key] = set_id
+            self._subject_sets.append(key)
+        return set_id
+
+    def _set_numeric(self, row, field, value):
+        """Store one numeric value and remember whether it was an int"""
+        bit = INT_FLAG_BITS[field]
+        self._numeric[field][row] = value
+        if isinstance(value, numbers.Integral):
+            self._int_flags[row] |= bit
+        else:
+            self._int_flags[row] &= ~bit & 0xFF
+
+    @contextmanager
+    def _writing(self):
+        """Hold the write lock and mark a write in progress for columns()"""
+        with self._write_lock:
+            self._write_seq += 1
+            try:
+                yield
+            finally:
+                self._write_seq += 1
+
+    def _record(self, row):
+        """Build a consistent student dict from one row, retrying if a write overlaps"""
+        while True:
+            seq = self._row_seq.item(row)
+            if not seq & 1:
+                student = self._read_row(row)
+                if self._row_seq.item(row) == seq:
+                    return student
+            # A writer is part-way through this row; let it finish
+            time.sleep(0)
+
+    def _read_row(self, row):
+        """Build a student dict from one row"""
+        student = {field: self._text[field][row] for field in TEXT_FIELDS}
+        flags = self._int_flags.item(row)
+        for field, bit in INT_FLAG_BITS.items():
+            value = self._numeric[field].item(row)
+            student[field] = int(value) if flags & bit else value
+        student['subjects'] = [self._subject_names[i] for i in self._subject_sets[self._subject_set.item(row)]]
+        return student
+
+    # ============ STORE INTERFACE ============
+
+    def get(self, reg_no):
+        """Get a student dict by registration number"""
+        row = self._rows.get(reg_no)
+        if row is None:
+            return None
+        return self._record(row)
+
+    def all(self):
+        """Get every student dict"""
+        return [self._record(row) for row in range(self._size)]
+
+    def _append(self, student):
+        """Append one validated student as a new row, without indexing it"""
+        row = self._size
+        self._grow(row + 1)
+        self._int_flags[row] = 0
+        for field in NUMERIC_FIELDS:
+            self._set_numeric(row, field, student[field])
+        self._subject_set[row] = self._intern_subjects(student['subjects'])
+
+        for field in TEXT_FIELDS:
+            self._text[field].append(student.get(field))
+        self._rows[student['reg_no']] = row
+        self._versions[row] = 1
+        self._size += 1
+        return row
+
+    def add(self, student):
+        """Add a new student, returns False if the reg_no already exists"""
+        with self._writing():
+            reg_no = student.get('reg_no')
+            if not reg_no or reg_no in self._rows:
+                return False
+            check_new_student(student)
+
+            row = self._append(student)
+            self._indexes.add(row, student)
+            self.generation += 1
+            return True
+
+    def add_many(self, students):
+        """
+        Add many students with one index merge
+        Returns a list with None for each added student, or an error message
+        """
+        with self._writing():
+            errors = []
+            added = []
+            first = self._size
+            for student in students:
+                reg_no = student.get('reg_no')
+                if not reg_no or reg_no in self._rows:
+                    errors.append("Student already exists or invalid data")
+                    continue
+                try:
+                    check_new_student(student)
+                except ValueError as e:
+                    errors.append(str(e))
+                    continue
+
+                self._append(student)
+                added.append(student)
+                errors.append(None)
+
+            if added:
+                self._indexes.add_batch(np.arange(first, self._size), added)
+                self.generation += 1
+            return errors
+
+    def _apply_update(self, reg_no, fields):
+        """Write one update's fields; returns the index change, or None if not found"""
+        row = self._rows.get(reg_no)
+        if row is None:
+            return None
+
+        old_values = {field: self._numeric[field].item(row) for field in INDEXED_FIELDS}
+        old_values['subjects'] = [self._subject_names[i] for i in self._subject_sets[self._subject_set.item(row)]]
+        subject_set = self._intern_subjects(fields['subjects']) if 'subjects' in fields else None
+
+        self._row_seq[row] += 1
+        for field, value in fields.items():
+            if field in self._numeric:
+                self._set_numeric(row, field, value)
+            elif field == 'subjects':
+                self._subject_set[row] = subject_set
+            elif field in self._text and field != 'reg_no':
+                self._text[field][row] = value
+        self._row_seq[row] += 1
+        self._versions[row] += 1
+        return row, reg_no, old_values, fields
+
+    def update(self, reg_no, fields):
+        """Update some fields of an existing student, returns False if not found"""
+        check_fields(fields)
+        with self._writing():
+            change = self._apply_update(reg_no, fields)
+            if change is None:
+                return False
+            self._indexes.update(*change)
+            self.generation += 1
+            return True
+
+    def update_many(self, updates):
+        """
+        Apply many (reg_no, fields) updates with one index merge
+        Every update is checked before the first one is written, so a bad
+        value raises ValueError without applying any of them
+        Returns a list of booleans, False for students that were not found
+        """
+        for _, fields in updates:
+            check_fields(fields)
+        with self._writing():
+            changes = [self._apply_update(reg_no, fields) for reg_no, fields in updates]
+            applied = [change for change in changes if change is not None]
+            if applied:
+                self._indexes.update_batch(applied, lambda: self._column_views(INDEXED_FIELDS))
+                self.generation += 1
+            return [change is not None for change in changes]
+
+    def version(self, reg_no):
+        """Get the version of a student record, or None if not found"""
+        row = self._rows.get(reg_no)
+        if row is None:
+            return None
+        return self._versions.item(row)
+
+    def _column_views(self, fields):
+        """Live read-only views of numeric columns, for use inside a write"""
+        data = {}
+        for field in fields:
+            view = self._numeric[field][:self._size]
+            view.flags.writeable = False
+            data[field] = view
+        return data
+
+    def columns(self, fields=NUMERIC_FIELDS):
+        """
+        Get numeric fields as arrays for vectorized scans
+        Returns (reg_nos, {field: array}); the arrays are a copy taken
+        between writes, so every row is consistent
+        """
+        for _ in range(COLUMN_COPY_RETRIES):
+            seq = self._write_seq
+            if not seq & 1:
+                size = self._size
+                reg_nos = self._text['reg_no'][:size]
+                data = {field: self._numeric[field][:size].copy() for field in fields}
+                if self._write_seq == seq:
+                    return reg_nos, data
+            time.sleep(0)
+
+        # Writes kept overlapping; wait for a gap instead of retrying forever
+        with self._write_lock:
+            size = self._size
+            return self._text['reg_no'][:size], {field: self._numeric[field][:size].copy() for field in fields}
+
+    def text_columns(self, rows, fields):
+        """
+        Non-numeric fields of some columns() rows, as {field: list}
+        Read straight from the row storage, without building student dicts
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        data = {}
+        for field in fields:
+            if field == 'subjects':
+                # Rows share interned subject lists; build each list once
+                lists = {}
+                data[field] = [
+                    lists[set_id] if set_id in lists else lists.setdefault(
+                        set_id, [self._subject_names[i] for i in self._subject_sets[set_id]])
+                    for set_id in self._subject_set[rows].tolist()
+                ]
+            else:
+                values = self._text[field]
+                data[field] = [values[row] for row in rows.tolist()]
+        return data
+
+    def _subject_sets_with(self, subject):
+        """Ids of the interned subject lists that contain a subject"""
+        subject_id = self._subject_ids.get(subject)
+        return [set_id for set_id, ids in enumerate(self._subject_sets) if subject_id in ids]
+
+    def subject_mask(self, subject):
+        """Boolean array marking the columns() rows enrolled in a subject"""
+        return np.isin(self._subject_set[:self._size], self._subject_sets_with(subject))
+
+    # ============ SNAPSHOTS ============
+
+    def snapshot_state(self):
+        """
+        Copy of the store's columns for a snapshot (see services/durability.py)
+        Safe to call while other threads write
+        """
+        size = self._size
+        return {
+            'size': size,
+            'text': {field: values[:size] for field, values in self._text.items()},
+            'numeric': {field: values[:size].copy() for field, values in self._numeric.items()},
+            'int_flags': self._int_flags[:size].copy(),
+            'subject_names': list(self._subject_names),
+            'subject_sets': list(self._subject_sets),
+            'subject_set': self._subject_set[:size].copy()
+        }
+
+    def load_state(self, state):
+        """Replace the store's contents with a snapshot_state() copy"""
+        with self._writing():
+            size = state['size']
+            capacity = max(1024, 1 << size.bit_length())
+
+            def padded(values, dtype):
+                array = np.zeros(capacity, dtype=dtype)
+                array[:size] = values
+                return array
+
+            self._size = size
+            self._text = {field: list(values) for field, values in state['text'].items()}
+            self._numeric = {field: padded(values, np.float64) for field, values in state['numeric'].items()}
+            self._int_flags = padded(state['int_flags'], np.uint8)
+            self._versions = padded(1, np.int64)
+            self._row_seq = np.zeros(capacity, dtype=np.uint32)
+            self._subject_names = list(state['subject_names'])
+            self._subject_ids = {name: i for i, name in enumerate(self._subject_names)}
+            self._subject_sets = list(state['subject_sets'])
+            self._subject_set_ids = {ids: i for i, ids in enumerate(self._subject_sets)}
+            self._subject_set = padded(state['subject_set'], np.int32)
+            self._rows = {reg_no: row for row, reg_no in enumerate(self._text['reg_no'])}
+
+            # Build the subject index one interned subject list at a time
+            reg_nos = np.array(self._text['reg_no'], dtype=object)
+            subject_members = {}
+            for set_id, ids in enumerate(self._subject_sets):
+                members = reg_nos[self._subject_set[:size] == set_id].tolist()
+                for subject_id in ids:
+                    subject_members.setdefault(self._subject_names[subject_id], set()).update(members)
+
+            indexes = StudentIndexes()
+            indexes.rebuild(np.arange(size), self._text['reg_no'], self._column_views(INDEXED_FIELDS), subject_members)
+            self._indexes = indexes
+            self.generation += 1
+
+    # ============ INDEXED QUERY HOOKS ============
+
+    def _ordinal(self, reg_no):
+        return self._rows.get(reg_no)
+
+    def _record_by_ordinal(self, ordinal):
+        return self._record(ordinal)
+
+    def _matching(self, rows, ranges, subject):
+        """Check range and subject filters for a batch of rows at once"""
+        mask = np.ones(len(rows), dtype=bool)
+        for field, (low, high) in ranges.items():
+            values = self._numeric[field][rows]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        if subject is not None:
+            mask &= np.isin(self._subject_set[rows], self._subject_sets_with(subject))
+        return mask
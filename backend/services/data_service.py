@@ -1,26 +1,172 @@
 # Data service to handle all data operations
 # This service provides methods to interact with the in-memory data
 
+import threading
+
+import numpy as np
+
+from config import Config
 from dummy_data import STUDENTS, TEACHERS
+from services.bulk_import import chunks
+from services.metrics import timed_operation
+from services.payload_cache import PayloadCache
+from services.prediction_service import PredictionService
+from services.report_engine import ReportEngine
+from services.search_index import SEARCH_FIELDS, StudentSearchIndex
+from services.student_indexes import decode_cursor, encode_cursor
+from services.student_store import NUMERIC_FIELDS, PUBLIC_FIELDS, STUDENT_FIELDS, check_fields, create_student_store
+
+# Fields a teacher can change on an existing student
+UPDATE_FIELDS = ['attendance', 'assignments', 'marks', 'study_hours', 'cgpa', 'email']
+
+# Fields the score model learns from; changing one feeds the online trainer
+TRAINING_FIELDS = {'marks', 'study_hours', 'attendance'}
+
+# Student field fed to each model feature when scoring the roster
+MODEL_INPUT_FIELDS = {'study_hours': 'study_hours', 'attendance': 'attendance', 'previous_marks': 'marks'}
 
 class DataService:
     """Service class to manage student and teacher data"""
     
+    # Settings in use; create_app() replaces them with the app's (see configure())
+    settings = Config()
+    
+    # Student storage backend, chosen by settings.STUDENT_STORE and opened on first use
+    _store = None
+    
+    # Suggestion rules, loaded from settings.REPORT_RULES_PATH on first use
+    _report_engine = None
+    
+    # Name / reg_no / email search index, built on the first search
+    _search_index = None
+    
+    # Guards the first-use loading above
+    _load_lock = threading.Lock()
+    
+    # Cache of computed student payloads, keyed by student version
+    report_cache = PayloadCache(settings.REPORT_CACHE_SIZE)
+    
+    # Cache of serialized roster responses, keyed by store generation
+    roster_cache = PayloadCache(settings.ROSTER_CACHE_SIZE, settings.ROSTER_CACHE_BYTES)
+    
+    @staticmethod
+    def configure(settings):
+        """
+        Use a Config from now on
+        Closes the open store and drops the loaded rules, search index and
+        cached payloads, so each of them is rebuilt from the new settings
+        """
+        with DataService._load_lock:
+            store = DataService._store
+            if store is not None and hasattr(store, 'close'):
+                store.close()
+            DataService.settings = settings
+            DataService._reset(None)
+
+    @staticmethod
+    def _reset(store):
+        """Switch to `store` with no loaded rules, search index or cached payloads"""
+        settings = DataService.settings
+        DataService._store = store
+        DataService._report_engine = None
+        DataService._search_index = None
+        DataService.report_cache = PayloadCache(settings.REPORT_CACHE_SIZE)
+        DataService.roster_cache = PayloadCache(settings.ROSTER_CACHE_SIZE, settings.ROSTER_CACHE_BYTES)
+    
+    @staticmethod
+    def get_store():
+        """Get the active student store, opening it on first use"""
+        store = DataService._store
+        if store is None:
+            with DataService._load_lock:
+                if DataService._store is None:
+                    settings = DataService.settings
+                    DataService._store = create_student_store(
+                        settings.STUDENT_STORE, STUDENTS, settings.SQLITE_PATH, settings.DATA_DIR,
+                        settings.WAL_FSYNC_INTERVAL, settings.SNAPSHOT_INTERVAL, settings.SHARED_TABLE_PATH
+                    )
+                store = DataService._store
+        return store
+    
+    @staticmethod
+    def get_report_engine():
+        """Get the suggestion rule engine, loading the rules on first use"""
+        engine = DataService._report_engine
+        if engine is None:
+            with DataService._load_lock:
+                if DataService._report_engine is None:
+                    DataService._report_engine = ReportEngine.from_file(DataService.settings.REPORT_RULES_PATH)
+                engine = DataService._report_engine
+        return engine
+    
+    @staticmethod
+    def get_search_index():
+        """
+        Get the student search index, building it on first use
+        It is rebuilt if the store was written without it being told,
+        e.g. by another worker process sharing a sqlite or shared store
+        """
+        store = DataService.get_store()
+        index = DataService._search_index
+        if index is None or index.generation != store.generation:
+            with DataService._load_lock:
+                index = DataService._search_index
+                if index is None or index.generation != store.generation:
+                    generation = store.generation
+                    index = StudentSearchIndex.from_students(store.all(), generation)
+                    DataService._search_index = index
+        return index
+    
+    @staticmethod
+    def _index_students(reg_nos):
+        """Re-index students after a write (only once the index has been built)"""
+        index = DataService._search_index
+        if index is None:
+            return
+        store = DataService.get_store()
+        for reg_no in reg_nos:
+            student = store.get(reg_no)
+            if student is not None:
+                index.put(student)
+        index.generation = store.generation
+    
+    @staticmethod
+    def after_fork():
+        """
+        Drop a store a forked worker cannot share with its parent: sqlite
+        connections must not cross a fork, and a durable store's log and
+        snapshot threads do not survive one. The worker reopens it on first use
+        """
+        if DataService.settings.STUDENT_STORE == 'sqlite' or DataService.settings.DATA_DIR:
+            DataService._store = None
+            DataService._search_index = None
+    
+    @staticmethod
+    def use_store(store):
+        """
+        Replace the active student store (e.g. for benchmarks)
+        Payloads cached from the old store are dropped along with its search
+        index, since the new store may restart its generation count
+        """
+        with DataService._load_lock:
+            DataService._reset(store)
+    
     # ============ AUTHENTICATION METHODS ============
     
     @staticmethod
+    @timed_operation
     def authenticate_student(reg_no, password):
         """
         Authenticate a student using registration number and password
         Returns: Student data if authenticated, None otherwise
         """
-        if reg_no in STUDENTS:
-            student = STUDENTS[reg_no]
-            if student['password'] == password:
-                return student
+        student = DataService.get_store().get(reg_no)
+        if student and student['password'] == password:
+            return student
         return None
     
     @staticmethod
+    @timed_operation
     def authenticate_teacher(teacher_id, password):
         """
         Authenticate a teacher using teacher ID and password
@@ -35,83 +181,357 @@ class DataService:
     # ============ STUDENT DATA METHODS ============
     
     @staticmethod
+    @timed_operation
     def get_student(reg_no):
         """Get student data by registration number"""
-        return STUDENTS.get(reg_no)
+        return DataService.get_store().get(reg_no)
+    
+    @staticmethod
+    def get_student_version(reg_no):
+        """
+        Get the version of a student record, bumped by add and update
+        Returns None if the student does not exist
+        """
+        return DataService.get_store().version(reg_no)
+    
+    @staticmethod
+    def get_generation():
+        """Get the store-wide write counter, bumped by every add and update"""
+        return DataService.get_store().generation
     
     @staticmethod
+    @timed_operation
     def get_all_students():
         """Get all student records"""
-        return list(STUDENTS.values())
+        return DataService.get_store().all()
+    
+    @staticmethod
+    @timed_operation
+    def query_students(sort='reg_no', descending=False, ranges=None, subject=None, cursor=None, limit=None):
+        """
+        Get one page of students using the sorted secondary indexes
+        sort: reg_no, cgpa, marks or attendance
+        ranges: {field: (low, high)} inclusive filters, None for open ends
+        subject: only students enrolled in this subject
+        cursor: next_cursor from the previous page
+        limit: page size, None for every matching student
+        Returns: (students, next_cursor), next_cursor is None on the last page
+        Raises ValueError for an invalid sort or cursor
+        """
+        sort_key = ('-' if descending else '') + sort
+        after = decode_cursor(cursor, sort_key) if cursor else None
+        
+        students, has_more = DataService.get_store().query(sort, descending, ranges, subject, after, limit)
+        
+        next_cursor = None
+        if has_more and students:
+            last = students[-1]
+            next_cursor = encode_cursor(sort_key, last[sort], last['reg_no'])
+        return students, next_cursor
+    
+    @staticmethod
+    @timed_operation
+    def get_roster_columns(fields, sort='reg_no', descending=False, ranges=None, subject=None):
+        """
+        Select and order the whole roster from the store's numeric columns,
+        without building a dict per student (for columnar exports)
+        fields: numeric fields to return; sort / ranges / subject as for query_students
+        Ties keep store row order, like the sorted indexes
+        Returns: (reg_nos, {field: array}, rows) where rows are positions
+        into reg_nos and the arrays, in sort order
+        """
+        if sort != 'reg_no' and sort not in NUMERIC_FIELDS:
+            raise ValueError("Cannot sort by %s" % sort)
+        ranges = ranges or {}
+        store = DataService.get_store()
+        wanted = set(fields) | set(ranges) | ({sort} - {'reg_no'})
+        reg_nos, columns = store.columns([field for field in NUMERIC_FIELDS if field in wanted])
+        
+        mask = np.ones(len(reg_nos), dtype=bool)
+        for field, (low, high) in ranges.items():
+            if low is not None:
+                mask &= columns[field] >= low
+            if high is not None:
+                mask &= columns[field] <= high
+        if subject:
+            # Rows added after columns() was read are cut off, as in get_performance_reports
+            mask &= store.subject_mask(subject)[:len(reg_nos)]
+        rows = np.flatnonzero(mask)
+        
+        keys = np.asarray(reg_nos, dtype=str)[rows] if sort == 'reg_no' else columns[sort][rows]
+        rows = rows[np.argsort(keys, kind='stable')]
+        if descending:
+            rows = rows[::-1]
+        return reg_nos, {field: columns[field] for field in fields}, rows
+    
+    @staticmethod
+    def get_roster_fields(reg_nos, rows, fields):
+        """
+        Non-numeric fields of some get_roster_columns() rows, as {field: list}
+        Read from the store's row storage when it can, else one student at a time
+        """
+        store = DataService.get_store()
+        if hasattr(store, 'text_columns'):
+            return store.text_columns(rows, fields)
+        students = [store.get(reg_nos[row]) for row in rows]
+        return {field: [student[field] for student in students] for field in fields}
+    
+    @staticmethod
+    @timed_operation
+    def search_students(query, limit=20):
+        """
+        Find students by name, reg_no or email as the user types
+        Every word of the query must match the start of a word of the
+        student, or a name word with one typo
+        Returns: a list of {"reg_no", "name", "email"}, best matches first
+        """
+        return DataService.get_search_index().search(query, limit)
     
     @staticmethod
+    @timed_operation
     def add_student(student_data):
         """
         Add a new student to the system
         student_data: dictionary with student information
         """
-        reg_no = student_data.get('reg_no')
-        if reg_no and reg_no not in STUDENTS:
-            STUDENTS[reg_no] = student_data
+        try:
+            added = DataService.get_store().add(student_data)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+        if added:
+            DataService._index_students([student_data['reg_no']])
             return {"success": True, "message": "Student added successfully"}
         return {"success": False, "message": "Student already exists or invalid data"}
     
     @staticmethod
+    @timed_operation
     def update_student(reg_no, update_data):
         """
         Update existing student information
         Only updates provided fields
         """
-        if reg_no in STUDENTS:
-            # Only allow updating specific fields
-            allowed_fields = ['attendance', 'assignments', 'marks', 'study_hours', 'cgpa', 'email']
-            for field in allowed_fields:
-                if field in update_data:
-                    STUDENTS[reg_no][field] = update_data[field]
+        # Only allow updating specific fields
+        fields = {field: update_data[field] for field in UPDATE_FIELDS if field in update_data}
+        store = DataService.get_store()
+        before = store.get(reg_no) if TRAINING_FIELDS & fields.keys() else None
+        try:
+            updated = store.update(reg_no, fields)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+        if updated:
+            DataService._index_students([reg_no] if SEARCH_FIELDS & fields.keys() else [])
+            if before:
+                PredictionService.observe_student_change(reg_no, before, store.get(reg_no))
             return {"success": True, "message": "Student updated successfully"}
         return {"success": False, "message": "Student not found"}
     
     @staticmethod
+    @timed_operation
+    def import_students(rows):
+        """
+        Add students from a stream of (line, record, error) rows
+        Rows are validated and inserted settings.IMPORT_CHUNK_SIZE at a time,
+        so the whole upload is never held in memory
+        Returns: {"added": n, "failed": n, "errors": [{"line", "reg_no", "message"}]}
+        """
+        added = 0
+        errors = []
+        added_reg_nos = []
+        for chunk in chunks(rows, DataService.settings.IMPORT_CHUNK_SIZE):
+            records = [(line, record) for line, record, error in chunk if error is None]
+            results = DataService.get_store().add_many([
+                {field: record[field] for field in STUDENT_FIELDS if field in record}
+                for _, record in records
+            ])
+            
+            failed = [(line, None, error) for line, record, error in chunk if error is not None]
+            for (line, record), error in zip(records, results):
+                if error is None:
+                    added += 1
+                    added_reg_nos.append(record['reg_no'])
+                else:
+                    failed.append((line, record.get('reg_no'), error))
+            errors.extend(
+                {"line": line, "reg_no": reg_no, "message": message}
+                for line, reg_no, message in sorted(failed, key=lambda error: error[0])
+            )
+        DataService._index_students(added_reg_nos)
+        return {"added": added, "failed": len(errors), "errors": errors}
+    
+    @staticmethod
+    @timed_operation
+    def update_students(rows):
+        """
+        Apply partial updates from (line, record, error) rows as one batch
+        Each record has a reg_no plus the fields to change. Every row is
+        checked first; if any row is invalid nothing is applied
+        Returns: {"updated": n, "errors": [{"line", "reg_no", "message"}]}
+        """
+        store = DataService.get_store()
+        updates = []
+        errors = []
+        for line, record, error in rows:
+            reg_no = record.get('reg_no') if record else None
+            if error is None:
+                fields = {field: record[field] for field in UPDATE_FIELDS if field in record}
+                if not reg_no or reg_no not in store:
+                    error = "Student not found"
+                elif not fields:
+                    error = "No fields to update"
+                else:
+                    try:
+                        check_fields(fields)
+                    except ValueError as e:
+                        error = str(e)
+            if error is not None:
+                errors.append({"line": line, "reg_no": reg_no, "message": error})
+            else:
+                updates.append((reg_no, fields))
+        
+        if errors or not updates:
+            return {"updated": 0, "errors": errors}
+        before = {reg_no: store.get(reg_no) for reg_no, fields in updates if TRAINING_FIELDS & fields.keys()}
+        try:
+            store.update_many(updates)
+        except ValueError as e:
+            return {"updated": 0, "errors": [{"line": None, "reg_no": None, "message": str(e)}]}
+        DataService._index_students([reg_no for reg_no, fields in updates if SEARCH_FIELDS & fields.keys()])
+        for reg_no, student in before.items():
+            PredictionService.observe_student_change(reg_no, student, store.get(reg_no))
+        return {"updated": len(updates), "errors": []}
+    
+    @staticmethod
+    def _build_report(student, suggestions):
+        """Build the report dict for one student"""
+        return {
+            "reg_no": student['reg_no'],
+            "name": student['name'],
+            "attendance": student['attendance'],
+            "marks": student['marks'],
+            "cgpa": student['cgpa'],
+            "study_hours": student['study_hours'],
+            "assignments": student['assignments'],
+            "suggestions": suggestions
+        }
+    
+    @staticmethod
+    def _student_report(student):
+        """Evaluate the report rules for one student dict"""
+        engine = DataService.get_report_engine()
+        fired = engine.evaluate({field: [student[field]] for field in engine.fields})
+        suggestions = engine.suggestions(engine.patterns(fired)[0])
+        
+        return DataService._build_report(student, list(suggestions))
+    
+    @staticmethod
+    @timed_operation
     def get_student_performance_report(reg_no):
         """
         Generate performance report for a student
         Includes analysis and suggestions
         """
-        student = STUDENTS.get(reg_no)
+        student = DataService.get_store().get(reg_no)
         if not student:
             return None
         
-        # Generate suggestions based on performance
-        suggestions = []
+        return DataService._student_report(student)
+    
+    @staticmethod
+    @timed_operation
+    def get_student_dashboard(reg_no):
+        """
+        Get everything the student dashboard shows from one lookup
+        Returns: {"student": {...}, "report": {...}}, or None if not found
+        """
+        student = DataService.get_store().get(reg_no)
+        if not student:
+            return None
         
-        if student['attendance'] < 80:
-            suggestions.append("⚠️ Attendance is low. Try to attend classes regularly.")
+        return {
+            "student": {field: student[field] for field in PUBLIC_FIELDS},
+            "report": DataService._student_report(student)
+        }
+    
+    @staticmethod
+    @timed_operation
+    def get_performance_reports(subject=None):
+        """
+        Generate performance reports for many students at once
+        Rules are evaluated over whole columns in one vectorized pass
+        subject: only include students enrolled in this subject
+        Returns: {"reports": [...], "summary": {rule_id: count}}
+        """
+        store = DataService.get_store()
+        engine = DataService.get_report_engine()
         
-        if student['marks'] < 70:
-            suggestions.append("📚 Marks need improvement. Consider extra study sessions.")
+        reg_nos, columns = store.columns(engine.fields)
+        if subject:
+            # Stores only append rows, so students added after columns()
+            # was read sit at the end of the mask and are cut off here
+            rows = np.flatnonzero(store.subject_mask(subject)[:len(reg_nos)])
+            reg_nos = [reg_nos[row] for row in rows]
+            columns = {field: values[rows] for field, values in columns.items()}
         
-        if student['study_hours'] < 4:
-            suggestions.append("⏱️ Increase study hours. Aim for at least 4 hours daily.")
+        fired = engine.evaluate(columns)
+        patterns = engine.patterns(fired).tolist()
         
-        if student['cgpa'] < 7.0:
-            suggestions.append("🎯 Focus on improving CGPA. Set clear academic goals.")
+        reports = [
+            DataService._build_report(store.get(reg_no), engine.suggestions(pattern))
+            for reg_no, pattern in zip(reg_nos, patterns)
+        ]
+        return {"reports": reports, "summary": engine.summary(fired)}
+    
+    @staticmethod
+    @timed_operation
+    def get_at_risk_students(k, subjects=None):
+        """
+        Get the k students most at risk of failing, highest risk first
+        risk = (100 - predicted final score) + settings.RISK_RULE_WEIGHT per fired report rule
+        Every student is scored in one vectorized pass and the top k are
+        picked with argpartition, so only k rows are sorted and read back
+        subjects: only rank students enrolled in any of these subjects
+        Returns: list of {"reg_no", "name", "predicted_score", "risk", "suggestions"}
+        """
+        store = DataService.get_store()
+        engine = DataService.get_report_engine()
+        model = PredictionService.get_model()
         
-        if student['assignments'] < 8:
-            suggestions.append("✏️ Complete more assignments to improve practical knowledge.")
+        fields = sorted(set(engine.fields) | set(MODEL_INPUT_FIELDS.values()))
+        reg_nos, columns = store.columns(fields)
+        rows = None
+        if subjects is not None:
+            # Stores only append rows, so the masks may run past len(reg_nos)
+            mask = np.zeros(len(reg_nos), dtype=bool)
+            for subject in subjects:
+                mask |= store.subject_mask(subject)[:len(reg_nos)]
+            rows = np.flatnonzero(mask)
+            columns = {field: values[rows] for field, values in columns.items()}
         
-        if not suggestions:
-            suggestions.append("✅ Great performance! Keep up the excellent work.")
+        # Same as model.predict, without stacking the columns into a matrix first
+        predicted = np.full(len(reg_nos) if rows is None else len(rows), model.intercept)
+        for coef, feature in zip(model.coef.tolist(), model.features):
+            predicted += coef * columns[MODEL_INPUT_FIELDS[feature]]
+        fired = engine.evaluate(columns)
+        risk = (100.0 - predicted) + DataService.settings.RISK_RULE_WEIGHT * fired.sum(axis=0)
         
-        return {
-            "reg_no": student['reg_no'],
-            "name": student['name'],
-            "attendance": student['attendance'],
-            "marks": student['marks'],
-            "cgpa": student['cgpa'],
-            "study_hours": student['study_hours'],
-            "assignments": student['assignments'],
-            "suggestions": suggestions
-        }
+        k = min(k, len(risk))
+        if k == 0:
+            return []
+        top = np.argpartition(-risk, k - 1)[:k]
+        top = top[np.argsort(-risk[top], kind='stable')]
+        patterns = engine.patterns(fired[:, top]).tolist()
+        
+        students = []
+        for i, pattern in zip(top.tolist(), patterns):
+            reg_no = reg_nos[i if rows is None else int(rows[i])]
+            students.append({
+                "reg_no": reg_no,
+                "name": store.get(reg_no)['name'],
+                "predicted_score": round(float(predicted[i]), 2),
+                "risk": round(float(risk[i]), 2),
+                "suggestions": engine.suggestions(pattern)
+            })
+        return students
     
     # ============ TEACHER DATA METHODS ============
     
@@ -127,3 +547,41 @@ class DataService:
         if teacher:
             return teacher['subjects']
         return []
+    
+    @staticmethod
+    @timed_operation
+    def get_teacher_dashboard(teacher_id):
+        """
+        Get everything the teacher dashboard shows in one call
+        Returns: {"teacher": {...}, "students": [...]} with passwords
+        removed, or None if the teacher does not exist
+        """
+        teacher = TEACHERS.get(teacher_id)
+        if not teacher:
+            return None
+        
+        students, _ = DataService.query_students()
+        return {
+            "teacher": {field: value for field, value in teacher.items() if field != 'password'},
+            "students": [{field: student[field] for field in PUBLIC_FIELDS} for student in students]
+        }
+    
+    @staticmethod
+    @timed_operation
+    def get_teacher_students(teacher_id, subject=None):
+        """
+        Get the students enrolled in any of a teacher's subjects
+        Answered from the subject inverted index, so other students are never read
+        subject: narrow to one of the teacher's subjects
+        Returns None if the teacher does not exist
+        """
+        teacher = TEACHERS.get(teacher_id)
+        if not teacher:
+            return None
+        
+        subjects = teacher['subjects']
+        if subject:
+            subjects = [subject] if subject in subjects else []
+        
+        store = DataService.get_store()
+        return [store.get(reg_no) for reg_no in sorted(store.subject_members(subjects))]
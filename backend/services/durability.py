@@ -0,0 +1,338 @@
+# Durability for the in-memory student stores
+# Writes go to an append-only change log; snapshots of the whole store are
+# written in the background so a restart only replays the log tail
+
+import atexit
+import os
+import pickle
+import re
+import struct
+import threading
+import time
+import zlib
+
+# Each log record is framed as <length:u32><crc32:u32><pickled record>
+FRAME_HEADER = struct.Struct('<II')
+
+SEGMENT_PATTERN = re.compile(r'^wal-(\d{8})\.log$')
+SNAPSHOT_PATTERN = re.compile(r'^snapshot-(\d{8})\.pkl$')
+
+# Most consecutive update records replayed with one update_many() call
+REPLAY_BATCH_SIZE = 100000
+
+
+def _segment_name(number):
+    return 'wal-%08d.log' % number
+
+
+def _snapshot_name(number):
+    return 'snapshot-%08d.pkl' % number
+
+
+def _fsync_dir(path):
+    """fsync a directory so renames and new files in it are durable"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class ChangeLog:
+    """
+    Append-only log of store writes, split into numbered segments
+    append() writes straight to the OS (unbuffered), so a crashed process
+    loses nothing; a background thread fsyncs every `fsync_interval`
+    seconds, so many writes share one fsync against power loss
+    """
+
+    def __init__(self, data_dir, segment, fsync_interval=0.05):
+        self.data_dir = data_dir
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._durable = threading.Condition(self._lock)
+        self._appended = 0
+        self._synced = 0
+        self._closed = False
+        self._open_segment(segment)
+
+        self._flusher = threading.Thread(target=self._flush_loop, name='wal-fsync', daemon=True)
+        self._flusher.start()
+
+    def _open_segment(self, number):
+        self.segment = number
+        self._file = open(os.path.join(self.data_dir, _segment_name(number)), 'ab', buffering=0)
+
+    def append(self, record):
+        """Append one record; returns its sequence number"""
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        frame = FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            self._file.write(frame)
+            self._appended += 1
+            return self._appended
+
+    def wait_durable(self, seq, timeout=None):
+        """Block until record `seq` has been fsynced"""
+        with self._durable:
+            return self._durable.wait_for(lambda: self._synced >= seq or self._closed, timeout)
+
+    def _sync(self):
+        """Flush and fsync everything appended so far"""
+        with self._lock:
+            target = self._appended
+            if target == self._synced or self._closed:
+                return
+            fd = self._file.fileno()
+        os.fsync(fd)
+        with self._durable:
+            self._synced = max(self._synced, target)
+            self._durable.notify_all()
+
+    def _flush_loop(self):
+        while not self._closed:
+            time.sleep(self.fsync_interval)
+            try:
+                self._sync()
+            except (OSError, ValueError):
+                # The segment was rotated or closed under us; retry next tick
+                pass
+
+    def rotate(self):
+        """
+        Start a new segment and return its number
+        Records appended after this call land in the new segment
+        """
+        with self._lock:
+            old = self._file
+            os.fsync(old.fileno())
+            self._open_segment(self.segment + 1)
+            old.close()
+            self._synced = self._appended
+            self._durable.notify_all()
+            return self.segment
+
+    def close(self):
+        """Fsync and close the current segment"""
+        self._sync()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._file.close()
+            self._durable.notify_all()
+
+
+def read_segment(path):
+    """
+    Yield the records in one log segment
+    Stops at the first torn or corrupt frame (e.g. after a crash mid-write)
+    and truncates the file there, so later appends start from a clean end
+    """
+    good = 0
+    with open(path, 'rb') as f:
+        data = f.read()
+    while good + FRAME_HEADER.size <= len(data):
+        length, crc = FRAME_HEADER.unpack_from(data, good)
+        start = good + FRAME_HEADER.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        yield pickle.loads(payload)
+        good = start + length
+    if good < len(data):
+        with open(path, 'r+b') as f:
+            f.truncate(good)
+
+
+class DurableStudentStore:
+    """
+    Wraps an in-memory store (dict or columnar) with a change log and
+    background snapshots
+    - add, add_many, update and update_many are applied, then appended to the log
+    - every `snapshot_interval` seconds, if anything changed, the log is
+      rotated and the store is written to a snapshot in the background
+    - on startup the newest snapshot is loaded and only the log segments
+      written since it started are replayed
+    Replayed records set absolute values, so replaying a write that the
+    snapshot already contains gives the same result
+    Reads are passed straight through to the wrapped store
+    """
+
+    def __init__(self, store, data_dir, fsync_interval=0.05, snapshot_interval=300.0):
+        self._store = store
+        self.data_dir = data_dir
+        self.snapshot_interval = snapshot_interval
+        self._write_lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._writes_since_snapshot = 0
+        self._stop = threading.Event()
+
+        os.makedirs(data_dir, exist_ok=True)
+        segment = self._recover()
+        self._log = ChangeLog(data_dir, segment, fsync_interval)
+
+        self._snapshotter = threading.Thread(target=self._snapshot_loop, name='snapshot', daemon=True)
+        self._snapshotter.start()
+        atexit.register(self.close)
+
+    @property
+    def store(self):
+        """The wrapped in-memory store"""
+        return self._store
+
+    def __getattr__(self, name):
+        # Everything that is not a write goes straight to the wrapped store
+        return getattr(self._store, name)
+
+    def __contains__(self, reg_no):
+        return reg_no in self._store
+
+    def __len__(self):
+        return len(self._store)
+
+    # ============ RECOVERY ============
+
+    def _files(self, pattern):
+        """Numbers of the files in data_dir matching a name pattern, sorted"""
+        numbers = []
+        for name in os.listdir(self.data_dir):
+            match = pattern.match(name)
+            if match:
+                numbers.append(int(match.group(1)))
+        return sorted(numbers)
+
+    def _recover(self):
+        """
+        Load the newest snapshot and replay the log segments after it
+        Returns the number of the segment new records should go to
+        """
+        snapshots = self._files(SNAPSHOT_PATTERN)
+        segments = self._files(SEGMENT_PATTERN)
+        start = 0
+        if snapshots:
+            start = snapshots[-1]
+            with open(os.path.join(self.data_dir, _snapshot_name(start)), 'rb') as f:
+                self._store.load_state(pickle.load(f))
+
+        # Runs of updates are replayed together so the indexes are merged
+        # once per run instead of moved once per record
+        updates = []
+        for number in segments:
+            if number < start:
+                continue
+            for record in read_segment(os.path.join(self.data_dir, _segment_name(number))):
+                if record[0] in ('update', 'update_many'):
+                    updates.extend(record[1] if record[0] == 'update_many' else [(record[1], record[2])])
+                    if len(updates) >= REPLAY_BATCH_SIZE:
+                        self._store.update_many(updates)
+                        updates = []
+                    continue
+                if updates:
+                    self._store.update_many(updates)
+                    updates = []
+                self._apply(record)
+        if updates:
+            self._store.update_many(updates)
+
+        self.recovered = bool(snapshots or segments)
+        return max([start] + segments) + 1
+
+    def _apply(self, record):
+        """Apply one logged write to the wrapped store"""
+        op = record[0]
+        if op == 'add':
+            self._store.add_many([record[1]])
+        elif op == 'add_many':
+            self._store.add_many(record[1])
+        elif op == 'update':
+            self._store.update(record[1], record[2])
+
+    # ============ LOGGED WRITES ============
+
+    def add(self, student):
+        """Add a new student and log it"""
+        with self._write_lock:
+            added = self._store.add(student)
+            if added:
+                self._log.append(('add', dict(student)))
+                self._writes_since_snapshot += 1
+        return added
+
+    def add_many(self, students):
+        """Add many students and log the ones that were added as one record"""
+        with self._write_lock:
+            errors = self._store.add_many(students)
+            added = [dict(student) for student, error in zip(students, errors) if error is None]
+            if added:
+                self._log.append(('add_many', added))
+                self._writes_since_snapshot += len(added)
+        return errors
+
+    def update(self, reg_no, fields):
+        """Update a student and log the new field values"""
+        with self._write_lock:
+            updated = self._store.update(reg_no, fields)
+            if updated:
+                self._log.append(('update', reg_no, dict(fields)))
+                self._writes_since_snapshot += 1
+        return updated
+
+    def update_many(self, updates):
+        """Apply many updates and log the applied ones as one record"""
+        with self._write_lock:
+            found = self._store.update_many(updates)
+            applied = [(reg_no, dict(fields)) for (reg_no, fields), ok in zip(updates, found) if ok]
+            if applied:
+                self._log.append(('update_many', applied))
+                self._writes_since_snapshot += len(applied)
+        return found
+
+    def flush(self, timeout=None):
+        """Wait until every write so far is on disk"""
+        with self._write_lock:
+            seq = self._log.append(('noop',))
+        return self._log.wait_durable(seq, timeout)
+
+    # ============ SNAPSHOTS ============
+
+    def snapshot(self):
+        """
+        Write a snapshot of the whole store and drop the log it replaces
+        Writers are only blocked while the log rotates; the store is read
+        while writes continue, which is safe because the new segment
+        replays every write made after the rotation
+        """
+        with self._snapshot_lock:
+            with self._write_lock:
+                segment = self._log.rotate()
+                self._writes_since_snapshot = 0
+            state = self._store.snapshot_state()
+
+            path = os.path.join(self.data_dir, _snapshot_name(segment))
+            tmp = path + '.tmp'
+            with open(tmp, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            _fsync_dir(self.data_dir)
+
+            # The new snapshot covers every older snapshot and segment
+            for number in self._files(SNAPSHOT_PATTERN):
+                if number < segment:
+                    os.remove(os.path.join(self.data_dir, _snapshot_name(number)))
+            for number in self._files(SEGMENT_PATTERN):
+                if number < segment:
+                    os.remove(os.path.join(self.data_dir, _segment_name(number)))
+            return segment
+
+    def _snapshot_loop(self):
+        while not self._stop.wait(self.snapshot_interval):
+            if self._writes_since_snapshot:
+                self.snapshot()
+
+    def close(self):
+        """Stop the background snapshots and close the log"""
+        self._stop.set()
+        self._log.close()
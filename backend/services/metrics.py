@@ -0,0 +1,220 @@
+# In-process metrics in the Prometheus text exposition format
+# Counters, gauges and fixed-bucket histograms cheap enough to update on
+# every request; rendered on demand by GET /api/metrics
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Histogram bucket upper bounds for latencies, in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Histogram bucket upper bounds for response sizes, in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _label_text(names, values, extra=''):
+    pairs = ['%s="%s"' % (name, _escape(value)) for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{%s}' % ','.join(pairs) if pairs else ''
+
+
+class _Family:
+    """A named metric with one series per combination of label values"""
+
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def set(self, labels, value):
+        """Set the series for these label values (a tuple) to value"""
+        with self._lock:
+            self._series[labels] = value
+
+    def value(self, labels=()):
+        return self._series.get(labels, 0)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def _sample_lines(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        return ['%s%s %s' % (self.name, _label_text(self.labelnames, labels), _format_value(value))
+                for labels, value in series]
+
+    def render(self):
+        return ['# HELP %s %s' % (self.name, self.help), '# TYPE %s %s' % (self.name, self.kind)] + self._sample_lines()
+
+
+class Counter(_Family):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+
+class Gauge(_Family):
+    """Value that can go up and down"""
+
+    kind = 'gauge'
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+
+class Histogram(_Family):
+    """
+    Distribution of observed values over fixed buckets
+    Each series keeps per-bucket counts (the last one is +Inf), the sum and
+    the count; buckets are only made cumulative when rendered
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._series.get(labels)
+            if state is None:
+                state = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def value(self, labels=()):
+        """(bucket counts, sum, count) for a series"""
+        state = self._series.get(labels)
+        if state is None:
+            return [0] * (len(self.buckets) + 1), 0.0, 0
+        with self._lock:
+            return list(state[0]), state[1], state[2]
+
+    def _sample_lines(self):
+        with self._lock:
+            series = sorted((labels, (list(state[0]), state[1], state[2])) for labels, state in self._series.items())
+        lines = []
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _format_value(float(bound))
+                lines.append('%s_bucket%s %d' % (self.name, _label_text(self.labelnames, labels, le), cumulative))
+            label_text = _label_text(self.labelnames, labels)
+            lines.append('%s_sum%s %s' % (self.name, label_text, _format_value(total)))
+            lines.append('%s_count%s %d' % (self.name, label_text, count))
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Set of metric families rendered together
+    Collectors are called on every render and return families built from
+    state that lives elsewhere (e.g. cache counters)
+    """
+
+    def __init__(self):
+        self._families = []
+        self._collectors = []
+
+    def register(self, family):
+        self._families.append(family)
+        return family
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        """Every family in the Prometheus text format"""
+        families = list(self._families)
+        for collector in self._collectors:
+            families.extend(collector())
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry served at /api/metrics
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time spent handling requests', ('endpoint', 'method')
+)
+REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'Requests handled, by status code', ('endpoint', 'method', 'status')
+)
+REQUEST_ERRORS = REGISTRY.counter(
+    'http_request_errors_total', 'Requests that ended in a 5xx response or an unhandled exception', ('endpoint', 'method')
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    'http_requests_in_flight', 'Requests currently being handled', ('endpoint', 'method')
+)
+RESPONSE_SIZE = REGISTRY.histogram(
+    'http_response_size_bytes', 'Size of response bodies', ('endpoint', 'method'), SIZE_BUCKETS
+)
+OPERATION_LATENCY = REGISTRY.histogram(
+    'data_service_operation_seconds', 'Time spent in DataService operations', ('operation',)
+)
+OPERATION_ERRORS = REGISTRY.counter(
+    'data_service_operation_errors_total', 'DataService operations that raised', ('operation',)
+)
+
+
+def timed_operation(func):
+    """Record the duration of every call to func in OPERATION_LATENCY"""
+    labels = (func.__name__,)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            OPERATION_ERRORS.inc(labels)
+            raise
+        finally:
+            OPERATION_LATENCY.observe(labels, time.perf_counter() - start)
+    return wrapper
@@ -0,0 +1,137 @@
+# Online training of the score model
+# Keeps the least-squares sufficient statistics X^T X and X^T y up to date
+# as student records change, so a refit is a small solve instead of a pass
+# over every student
+
+import csv
+import itertools
+import math
+import threading
+
+import numpy as np
+
+from services.prediction_service import FEATURES, LinearModel
+
+# Online model versions count up across every trainer in the process, so a
+# trainer built by a reconfigure never reuses a version still in the history
+_versions = itertools.count(1)
+
+
+class SufficientStats:
+    """
+    X^T X and X^T y of a linear least-squares problem with an intercept
+    Rows can be added and removed, so a changed row is one removal plus
+    one addition
+    """
+
+    def __init__(self, n_features=len(FEATURES)):
+        self.count = 0
+        self.xtx = np.zeros((n_features + 1, n_features + 1))
+        self.xty = np.zeros(n_features + 1)
+
+    def add(self, x, y, weight=1):
+        """
+        Add one row (weight=-1 removes it)
+        Raises ValueError for a non-finite row: once in the sums it could
+        never be removed again (inf - inf is NaN)
+        """
+        row = np.append(np.asarray(x, dtype=np.float64), 1.0)
+        if not (np.isfinite(row).all() and np.isfinite(y)):
+            raise ValueError("Training rows must be finite")
+        self.xtx += weight * np.outer(row, row)
+        self.xty += weight * y * row
+        self.count += weight
+
+    def merged(self, other):
+        """A new SufficientStats holding the rows of both"""
+        stats = SufficientStats(len(self.xty) - 1)
+        stats.count = self.count + other.count
+        stats.xtx = self.xtx + other.xtx
+        stats.xty = self.xty + other.xty
+        return stats
+
+    def solve(self):
+        """
+        Least-squares (coef, intercept); lstsq copes with too few rows
+        Raises ValueError (or LinAlgError) if no usable model comes out
+        """
+        beta = np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+        if not np.isfinite(beta).all():
+            raise ValueError("Fit produced non-finite coefficients")
+        return beta[:-1], float(beta[-1])
+
+
+def load_training_csv(path):
+    """
+    Sufficient statistics of a CSV with FEATURES columns and final_score
+    Rows with non-finite values are skipped
+    """
+    stats = SufficientStats()
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            x, y = [float(row[name]) for name in FEATURES], float(row['final_score'])
+            if all(math.isfinite(value) for value in x) and math.isfinite(y):
+                stats.add(x, y)
+    return stats
+
+
+class OnlineTrainer:
+    """
+    Learns from marks that teachers record
+    When a student's marks change, the old marks become previous_marks and
+    the new marks the final score, giving one training row per student:
+        (study_hours, attendance, previous_marks) -> marks
+    Later changes to that student replace their row, so every student
+    counts once. A row with a non-finite value is left out. The seed
+    dataset is always part of the fit
+    """
+
+    def __init__(self, base=None):
+        self._base = base or SufficientStats()
+        self._stats = SufficientStats()
+        self._rows = {}
+        self._previous_marks = {}
+        self._lock = threading.Lock()
+        self.fits = 0
+
+    @property
+    def count(self):
+        """Training rows, seed data included"""
+        return self._base.count + self._stats.count
+
+    def observe(self, reg_no, before, after):
+        """
+        Record a change to one student (before and after are student dicts)
+        Returns True if the training data changed
+        """
+        with self._lock:
+            previous = self._previous_marks.get(reg_no)
+            if before['marks'] != after['marks']:
+                previous = before['marks']
+                self._previous_marks[reg_no] = previous
+            if previous is None:
+                return False
+
+            x = (after['study_hours'], after['attendance'], previous)
+            y = after['marks']
+            if not all(math.isfinite(value) for value in x + (y,)):
+                x = y = None
+            old = self._rows.get(reg_no)
+            if old == (x, y) or (old is None and x is None):
+                return False
+            if old is not None:
+                self._stats.add(*old, weight=-1)
+                del self._rows[reg_no]
+            if x is not None:
+                self._stats.add(x, y)
+                self._rows[reg_no] = (x, y)
+            return True
+
+    def fit(self):
+        """Fit a new model from the current statistics in O(features^2)"""
+        with self._lock:
+            stats = self._base.merged(self._stats)
+            self.fits += 1
+            version = 'online-%d' % next(_versions)
+        coef, intercept = stats.solve()
+        return LinearModel(coef, intercept, FEATURES, version)
@@ -0,0 +1,108 @@
+# Versioned cache of computed, pre-serialized API payloads
+# Entries are checked against the version of the data they were built from
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_SIZE = 1024
+
+
+class CacheEntry:
+    """A computed payload, its serialized body and the body's ETag"""
+
+    __slots__ = ('version', 'payload', 'body', 'etag', '_gzip_body')
+
+    def __init__(self, version, payload, body):
+        self.version = version
+        self.payload = payload
+        self.body = body
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self._gzip_body = None
+
+    def gzip_body(self):
+        """
+        Gzip-compressed body, compressed on first use
+        Returns None when the body is too small to be worth compressing
+        """
+        if len(self.body) < GZIP_MIN_SIZE:
+            return None
+        if self._gzip_body is None:
+            self._gzip_body = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzip_body
+
+
+class PayloadCache:
+    """
+    Bounded LRU cache of serialized payloads
+    An entry is only returned while its version matches the current
+    version of its data, so writes never need to touch the cache
+    max_bytes: optional limit on the total size of cached (uncompressed) bodies
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, version):
+        """Get the entry for key if it was built from this version"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                if entry is not None:
+                    # Built from older data; drop it now instead of waiting for eviction
+                    self._bytes -= len(self._entries.pop(key).body)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, version, payload, body):
+        """Store a payload and its body, evicting the least recently used entries"""
+        entry = CacheEntry(version, payload, body)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.body)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            self._evict()
+        return entry
+
+    def _evict(self):
+        """Drop least recently used entries until within both limits"""
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and len(self._entries) > 1 and self._bytes > self.max_bytes
+        ):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= len(entry.body)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'bytes': self._bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,95 @@
+# LRU cache of single predictions, keyed on quantized features
+# Entries belong to one model version and are dropped when it changes
+
+import threading
+from collections import OrderedDict
+
+# Grid step of each model feature: attendance and marks are whole numbers
+# and study hours come in half hours
+FEATURE_STEPS = {'study_hours': 0.5, 'attendance': 1.0, 'previous_marks': 1.0}
+
+
+def quantize(features, values):
+    """
+    Cache key for one feature row: each value as a whole number of grid steps
+    Returns None if a value is off its grid, so such rows are always
+    scored exactly instead of being rounded
+    """
+    key = []
+    for name, value in zip(features, values):
+        step = FEATURE_STEPS.get(name)
+        if step is None:
+            return None
+        steps = round(value / step)
+        if steps * step != value:
+            return None
+        key.append(steps)
+    return tuple(key)
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of predicted scores
+    Every lookup passes the live model version; the first lookup with a
+    new version empties the cache, so a swapped model never serves
+    scores from the old one
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_version(self, version):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key, version):
+        """Get the cached score for key under this model version, or None"""
+        with self._lock:
+            self._check_version(version)
+            score = self._entries.get(key)
+            if score is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return score
+
+    def put(self, key, version, score):
+        """Store a score, evicting the least recently used entries"""
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = score
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'version': self._version,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
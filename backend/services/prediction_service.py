@@ -0,0 +1,313 @@
+# Prediction service to serve the trained score model
+# Loads the model once and scores students with plain NumPy math
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from config import Config
+from services.prediction_cache import PredictionCache, quantize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default location of the trained model (next to app.py)
+MODEL_PATH = os.path.join(BACKEND_DIR, 'model.pkl')
+
+# Compact coefficient file written by export_model.py
+COMPACT_MODEL_PATH = os.path.join(BACKEND_DIR, 'model.json')
+
+# Version of the compact file layout, bumped on incompatible changes
+COMPACT_FORMAT = 'linear-model'
+COMPACT_FORMAT_VERSION = 1
+
+# Feature order the model was trained with (see data/student_data.csv)
+FEATURES = ['study_hours', 'attendance', 'previous_marks']
+
+
+class LinearModel:
+    """Coefficients of a fitted linear model, ready for matrix scoring"""
+
+    def __init__(self, coef, intercept, features=FEATURES, version='pickle'):
+        self.coef = np.asarray(coef, dtype=np.float64).reshape(-1)
+        self.intercept = float(intercept)
+        self.features = list(features)
+        self.version = version
+
+        if self.coef.shape[0] != len(self.features):
+            raise ValueError("Model has %d coefficients but %d features" % (self.coef.shape[0], len(self.features)))
+
+    def predict(self, X):
+        """Score an (n, features) matrix in one matrix-vector product"""
+        return X @ self.coef + self.intercept
+
+
+def _checksum(payload):
+    """SHA-256 of the canonical JSON encoding of a compact model payload"""
+    body = {key: value for key, value in payload.items() if key != 'checksum'}
+    encoded = json.dumps(body, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def export_compact(model, path=COMPACT_MODEL_PATH, source=None):
+    """
+    Write a LinearModel to the compact JSON coefficient format
+    Returns the payload that was written
+    """
+    payload = {
+        'format': COMPACT_FORMAT,
+        'format_version': COMPACT_FORMAT_VERSION,
+        'version': model.version,
+        'features': model.features,
+        'coef': model.coef.tolist(),
+        'intercept': model.intercept
+    }
+    if source:
+        payload['source'] = source
+    payload['checksum'] = _checksum(payload)
+
+    with open(path, 'w') as f:
+        json.dump(payload, f, indent=2)
+        f.write('\n')
+    return payload
+
+
+def load_compact(path=COMPACT_MODEL_PATH):
+    """
+    Load a compact coefficient file without importing scikit-learn
+    Raises ValueError if the file is corrupt or has an unknown format
+    """
+    with open(path) as f:
+        payload = json.load(f)
+
+    if payload.get('format') != COMPACT_FORMAT or payload.get('format_version') != COMPACT_FORMAT_VERSION:
+        raise ValueError("Unsupported model format in %s" % path)
+    if payload.get('checksum') != _checksum(payload):
+        raise ValueError("Checksum mismatch in %s" % path)
+
+    return LinearModel(payload['coef'], payload['intercept'], payload['features'], payload['version'])
+
+
+class PredictionService:
+    """Service class to predict final scores from student features"""
+
+    # Settings in use; create_app() replaces them with the app's (see configure())
+    settings = Config()
+
+    _model = None
+
+    # Models that have been live, oldest first, so a bad fit can be rolled back
+    _history = []
+    _swap_lock = threading.Lock()
+
+    # Single predictions on the feature grid, per model version
+    cache = PredictionCache(settings.PREDICTION_CACHE_SIZE)
+
+    # Online trainer, created on first use (see services/model_training.py)
+    _trainer = None
+    _changes_since_fit = 0
+
+    # Why the last automatic refit failed, or None
+    last_retrain_error = None
+
+    @staticmethod
+    def configure(settings):
+        """
+        Use a Config from now on
+        The live model and its history stay; the prediction cache and the
+        online trainer are rebuilt from the new settings
+        """
+        with PredictionService._swap_lock:
+            PredictionService.settings = settings
+            PredictionService.cache = PredictionCache(settings.PREDICTION_CACHE_SIZE)
+            PredictionService._history = PredictionService._history[-settings.MODEL_HISTORY:]
+            PredictionService._trainer = None
+            PredictionService._changes_since_fit = 0
+            PredictionService.last_retrain_error = None
+
+    # ============ MODEL LOADING ============
+
+    @staticmethod
+    def load_pickle(path=MODEL_PATH):
+        """
+        Load the pickled scikit-learn model and keep only its coefficients
+        This imports joblib and sklearn, so it is only a fallback
+        """
+        import joblib
+
+        estimator = joblib.load(path)
+        features = getattr(estimator, 'feature_names_in_', FEATURES)
+        with open(path, 'rb') as f:
+            version = 'pickle-' + hashlib.sha256(f.read()).hexdigest()[:12]
+        return LinearModel(estimator.coef_, estimator.intercept_, [str(f) for f in features], version)
+
+    @staticmethod
+    def load_model(compact_path=COMPACT_MODEL_PATH, pickle_path=MODEL_PATH):
+        """
+        Load the model once at startup so requests never touch the disk
+        Prefers the compact coefficient file and falls back to the pickle
+        """
+        if compact_path and os.path.exists(compact_path):
+            model = load_compact(compact_path)
+        else:
+            model = PredictionService.load_pickle(pickle_path)
+        PredictionService.swap_model(model)
+        return model
+
+    @staticmethod
+    def get_model():
+        """Get the loaded model, loading it on first use"""
+        if PredictionService._model is None:
+            PredictionService.load_model()
+        return PredictionService._model
+
+    # ============ VERSIONS AND RETRAINING ============
+
+    @staticmethod
+    def swap_model(model):
+        """
+        Make a model live for every following request and keep it in the history
+        The swap is one assignment, so a request uses either the old or the new model
+        """
+        with PredictionService._swap_lock:
+            history = [m for m in PredictionService._history if m.version != model.version] + [model]
+            PredictionService._history = history[-PredictionService.settings.MODEL_HISTORY:]
+            PredictionService._model = model
+
+    @staticmethod
+    def rollback(version=None):
+        """
+        Make an older model live again
+        version: a version from model_versions(), or None for the one before the live model
+        Raises ValueError if there is no such version
+        """
+        with PredictionService._swap_lock:
+            versions = [m.version for m in PredictionService._history]
+            if version is None:
+                current = PredictionService._model.version if PredictionService._model else None
+                position = versions.index(current) if current in versions else len(versions)
+                if position == 0:
+                    raise ValueError("No older model version to roll back to")
+                version = versions[position - 1]
+            if version not in versions:
+                raise ValueError("Unknown model version: %s" % version)
+            PredictionService._model = PredictionService._history[versions.index(version)]
+            return PredictionService._model
+
+    @staticmethod
+    def model_versions():
+        """Versions in the history, oldest first, marking the live one"""
+        current = PredictionService.get_model()
+        return [
+            {'version': m.version, 'active': m is current, 'coef': m.coef.tolist(), 'intercept': m.intercept}
+            for m in PredictionService._history
+        ]
+
+    @staticmethod
+    def get_trainer():
+        """Get the online trainer, seeded with settings.TRAINING_DATA_PATH"""
+        if PredictionService._trainer is None:
+            from services.model_training import OnlineTrainer, load_training_csv
+
+            with PredictionService._swap_lock:
+                if PredictionService._trainer is None:
+                    base = None
+                    path = PredictionService.settings.TRAINING_DATA_PATH
+                    if path and os.path.exists(path):
+                        base = load_training_csv(path)
+                    PredictionService._trainer = OnlineTrainer(base)
+        return PredictionService._trainer
+
+    @staticmethod
+    def observe_student_change(reg_no, before, after):
+        """
+        Feed a changed student record to the trainer
+        Refits and swaps the model every settings.RETRAIN_EVERY training changes
+        The write has already succeeded, so a failed refit keeps the live
+        model and is only recorded in last_retrain_error
+        """
+        if not PredictionService.get_trainer().observe(reg_no, before, after):
+            return
+        PredictionService._changes_since_fit += 1
+        every = PredictionService.settings.RETRAIN_EVERY
+        if every and PredictionService._changes_since_fit >= every:
+            try:
+                PredictionService.retrain()
+                PredictionService.last_retrain_error = None
+            except (np.linalg.LinAlgError, ValueError) as e:
+                PredictionService.last_retrain_error = str(e)
+
+    @staticmethod
+    def retrain():
+        """
+        Fit a model from the trainer's statistics and make it live
+        Raises ValueError or LinAlgError if the fit fails; the live model stays
+        """
+        PredictionService._changes_since_fit = 0
+        model = PredictionService.get_trainer().fit()
+        PredictionService.swap_model(model)
+        return model
+
+    # ============ INPUT PARSING ============
+
+    @staticmethod
+    def to_matrix(rows):
+        """
+        Convert request rows into an (n, 3) float matrix
+        Rows may be lists [study_hours, attendance, previous_marks]
+        or objects with those keys
+        """
+        if not isinstance(rows, list) or not rows:
+            raise ValueError("rows must be a non-empty list")
+
+        features = PredictionService.get_model().features
+        if isinstance(rows[0], dict):
+            try:
+                rows = [[row[name] for name in features] for row in rows]
+            except (KeyError, TypeError):
+                raise ValueError("Each row must contain %s" % ', '.join(features))
+
+        try:
+            X = np.asarray(rows, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("rows must only contain numbers")
+
+        if X.ndim != 2 or X.shape[1] != len(features):
+            raise ValueError("Each row must have %d values: %s" % (len(features), ', '.join(features)))
+        if not np.isfinite(X).all():
+            raise ValueError("rows must only contain finite numbers")
+        return X
+
+    # ============ PREDICTION METHODS ============
+
+    @staticmethod
+    def predict_matrix(X):
+        """Predict final scores for an (n, 3) feature matrix"""
+        return PredictionService.get_model().predict(X)
+
+    @staticmethod
+    def predict(features):
+        """
+        Predict the final score for one student
+        features: dictionary with study_hours, attendance and previous_marks
+        Scores for features on the grid (see prediction_cache.py) are cached
+        """
+        model = PredictionService.get_model()
+        X = PredictionService.to_matrix([features])
+        key = quantize(model.features, X[0].tolist())
+        if key is None:
+            return float(model.predict(X)[0])
+
+        score = PredictionService.cache.get(key, model.version)
+        if score is None:
+            score = float(model.predict(X)[0])
+            PredictionService.cache.put(key, model.version, score)
+        return score
+
+    @staticmethod
+    def predict_batch(rows):
+        """Predict final scores for many students in one vectorized pass"""
+        X = PredictionService.to_matrix(rows)
+        return PredictionService.predict_matrix(X)
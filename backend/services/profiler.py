@@ -0,0 +1,192 @@
+# Opt-in profiling of individual requests
+# A sampled request is either run under cProfile and dumped to its own
+# .prof file, or sampled for stacks that are merged per route into a
+# collapsed-stack file that flame graph tools read directly
+
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+MODES = ('cprofile', 'stacks')
+
+
+def route_slug(route):
+    """File-name-safe form of a route pattern"""
+    return re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+
+
+def _frame_stack(frame):
+    """Collapsed stack of a frame, outermost call first"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append('%s (%s:%d)' % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class StackSampler:
+    """
+    Samples the stacks of registered threads every `interval` seconds
+    The sampling thread only runs while at least one thread is registered
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._threads = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id):
+        """Start counting stacks of a thread"""
+        with self._lock:
+            self._threads[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+
+    def stop(self, thread_id):
+        """Stop sampling a thread; returns its stack counts"""
+        with self._lock:
+            return self._threads.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._threads:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                for thread_id, stacks in self._threads.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        stacks[_frame_stack(frame)] += 1
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and writes their results
+    enabled / sample_rate / mode can be changed at runtime
+    keep: number of .prof files kept; older dumps are deleted
+    """
+
+    def __init__(self, directory, enabled=False, sample_rate=0.0, mode='cprofile', keep=200, interval=0.005):
+        if mode not in MODES:
+            raise ValueError("Unknown profiling mode: %s" % mode)
+        self.directory = directory
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.keep = keep
+        self.sampler = StackSampler(interval)
+        self.profiled = 0
+        self._stacks = {}
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def configure(self, enabled=None, sample_rate=None, mode=None):
+        """Change settings; None leaves a setting as it is"""
+        if mode is not None and mode not in MODES:
+            raise ValueError("mode must be one of: %s" % ', '.join(MODES))
+        if sample_rate is not None and not 0 <= sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if mode is not None:
+            self.mode = mode
+        if enabled is not None:
+            self.enabled = enabled
+
+    def should_profile(self, requested=False):
+        """Whether to profile the next request; requested: it asked to be profiled"""
+        if not self.enabled:
+            return False
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def start(self):
+        """
+        Start profiling the current thread
+        Returns a handle for finish(), or None if another profiler is
+        already active (Python 3.12+ allows one cProfile at a time)
+        """
+        if self.mode == 'stacks':
+            thread_id = threading.get_ident()
+            self.sampler.start(thread_id)
+            return ('stacks', thread_id)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            return None
+        return ('cprofile', profile)
+
+    def finish(self, handle, route, method, seconds):
+        """Stop profiling and write the result; returns the file written"""
+        kind, target = handle
+        with self._lock:
+            self.profiled += 1
+        os.makedirs(self.directory, exist_ok=True)
+        if kind == 'stacks':
+            return self._merge_stacks(route, self.sampler.stop(target))
+        target.disable()
+        with self._lock:
+            self._sequence += 1
+            sequence = self._sequence
+        name = '%s-%d-%06d-%s-%s-%dms.prof' % (
+            time.strftime('%Y%m%d-%H%M%S'), os.getpid(), sequence, method, route_slug(route), seconds * 1000
+        )
+        path = os.path.join(self.directory, name)
+        target.dump_stats(path)
+        self._rotate()
+        return path
+
+    def _merge_stacks(self, route, stacks):
+        """Add one request's stacks to its route's collapsed-stack file"""
+        path = os.path.join(self.directory, 'stacks-%d-%s.collapsed' % (os.getpid(), route_slug(route)))
+        with self._lock:
+            merged = self._stacks.setdefault(route, Counter())
+            merged.update(stacks)
+            lines = ['%s %d\n' % (stack, count) for stack, count in merged.most_common()]
+            with open(path + '.tmp', 'w') as f:
+                f.writelines(lines)
+            os.replace(path + '.tmp', path)
+        return path
+
+    def _rotate(self):
+        """Delete the oldest .prof dumps beyond self.keep"""
+        try:
+            dumps = sorted(name for name in os.listdir(self.directory) if name.endswith('.prof'))
+        except OSError:
+            return
+        for name in dumps[:max(0, len(dumps) - self.keep)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def stacks(self, route=None):
+        """Merged collapsed stacks of one route, or of every route"""
+        with self._lock:
+            routes = [route] if route is not None else list(self._stacks)
+            merged = Counter()
+            for name in routes:
+                merged.update(self._stacks.get(name, {}))
+        return ''.join('%s %d\n' % (stack, count) for stack, count in merged.most_common())
+
+    def status(self):
+        """Current settings and counters"""
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'mode': self.mode,
+            'directory': self.directory,
+            'keep': self.keep,
+            'profiled': self.profiled,
+            'stack_routes': sorted(self._stacks)
+        }
@@ -0,0 +1,82 @@
+# Report engine for performance suggestions
+# Evaluates the declarative rules in report_rules.json over whole columns at once
+
+import json
+import os
+
+import numpy as np
+
+# Default rule table (next to app.py)
+RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'report_rules.json')
+
+# Comparison operators allowed in the rule table
+OPERATORS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+    '!=': np.not_equal
+}
+
+
+class ReportEngine:
+    """
+    Evaluates suggestion rules for one or many students
+    Each rule is {"id", "field", "op", "threshold", "suggestion"}; a rule
+    fires when `student[field] <op> threshold` is true
+    """
+
+    def __init__(self, rules, default_suggestion):
+        for rule in rules:
+            if rule.get('op') not in OPERATORS:
+                raise ValueError("Unknown operator in rule %s: %s" % (rule.get('id'), rule.get('op')))
+        if len(rules) > 62:
+            raise ValueError("At most 62 report rules are supported")
+
+        self.rules = list(rules)
+        self.default_suggestion = default_suggestion
+        self.fields = sorted({rule['field'] for rule in self.rules})
+        self._suggestions = {}
+
+    @classmethod
+    def from_file(cls, path=RULES_PATH):
+        """Load the rule table from a JSON file"""
+        with open(path, encoding='utf-8') as f:
+            table = json.load(f)
+        return cls(table['rules'], table['default_suggestion'])
+
+    def evaluate(self, columns):
+        """
+        Evaluate every rule over every student in one pass per rule
+        columns: {field: array} with one entry per student
+        Returns a (rules, students) boolean matrix
+        """
+        return np.array([
+            OPERATORS[rule['op']](np.asarray(columns[rule['field']], dtype=np.float64), rule['threshold'])
+            for rule in self.rules
+        ], dtype=bool).reshape(len(self.rules), -1)
+
+    def patterns(self, fired):
+        """Pack each student's fired rules into one int (bit i = rule i)"""
+        weights = np.left_shift(np.int64(1), np.arange(len(self.rules), dtype=np.int64))
+        return weights @ fired.astype(np.int64)
+
+    def suggestions(self, pattern):
+        """
+        Get the suggestion list for one fired-rule pattern
+        Students with the same pattern share the same list
+        """
+        pattern = int(pattern)
+        suggestions = self._suggestions.get(pattern)
+        if suggestions is None:
+            suggestions = [rule['suggestion'] for i, rule in enumerate(self.rules) if pattern >> i & 1]
+            if not suggestions:
+                suggestions = [self.default_suggestion]
+            self._suggestions[pattern] = suggestions
+        return suggestions
+
+    def summary(self, fired):
+        """Number of students that fired each rule"""
+        counts = fired.sum(axis=1)
+        return {rule['id']: int(count) for rule, count in zip(self.rules, counts)}
@@ -0,0 +1,285 @@
+# In-memory search index over student names, reg_nos and emails
+# Query terms match indexed words by prefix, and longer terms also match
+# name words one typo away (insertion, deletion, substitution or swap)
+
+import bisect
+import heapq
+import threading
+from collections import defaultdict
+
+# Student fields shown in search results; changing one re-indexes the student
+SEARCH_FIELDS = {'reg_no', 'name', 'email'}
+
+# Terms shorter than this only match by prefix
+FUZZY_MIN_LENGTH = 4
+
+# Match quality of a term against an indexed word
+EXACT, PREFIX, FUZZY = 3, 2, 1
+
+# Candidates checked per query before the best ones found so far are returned
+MAX_SCAN = 20000
+
+# New words wait in a small sorted list until it reaches this size or 1/16
+# of the main word list, so an insert never shifts the whole vocabulary
+RECENT_WORDS = 1024
+
+
+def _text(student, field):
+    """A text field in lower case; missing or non-text values index as nothing"""
+    value = student.get(field)
+    return value.lower() if isinstance(value, str) else ''
+
+
+def student_words(student):
+    """Indexed words of a student, and the subset that typo matching applies to"""
+    name = _text(student, 'name').split()
+    words = set(name)
+    reg_no = _text(student, 'reg_no')
+    if reg_no:
+        words.add(reg_no)
+    email = _text(student, 'email')
+    if email:
+        words.add(email)
+        words.add(email.partition('@')[0])
+    return words, {word for word in name if not word.isdigit()}
+
+
+def _deletes(word):
+    """The word with each single character removed"""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def _one_typo(term, word):
+    """Whether two different words are one edit or one adjacent swap apart"""
+    if abs(len(term) - len(word)) > 1 or term == word:
+        return False
+    if len(term) == len(word):
+        diff = [i for i, (a, b) in enumerate(zip(term, word)) if a != b]
+        if len(diff) == 1:
+            return True
+        return len(diff) == 2 and diff[1] == diff[0] + 1 and term[diff[0]] == word[diff[1]] and term[diff[1]] == word[diff[0]]
+    shorter, longer = sorted((term, word), key=len)
+    return any(longer[:i] + longer[i + 1:] == shorter for i in range(len(longer)))
+
+
+class StudentSearchIndex:
+    """
+    Prefix and typo-tolerant lookup of students
+    - words: sorted list of every distinct indexed word, for prefix ranges
+      (plus a small sorted list of recent words, merged in now and then)
+    - postings: word -> sorted reg_nos containing it
+    - deletes: name word with one character removed -> name words, so a
+      term with one typo finds its word by looking up its own deletes
+    put() indexes or re-indexes one student, so the index is kept up to
+    date incrementally; generation is the store generation it reflects
+    """
+
+    def __init__(self):
+        self._words = []
+        self._recent = []
+        self._postings = {}
+        self._deletes = {}
+        self._fuzzy_words = {}
+        self._students = {}
+        self._lock = threading.Lock()
+        self.generation = None
+
+    def __len__(self):
+        return len(self._students)
+
+    @classmethod
+    def from_students(cls, students, generation=None):
+        """Build an index in one pass, sorting each structure once"""
+        index = cls()
+        postings = defaultdict(list)
+        fuzzy_words = defaultdict(int)
+        for student in students:
+            words, name_words = student_words(student)
+            reg_no = student['reg_no']
+            index._students[reg_no] = (student.get('name'), student.get('email'), tuple(words))
+            for word in words:
+                postings[word].append(reg_no)
+            for word in name_words:
+                fuzzy_words[word] += 1
+        for reg_nos in postings.values():
+            reg_nos.sort()
+        index._postings = dict(postings)
+        index._words = sorted(postings)
+        index._fuzzy_words = dict(fuzzy_words)
+        for word in fuzzy_words:
+            for deleted in _deletes(word):
+                index._deletes.setdefault(deleted, set()).add(word)
+        index.generation = generation
+        return index
+
+    # ============ UPDATES ============
+
+    def put(self, student):
+        """Index a student, replacing what was indexed for the same reg_no"""
+        reg_no = student['reg_no']
+        words, name_words = student_words(student)
+        with self._lock:
+            old = self._students.get(reg_no)
+            if old is not None:
+                old_words, old_name_words = student_words({'reg_no': reg_no, 'name': old[0], 'email': old[1]})
+                for word in old_words - words:
+                    self._remove_posting(word, reg_no)
+                for word in old_name_words - name_words:
+                    self._remove_fuzzy(word)
+                added = words - old_words
+                added_names = name_words - old_name_words
+            else:
+                added, added_names = words, name_words
+            for word in added:
+                self._add_posting(word, reg_no)
+            for word in added_names:
+                self._add_fuzzy(word)
+            self._students[reg_no] = (student.get('name'), student.get('email'), tuple(words))
+
+    def _add_posting(self, word, reg_no):
+        reg_nos = self._postings.get(word)
+        if reg_nos is None:
+            self._postings[word] = [reg_no]
+            bisect.insort(self._recent, word)
+            if len(self._recent) > max(RECENT_WORDS, len(self._words) // 16):
+                self._words = list(heapq.merge(self._words, self._recent))
+                self._recent = []
+        else:
+            position = bisect.bisect_left(reg_nos, reg_no)
+            if position == len(reg_nos) or reg_nos[position] != reg_no:
+                reg_nos.insert(position, reg_no)
+
+    def _remove_posting(self, word, reg_no):
+        reg_nos = self._postings.get(word)
+        if reg_nos is None:
+            return
+        position = bisect.bisect_left(reg_nos, reg_no)
+        if position < len(reg_nos) and reg_nos[position] == reg_no:
+            del reg_nos[position]
+        if not reg_nos:
+            del self._postings[word]
+            for words in (self._recent, self._words):
+                position = bisect.bisect_left(words, word)
+                if position < len(words) and words[position] == word:
+                    del words[position]
+                    break
+
+    def _add_fuzzy(self, word):
+        count = self._fuzzy_words.get(word, 0)
+        self._fuzzy_words[word] = count + 1
+        if count == 0:
+            for deleted in _deletes(word):
+                self._deletes.setdefault(deleted, set()).add(word)
+
+    def _remove_fuzzy(self, word):
+        count = self._fuzzy_words.get(word, 0) - 1
+        if count > 0:
+            self._fuzzy_words[word] = count
+            return
+        self._fuzzy_words.pop(word, None)
+        for deleted in _deletes(word):
+            words = self._deletes.get(deleted)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self._deletes[deleted]
+
+    # ============ QUERIES ============
+
+    def _prefix_words(self, term):
+        """The indexed words starting with term, in order"""
+        slices = []
+        for words in (self._words, self._recent):
+            start = bisect.bisect_left(words, term)
+            end = bisect.bisect_left(words, term + '\uffff', start)
+            slices.append((words, start, end))
+        return slices
+
+    def _typo_words(self, term):
+        """Name words one typo away from term"""
+        if len(term) < FUZZY_MIN_LENGTH:
+            return set()
+        candidates = set(self._deletes.get(term, ()))
+        for deleted in _deletes(term):
+            if deleted in self._fuzzy_words:
+                candidates.add(deleted)
+            candidates.update(self._deletes.get(deleted, ()))
+        return {word for word in candidates if _one_typo(term, word)}
+
+    def _term_matches(self, term, typo_words):
+        """(quality, word) pairs for a term, best first"""
+        (words, start, end), (recent, recent_start, recent_end) = self._prefix_words(term)
+        prefixed = heapq.merge(
+            (words[i] for i in range(start, end)), (recent[i] for i in range(recent_start, recent_end))
+        )
+        for word in prefixed:
+            yield (EXACT if word == term else PREFIX), word
+        for word in sorted(typo_words):
+            yield FUZZY, word
+
+    def _estimate(self, term, typo_words):
+        """Rough number of students a term matches"""
+        prefixed = sum(end - start for _, start, end in self._prefix_words(term))
+        return (prefixed + len(self._postings.get(term, ()))
+                + sum(len(self._postings.get(word, ())) for word in typo_words))
+
+    def _candidates(self, term, typo_words):
+        """(quality, reg_no) for every student a term matches, best words first"""
+        seen = set()
+        for quality, word in self._term_matches(term, typo_words):
+            for reg_no in self._postings.get(word, ()):
+                if reg_no not in seen:
+                    seen.add(reg_no)
+                    yield quality, reg_no
+
+    @staticmethod
+    def _quality(term, typo_words, words):
+        """Best quality of a term against one student's words, 0 for no match"""
+        best = 0
+        for word in words:
+            if word == term:
+                return EXACT
+            if word.startswith(term):
+                best = PREFIX
+            elif not best and word in typo_words:
+                best = FUZZY
+        return best
+
+    def search(self, query, limit=20):
+        """
+        Students matching every term of the query
+        The term expected to match the fewest students drives the scan and
+        the others are checked against each candidate's words; results are
+        ranked by summed match quality, then in scan order. At most MAX_SCAN
+        candidates are checked
+        Returns a list of {"reg_no", "name", "email"}
+        """
+        terms = list(dict.fromkeys(query.lower().split()))
+        if not terms or limit <= 0:
+            return []
+
+        with self._lock:
+            typos = [(term, self._typo_words(term)) for term in terms]
+            typos.sort(key=lambda item: self._estimate(*item))
+            driver, others = typos[0], typos[1:]
+
+            found = []
+            for scanned, (quality, reg_no) in enumerate(self._candidates(*driver)):
+                # Candidates come best driver match first: stop once enough
+                # are found and the driver's match quality drops
+                if scanned >= MAX_SCAN or (len(found) >= limit and quality < found[limit - 1][1]):
+                    break
+                entry = self._students[reg_no]
+                total = quality
+                for term, typo_words in others:
+                    match = self._quality(term, typo_words, entry[2])
+                    if not match:
+                        break
+                    total += match
+                else:
+                    found.append((total, quality, scanned, reg_no, entry))
+                    if not others and len(found) >= limit:
+                        break
+
+        found.sort(key=lambda item: (-item[0], item[2]))
+        return [{'reg_no': reg_no, 'name': entry[0], 'email': entry[1]} for _, _, _, reg_no, entry in found[:limit]]
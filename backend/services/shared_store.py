@@ -0,0 +1,481 @@
+# Shared-memory student store
+# One memory-mapped table that every worker process maps, so a write made
+# in one worker is visible to all of them at once (POSIX only)
+
+import fcntl
+import mmap
+import numbers
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from services.columnar_store import INT_FLAG_BITS
+from services.student_indexes import SORT_FIELDS
+from services.student_store import NUMERIC_FIELDS, check_fields, check_new_student
+
+MAGIC = b'STUTBL01'
+
+# Longest subject list per student, and most distinct subjects in a table
+MAX_STUDENT_SUBJECTS = 8
+MAX_SUBJECTS = 255
+NO_SUBJECT = 255
+
+# Byte widths of the fixed-size text columns (UTF-8)
+TEXT_WIDTHS = {'reg_no': 32, 'password': 64, 'name': 64, 'email': 96}
+SUBJECT_WIDTH = 64
+
+HEADER = np.dtype([
+    ('magic', 'S8'),
+    ('capacity', 'u8'),
+    ('size', 'u8'),
+    ('generation', 'u8'),
+    ('subject_count', 'u4'),
+    ('subject_names', 'S%d' % SUBJECT_WIDTH, (MAX_SUBJECTS,))
+], align=True)
+
+# Header rounded up to whole pages so the rows start page-aligned
+HEADER_BYTES = -(-HEADER.itemsize // mmap.PAGESIZE) * mmap.PAGESIZE
+
+ROW = np.dtype(
+    [('seq', 'u4'), ('version', 'u4'), ('int_flags', 'u1'), ('subject_ids', 'u1', (MAX_STUDENT_SUBJECTS,))]
+    + [(field, 'S%d' % width) for field, width in TEXT_WIDTHS.items()]
+    + [(field, 'f8') for field in NUMERIC_FIELDS],
+    align=True
+)
+
+# Fields update() may change (reg_no is the key and never changes)
+UPDATABLE_FIELDS = NUMERIC_FIELDS + ['password', 'name', 'email', 'subjects']
+
+
+def _encode(field, value, width):
+    """Encode a text value for a fixed-width column"""
+    if not isinstance(value, str):
+        raise ValueError("%s must be a string" % field)
+    data = value.encode('utf-8')
+    if len(data) > width:
+        raise ValueError("%s is longer than %d bytes" % (field, width))
+    return data
+
+
+class SharedStudentStore:
+    """
+    Student store in a memory-mapped file shared by every worker process
+    - one fixed-width row per student, appended in insertion order
+    - numeric columns are read in place (zero-copy) by every process
+    - writers take a process-local lock and an flock on the file, so
+      writes from all workers are serialized
+    - each row has a sequence number that is odd while it is written;
+      readers copy a row and retry if the number changed, so they never
+      lock and never see a half-written row
+    - roster queries are vectorized scans with a keyset cursor, so no
+      per-process index has to follow other workers' writes
+    Place the file on a RAM-backed filesystem such as /dev/shm
+    """
+
+    name = 'shared'
+
+    def __init__(self, path, capacity=1024):
+        self.path = path
+        # Reentrant: a write may remap the table while holding it
+        self._thread_lock = threading.RLock()
+        self._cache_lock = threading.Lock()
+        self._open()
+
+        with self._locked():
+            if os.fstat(self._fd).st_size == 0:
+                os.ftruncate(self._fd, HEADER_BYTES + capacity * ROW.itemsize)
+                header = self._map_header()
+                header['magic'] = MAGIC
+                header['capacity'] = capacity
+            self._header = self._map_header()
+            if self._header['magic'] != MAGIC:
+                raise ValueError("%s is not a student table" % path)
+            self._map_rows()
+
+        # Per-process caches, refreshed when another worker appends
+        self._rows = {}
+        self._indexed = 0
+        self._subject_names = []
+        self._subject_ids = {}
+
+        # Index the rows already in the table now, not on the first lookup
+        self._refresh()
+
+    # ============ MAPPING AND LOCKING ============
+
+    def _open(self):
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._pid = os.getpid()
+
+    def _map_header(self):
+        # A separate mapping of the header page, which never moves
+        header_map = mmap.mmap(self._fd, HEADER_BYTES)
+        return np.ndarray((), dtype=HEADER, buffer=header_map)
+
+    def _map_rows(self):
+        """Map every row the file currently holds"""
+        capacity = int(self._header['capacity'])
+        table = mmap.mmap(self._fd, HEADER_BYTES + capacity * ROW.itemsize)
+        # Views keep the old mapping alive until readers drop them
+        self._table = np.ndarray((capacity,), dtype=ROW, buffer=table, offset=HEADER_BYTES)
+
+    def _table_for(self, size):
+        """The row array, remapped first if another worker grew the file"""
+        table = self._table
+        if size > len(table):
+            with self._thread_lock:
+                if size > len(self._table):
+                    self._map_rows()
+                table = self._table
+        return table
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive write access across threads and processes"""
+        with self._thread_lock:
+            if os.getpid() != self._pid:
+                # A forked child must not share the parent's flock
+                self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self):
+        """Close the file; mappings stay valid until they are dropped"""
+        os.close(self._fd)
+
+    # ============ PER-PROCESS CACHES ============
+
+    def _size(self):
+        return int(self._header['size'])
+
+    def _refresh(self):
+        """Pick up rows and subjects added by any worker since the last call"""
+        size = self._size()
+        count = int(self._header['subject_count'])
+        if size == self._indexed and count == len(self._subject_names):
+            return size
+
+        with self._cache_lock:
+            if size > self._indexed:
+                table = self._table_for(size)
+                reg_nos = table['reg_no'][self._indexed:size].tolist()
+                for offset, reg_no in enumerate(reg_nos):
+                    self._rows[reg_no.decode('utf-8')] = self._indexed + offset
+                self._indexed = size
+
+            known = len(self._subject_names)
+            for name in self._header['subject_names'][known:count].tolist():
+                self._subject_ids[name.decode('utf-8')] = len(self._subject_names)
+                self._subject_names.append(name.decode('utf-8'))
+        return size
+
+    def _row(self, reg_no):
+        """Row number of a student, or None"""
+        row = self._rows.get(reg_no)
+        if row is None:
+            self._refresh()
+            row = self._rows.get(reg_no)
+        return row
+
+    def _intern_subjects(self, subjects):
+        """Subject ids for a subject list, adding new names to the shared table"""
+        if len(subjects) > MAX_STUDENT_SUBJECTS:
+            raise ValueError("A student can have at most %d subjects" % MAX_STUDENT_SUBJECTS)
+        self._refresh()
+        ids = []
+        for subject in subjects:
+            subject_id = self._subject_ids.get(subject)
+            if subject_id is None:
+                count = int(self._header['subject_count'])
+                if count >= MAX_SUBJECTS:
+                    raise ValueError("Too many distinct subjects")
+                self._header['subject_names'][count] = _encode('subject', subject, SUBJECT_WIDTH)
+                self._header['subject_count'] = count + 1
+                self._refresh()
+                subject_id = count
+            ids.append(subject_id)
+        return ids + [NO_SUBJECT] * (MAX_STUDENT_SUBJECTS - len(ids))
+
+    # ============ ROW ENCODING ============
+
+    def _record(self, row):
+        """Build a consistent student dict from one row, retrying if a write overlaps"""
+        table = self._table_for(row + 1)
+        while True:
+            seq = table['seq'].item(row)
+            if not seq & 1:
+                values = table[row].item()
+                if table['seq'].item(row) == seq:
+                    break
+            # Another thread or worker is part-way through this row
+            time.sleep(0)
+
+        fields = dict(zip(ROW.names, values))
+        student = {field: fields[field].decode('utf-8') for field in TEXT_WIDTHS}
+        for field, bit in INT_FLAG_BITS.items():
+            value = fields[field]
+            student[field] = int(value) if fields['int_flags'] & bit else value
+        ids = [i for i in fields['subject_ids'].tolist() if i != NO_SUBJECT]
+        if ids and max(ids) >= len(self._subject_names):
+            self._refresh()
+        student['subjects'] = [self._subject_names[i] for i in ids]
+        return student
+
+    def _encode_fields(self, fields):
+        """
+        Encode fields for a row before anything is written, so bad values
+        raise ValueError without leaving a partial write behind
+        """
+        encoded = {}
+        int_bits = {}
+        for field, value in fields.items():
+            if field in INT_FLAG_BITS:
+                encoded[field] = value
+                int_bits[INT_FLAG_BITS[field]] = isinstance(value, numbers.Integral)
+            elif field in TEXT_WIDTHS:
+                encoded[field] = _encode(field, value, TEXT_WIDTHS[field])
+            elif field == 'subjects':
+                encoded['subject_ids'] = self._intern_subjects(value)
+        return encoded, int_bits
+
+    @staticmethod
+    def _write_row(record, encoded, int_bits):
+        flags = int(record['int_flags'])
+        for bit, is_int in int_bits.items():
+            flags = flags | bit if is_int else flags & ~bit
+        for field, value in encoded.items():
+            record[field] = value
+        record['int_flags'] = flags
+
+    # ============ STORE INTERFACE ============
+
+    def __contains__(self, reg_no):
+        return self._row(reg_no) is not None
+
+    def __len__(self):
+        return self._size()
+
+    @property
+    def generation(self):
+        """Number of writes to the table, shared by every worker"""
+        return int(self._header['generation'])
+
+    def get(self, reg_no):
+        """Get a student dict by registration number"""
+        row = self._row(reg_no)
+        return None if row is None else self._record(row)
+
+    def all(self):
+        """Get every student dict"""
+        size = self._refresh()
+        return [self._record(row) for row in range(size)]
+
+    def version(self, reg_no):
+        """Get the version of a student record, or None if not found"""
+        row = self._row(reg_no)
+        return None if row is None else self._table_for(row + 1)['version'].item(row)
+
+    def _append(self, student):
+        """Append one validated student; the row is invisible until size is bumped"""
+        reg_no = _encode('reg_no', student['reg_no'], TEXT_WIDTHS['reg_no'])
+        encoded, int_bits = self._encode_fields({field: student[field] for field in UPDATABLE_FIELDS})
+
+        size = self._size()
+        capacity = int(self._header['capacity'])
+        if size == capacity:
+            os.ftruncate(self._fd, HEADER_BYTES + 2 * capacity * ROW.itemsize)
+            self._header['capacity'] = 2 * capacity
+        table = self._table_for(size + 1)
+
+        record = table[size]
+        record['seq'] = 0
+        record['version'] = 1
+        record['int_flags'] = 0
+        record['reg_no'] = reg_no
+        self._write_row(record, encoded, int_bits)
+        self._header['size'] = size + 1
+        self._rows[student['reg_no']] = size
+
+    def add(self, student):
+        """Add a new student, returns False if the reg_no already exists"""
+        reg_no = student.get('reg_no')
+        if not reg_no:
+            return False
+        with self._locked():
+            if reg_no in self:
+                return False
+            check_new_student(student)
+            self._append(student)
+            self._header['generation'] += 1
+            return True
+
+    def add_many(self, students):
+        """
+        Add many students under one lock
+        Returns a list with None for each added student, or an error message
+        """
+        errors = []
+        with self._locked():
+            for student in students:
+                reg_no = student.get('reg_no')
+                if not reg_no or reg_no in self:
+                    errors.append("Student already exists or invalid data")
+                    continue
+                try:
+                    check_new_student(student)
+                    self._append(student)
+                except ValueError as e:
+                    errors.append(str(e))
+                    continue
+                errors.append(None)
+            if errors.count(None):
+                self._header['generation'] += 1
+        return errors
+
+    def update(self, reg_no, fields):
+        """Update some fields of an existing student, returns False if not found"""
+        check_fields(fields)
+        with self._locked():
+            row = self._row(reg_no)
+            if row is None:
+                return False
+            encoded, int_bits = self._encode_fields(
+                {field: value for field, value in fields.items() if field in UPDATABLE_FIELDS}
+            )
+            record = self._table_for(row + 1)[row]
+            record['seq'] += 1
+            self._write_row(record, encoded, int_bits)
+            record['seq'] += 1
+            record['version'] += 1
+            self._header['generation'] += 1
+            return True
+
+    def update_many(self, updates):
+        """
+        Apply many (reg_no, fields) updates under one lock
+        Every update is encoded before the first row is written, so a bad
+        value raises ValueError without applying any of them
+        Returns a list of booleans, False for students that were not found
+        """
+        for _, fields in updates:
+            check_fields(fields)
+        with self._locked():
+            rows = [self._row(reg_no) for reg_no, _ in updates]
+            encoded = [
+                self._encode_fields({field: value for field, value in fields.items() if field in UPDATABLE_FIELDS})
+                for _, fields in updates
+            ]
+            for row, (fields, int_bits) in zip(rows, encoded):
+                if row is None:
+                    continue
+                record = self._table_for(row + 1)[row]
+                record['seq'] += 1
+                self._write_row(record, fields, int_bits)
+                record['seq'] += 1
+                record['version'] += 1
+            if any(row is not None for row in rows):
+                self._header['generation'] += 1
+        return [row is not None for row in rows]
+
+    def columns(self, fields=NUMERIC_FIELDS):
+        """
+        Get numeric fields as arrays for vectorized scans
+        Returns (reg_nos, {field: array}); the arrays are read-only views
+        of the shared table, not copies
+        """
+        for field in fields:
+            if field not in NUMERIC_FIELDS:
+                raise ValueError("Unknown numeric field: %s" % field)
+        size = self._refresh()
+        table = self._table_for(size)[:size]
+        data = {}
+        for field in fields:
+            view = table[field]
+            view.flags.writeable = False
+            data[field] = view
+        reg_nos = [reg_no.decode('utf-8') for reg_no in table['reg_no'].tolist()]
+        return reg_nos, data
+
+    def _subject_rows(self, subjects, size):
+        """Boolean array marking rows enrolled in any of the given subjects"""
+        self._refresh()
+        ids = [self._subject_ids[subject] for subject in subjects if subject in self._subject_ids]
+        subject_ids = self._table_for(size)['subject_ids'][:size]
+        return np.isin(subject_ids, ids).any(axis=1)
+
+    def subject_mask(self, subject):
+        """Boolean array marking the columns() rows enrolled in a subject"""
+        return self._subject_rows([subject], self._size())
+
+    def subject_members(self, subjects):
+        """Set of reg_nos enrolled in any of the given subjects"""
+        size = self._size()
+        rows = np.flatnonzero(self._subject_rows(subjects, size))
+        reg_nos = self._table_for(size)['reg_no'][rows].tolist()
+        return {reg_no.decode('utf-8') for reg_no in reg_nos}
+
+    def query(self, sort='reg_no', descending=False, ranges=None, subject=None, after=None, limit=None):
+        """
+        Get one page of students in sort order with one vectorized scan
+        Same arguments and result as IndexedQueryMixin.query
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError("Cannot sort by %s" % sort)
+        size = self._refresh()
+        table = self._table_for(size)[:size]
+        rows = np.arange(size)
+
+        mask = np.ones(size, dtype=bool)
+        for field, (low, high) in (ranges or {}).items():
+            if field not in NUMERIC_FIELDS:
+                raise ValueError("Cannot filter on %s" % field)
+            values = table[field]
+            if low is not None:
+                mask &= values >= low
+            if high is not None:
+                mask &= values <= high
+        if subject is not None:
+            mask &= self._subject_rows([subject], size)
+
+        keys = table[sort]
+        if after is not None:
+            if sort == 'reg_no':
+                key = _encode('reg_no', after[1], TEXT_WIDTHS['reg_no'])
+                mask &= (keys < key) if descending else (keys > key)
+            else:
+                row = self._row(after[1])
+                if row is None:
+                    raise ValueError("Invalid cursor")
+                value = after[0]
+                if descending:
+                    mask &= (keys < value) | ((keys == value) & (rows < row))
+                else:
+                    mask &= (keys > value) | ((keys == value) & (rows > row))
+
+        candidates = np.flatnonzero(mask)
+        wanted = None if limit is None else limit + 1
+        if wanted is not None and len(candidates) > wanted:
+            # Keep only the candidates up to the wanted-th key (ties included)
+            # before the full sort, so a page costs one pass over the table
+            candidate_keys = keys[candidates]
+            kth = len(candidates) - wanted if descending else wanted - 1
+            bound = np.partition(candidate_keys, kth)[kth]
+            keep = candidate_keys >= bound if descending else candidate_keys <= bound
+            candidates = candidates[keep]
+
+        # Rows break ties, so the order matches the other stores
+        order = np.lexsort((candidates, keys[candidates]))
+        if descending:
+            order = order[::-1]
+        page = candidates[order].tolist()
+
+        has_more = wanted is not None and len(page) >= wanted
+        if wanted is not None:
+            page = page[:limit]
+        return [self._record(row) for row in page], has_more
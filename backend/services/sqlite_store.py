@@ -0,0 +1,362 @@
+# SQLite student store
+# Persists students across restarts and shares them between worker processes
+
+import json
+import sqlite3
+import threading
+import weakref
+
+import numpy as np
+
+from services.student_indexes import SORT_FIELDS
+from services.student_store import NUMERIC_FIELDS, check_fields, check_new_student
+
+# Numeric columns are declared without a type so SQLite keeps each value's
+# storage class: 85 comes back as an int and 8.0 as a float, like the dict store
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    id INTEGER PRIMARY KEY,
+    reg_no TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    attendance,
+    assignments,
+    marks,
+    study_hours,
+    cgpa,
+    subjects TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS student_subjects (
+    subject TEXT NOT NULL,
+    reg_no TEXT NOT NULL,
+    PRIMARY KEY (subject, reg_no)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS students_cgpa ON students (cgpa, id);
+CREATE INDEX IF NOT EXISTS students_marks ON students (marks, id);
+CREATE INDEX IF NOT EXISTS students_attendance ON students (attendance, id);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', 0);
+"""
+
+# Statements are kept as constants so sqlite3's per-connection statement
+# cache prepares each one once and reuses it
+SELECT_STUDENT = "SELECT reg_no, password, name, email, attendance, assignments, marks, study_hours, cgpa, subjects FROM students"
+GET_STUDENT = SELECT_STUDENT + " WHERE reg_no = ?"
+ALL_STUDENTS = SELECT_STUDENT + " ORDER BY id"
+INSERT_STUDENT = (
+    "INSERT INTO students (reg_no, password, name, email, attendance, assignments, marks, study_hours, cgpa, subjects) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+INSERT_SUBJECT = "INSERT OR IGNORE INTO student_subjects (subject, reg_no) VALUES (?, ?)"
+DELETE_SUBJECTS = "DELETE FROM student_subjects WHERE reg_no = ?"
+GET_VERSION = "SELECT version FROM students WHERE reg_no = ?"
+GET_GENERATION = "SELECT value FROM meta WHERE key = 'generation'"
+BUMP_GENERATION = "UPDATE meta SET value = value + 1 WHERE key = 'generation'"
+COUNT_STUDENTS = "SELECT COUNT(*) FROM students"
+SUBJECT_MEMBERS = "SELECT reg_no FROM student_subjects WHERE subject = ?"
+
+# Columns update() may change, mapped to their UPDATE statement
+UPDATABLE_COLUMNS = NUMERIC_FIELDS + ['password', 'name', 'email']
+UPDATE_COLUMN = {
+    column: "UPDATE students SET %s = ?, version = version + 1 WHERE reg_no = ?" % column
+    for column in UPDATABLE_COLUMNS
+}
+UPDATE_SUBJECTS = "UPDATE students SET subjects = ?, version = version + 1 WHERE reg_no = ?"
+
+
+def _record(row):
+    """Build a student dict from a SELECT_STUDENT row"""
+    return {
+        'reg_no': row[0],
+        'password': row[1],
+        'name': row[2],
+        'email': row[3],
+        'attendance': row[4],
+        'assignments': row[5],
+        'marks': row[6],
+        'study_hours': row[7],
+        'cgpa': row[8],
+        'subjects': json.loads(row[9])
+    }
+
+
+class _ThreadConnection:
+    """Holds one thread's connection; dropped with the thread's locals"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+
+def _release(connections, lock, conn):
+    """Close a connection whose thread has exited and forget it"""
+    with lock:
+        connections.discard(conn)
+    conn.close()
+
+
+class SQLiteStudentStore:
+    """
+    Student store backed by an SQLite database in WAL mode
+    - one connection per thread, opened on first use and closed when the
+      thread exits
+    - reg_no, subject, cgpa, marks and attendance are indexed
+    - versions and the write generation live in the database, so every
+      process sharing the file sees the same values
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = set()
+        self._pool_lock = threading.RLock()
+
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+
+    # ============ CONNECTION POOL ============
+
+    def _connection(self):
+        """Get this thread's connection, opening it on first use"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            # Only this thread uses the connection; close() may run elsewhere
+            conn = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None,
+                cached_statements=128, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            holder = self._local.holder = _ThreadConnection(conn)
+            # The finalizer holds no reference to the store, so a thread
+            # that outlives the store does not keep it alive
+            weakref.finalize(holder, _release, self._connections, self._pool_lock, conn)
+            with self._pool_lock:
+                self._connections.add(conn)
+        return holder.conn
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._pool_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _write(self, fn):
+        """Run fn(conn) in an immediate transaction and bump the generation"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            if result:
+                conn.execute(BUMP_GENERATION)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return result
+
+    # ============ STORE INTERFACE ============
+
+    def __contains__(self, reg_no):
+        return self.version(reg_no) is not None
+
+    def __len__(self):
+        return self._connection().execute(COUNT_STUDENTS).fetchone()[0]
+
+    @property
+    def generation(self):
+        """Number of writes to the database, shared by every process"""
+        return self._connection().execute(GET_GENERATION).fetchone()[0]
+
+    def get(self, reg_no):
+        """Get a student dict by registration number"""
+        row = self._connection().execute(GET_STUDENT, (reg_no,)).fetchone()
+        return _record(row) if row else None
+
+    def all(self):
+        """Get every student dict"""
+        return [_record(row) for row in self._connection().execute(ALL_STUDENTS)]
+
+    def version(self, reg_no):
+        """Get the version of a student record, or None if not found"""
+        row = self._connection().execute(GET_VERSION, (reg_no,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _insert(conn, student):
+        conn.execute(INSERT_STUDENT, (
+            student['reg_no'], student['password'], student['name'], student['email'],
+            student['attendance'], student['assignments'], student['marks'],
+            student['study_hours'], student['cgpa'], json.dumps(student['subjects'])
+        ))
+        conn.executemany(INSERT_SUBJECT, [(subject, student['reg_no']) for subject in student['subjects']])
+
+    def add(self, student):
+        """Add a new student, returns False if the reg_no already exists"""
+        reg_no = student.get('reg_no')
+        if not reg_no:
+            return False
+        check_new_student(student)
+
+        def insert(conn):
+            try:
+                self._insert(conn, student)
+            except sqlite3.IntegrityError:
+                return False
+            return True
+
+        return self._write(insert)
+
+    def add_many(self, students):
+        """
+        Add many students in one transaction
+        Returns a list with None for each added student, or an error message
+        """
+        errors = []
+
+        def insert(conn):
+            added = 0
+            for student in students:
+                try:
+                    if not student.get('reg_no'):
+                        raise sqlite3.IntegrityError()
+                    check_new_student(student)
+                    self._insert(conn, student)
+                except sqlite3.IntegrityError:
+                    errors.append("Student already exists or invalid data")
+                    continue
+                except ValueError as e:
+                    errors.append(str(e))
+                    continue
+                errors.append(None)
+                added += 1
+            return added
+
+        self._write(insert)
+        return errors
+
+    @staticmethod
+    def _update(conn, reg_no, fields):
+        """Write one update's fields; returns False if the student is not found"""
+        if conn.execute(GET_VERSION, (reg_no,)).fetchone() is None:
+            return False
+        for field, value in fields.items():
+            if field in UPDATE_COLUMN:
+                conn.execute(UPDATE_COLUMN[field], (value, reg_no))
+            elif field == 'subjects':
+                conn.execute(UPDATE_SUBJECTS, (json.dumps(value), reg_no))
+                conn.execute(DELETE_SUBJECTS, (reg_no,))
+                conn.executemany(INSERT_SUBJECT, [(subject, reg_no) for subject in value])
+        return True
+
+    def update(self, reg_no, fields):
+        """Update some fields of an existing student, returns False if not found"""
+        check_fields(fields)
+        return self._write(lambda conn: self._update(conn, reg_no, fields))
+
+    def update_many(self, updates):
+        """
+        Apply many (reg_no, fields) updates in one transaction
+        Returns a list of booleans, False for students that were not found
+        """
+        for _, fields in updates:
+            check_fields(fields)
+        found = []
+
+        def apply(conn):
+            found.extend(self._update(conn, reg_no, fields) for reg_no, fields in updates)
+            return any(found)
+
+        self._write(apply)
+        return found
+
+    def columns(self, fields=NUMERIC_FIELDS):
+        """
+        Get numeric fields as arrays for vectorized scans
+        Returns (reg_nos, {field: array}) with rows in the same order
+        """
+        for field in fields:
+            if field not in NUMERIC_FIELDS:
+                raise ValueError("Unknown numeric field: %s" % field)
+        # reg_no always comes first, so no fields still gives a valid query
+        sql = "SELECT %s FROM students ORDER BY id" % ', '.join(['reg_no'] + list(fields))
+        rows = self._connection().execute(sql).fetchall()
+        reg_nos = [row[0] for row in rows]
+        values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(len(rows), len(fields))
+        return reg_nos, {field: values[:, i] for i, field in enumerate(fields)}
+
+    def subject_mask(self, subject):
+        """Boolean array marking the columns() rows enrolled in a subject"""
+        sql = (
+            "SELECT EXISTS (SELECT 1 FROM student_subjects ss WHERE ss.subject = ? AND ss.reg_no = s.reg_no) "
+            "FROM students s ORDER BY s.id"
+        )
+        rows = self._connection().execute(sql, (subject,)).fetchall()
+        return np.array([row[0] for row in rows], dtype=bool)
+
+    def subject_members(self, subjects):
+        """Set of reg_nos enrolled in any of the given subjects"""
+        conn = self._connection()
+        members = set()
+        for subject in subjects:
+            members.update(row[0] for row in conn.execute(SUBJECT_MEMBERS, (subject,)))
+        return members
+
+    def query(self, sort='reg_no', descending=False, ranges=None, subject=None, after=None, limit=None):
+        """
+        Get one page of students in sort order, using the column indexes
+        Same arguments and result as IndexedQueryMixin.query
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError("Cannot sort by %s" % sort)
+
+        where = []
+        params = []
+        for field, (low, high) in (ranges or {}).items():
+            if field not in NUMERIC_FIELDS:
+                raise ValueError("Cannot filter on %s" % field)
+            if low is not None:
+                where.append("%s >= ?" % field)
+                params.append(low)
+            if high is not None:
+                where.append("%s <= ?" % field)
+                params.append(high)
+        if subject is not None:
+            where.append("reg_no IN (SELECT reg_no FROM student_subjects WHERE subject = ?)")
+            params.append(subject)
+
+        direction = 'DESC' if descending else 'ASC'
+        compare = '<' if descending else '>'
+        if sort == 'reg_no':
+            order = "reg_no %s" % direction
+            if after is not None:
+                where.append("reg_no %s ?" % compare)
+                params.append(after[1])
+        else:
+            order = "%s %s, id %s" % (sort, direction, direction)
+            if after is not None:
+                if self.version(after[1]) is None:
+                    raise ValueError("Invalid cursor")
+                where.append("(%s, id) %s (?, (SELECT id FROM students WHERE reg_no = ?))" % (sort, compare))
+                params.extend(after)
+
+        sql = SELECT_STUDENT
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY " + order
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        students = [_record(row) for row in self._connection().execute(sql, params)]
+        has_more = limit is not None and len(students) > limit
+        return students[:limit] if limit is not None else students, has_more
@@ -0,0 +1,534 @@
+# Sorted secondary indexes over the student store
+# Used for paginated, filtered and sorted roster queries
+
+import base64
+import bisect
+import itertools
+import json
+import math
+import numbers
+
+import numpy as np
+
+# Numeric fields with a sorted index
+INDEXED_FIELDS = ['cgpa', 'marks', 'attendance']
+
+# Fields a roster query can be sorted by
+SORT_FIELDS = ['reg_no'] + INDEXED_FIELDS
+
+# Candidates checked per step while filling a page
+SCAN_CHUNK = 256
+
+# Batches larger than this re-sort the indexes instead of inserting row by row
+BATCH_REBUILD_SIZE = 32
+
+# Entries per chunk of the sorted indexes; a chunk twice this size is split
+CHUNK_SIZE = 1024
+
+# Pending subject changes are folded into the base set once they reach
+# this size or 1/16 of it, so a write never copies a whole subject
+SUBJECT_DELTA_SIZE = 1024
+
+
+class _Chunked:
+    """
+    Sorted entries split into chunks of at most 2 * CHUNK_SIZE
+    Instances are immutable: a change returns a new instance that shares
+    every chunk but the ones it touched, so a write copies one chunk plus
+    the per-chunk bookkeeping instead of every entry
+    Subclasses define _last(chunk), the largest key of a chunk
+    """
+
+    def __init__(self, chunks=(), maxes=None, lengths=None):
+        self._chunks = list(chunks)
+        self._maxes = [self._last(chunk) for chunk in self._chunks] if maxes is None else maxes
+        if lengths is None:
+            lengths = np.fromiter((self._len(chunk) for chunk in self._chunks), dtype=np.int64, count=len(self._chunks))
+        self._lengths = lengths
+        self._offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    @staticmethod
+    def _len(chunk):
+        return len(chunk)
+
+    def _replaced(self, i, replacement):
+        """A new instance with chunk i replaced by the non-empty chunks of replacement"""
+        replacement = [chunk for chunk in replacement if self._len(chunk)]
+        lengths = np.fromiter((self._len(chunk) for chunk in replacement), dtype=np.int64, count=len(replacement))
+        return type(self)(
+            self._chunks[:i] + replacement + self._chunks[i + 1:],
+            self._maxes[:i] + [self._last(chunk) for chunk in replacement] + self._maxes[i + 1:],
+            np.concatenate((self._lengths[:i], lengths, self._lengths[i + 1:]))
+        )
+
+    def _chunk_for(self, key, side):
+        """Chunk holding the left / right insertion point of key; len(chunks) past the end"""
+        if side == 'left':
+            return bisect.bisect_left(self._maxes, key)
+        return bisect.bisect_right(self._maxes, key)
+
+    def _chunk_at(self, position):
+        """Chunk holding a position"""
+        return int(np.searchsorted(self._offsets, position, 'right')) - 1
+
+
+class SortedChunks(_Chunked):
+    """Immutable sorted list of keys (reg_nos), stored as chunks of Python lists"""
+
+    @staticmethod
+    def _last(chunk):
+        return chunk[-1]
+
+    @classmethod
+    def from_sorted(cls, keys):
+        """Chunk an already sorted sequence of keys"""
+        keys = list(keys)
+        return cls(keys[i:i + CHUNK_SIZE] for i in range(0, len(keys), CHUNK_SIZE))
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self._chunks)
+
+    def inserted(self, key):
+        """A new list with key added"""
+        if not self._chunks:
+            return SortedChunks([[key]])
+        i = min(self._chunk_for(key, 'left'), len(self._chunks) - 1)
+        chunk = list(self._chunks[i])
+        bisect.insort(chunk, key)
+        return self._replaced(i, [chunk[:CHUNK_SIZE], chunk[CHUNK_SIZE:]] if len(chunk) > 2 * CHUNK_SIZE else [chunk])
+
+    def _bisect(self, key, side):
+        i = self._chunk_for(key, side)
+        if i == len(self._chunks):
+            return len(self)
+        within = bisect.bisect_left if side == 'left' else bisect.bisect_right
+        return int(self._offsets[i]) + within(self._chunks[i], key)
+
+    def bisect_left(self, key):
+        """Position of the first key >= key"""
+        return self._bisect(key, 'left')
+
+    def bisect_right(self, key):
+        """Position of the first key > key"""
+        return self._bisect(key, 'right')
+
+    def slice(self, start, stop):
+        """Keys at positions [start, stop)"""
+        start, stop = max(start, 0), min(stop, len(self))
+        keys = []
+        if start >= stop:
+            return keys
+        for i in range(self._chunk_at(start), len(self._chunks)):
+            offset = int(self._offsets[i])
+            if offset >= stop:
+                break
+            keys.extend(self._chunks[i][max(start - offset, 0):stop - offset])
+        return keys
+
+
+class NumericChunks(_Chunked):
+    """
+    Immutable sorted (value, ordinal) pairs of one numeric field
+    Each chunk is a (values, ids) pair of NumPy arrays sorted by value,
+    then ordinal; ordinals break ties so every student has one position
+    """
+
+    @staticmethod
+    def _last(chunk):
+        values, ids = chunk
+        return values.item(-1), ids.item(-1)
+
+    @staticmethod
+    def _len(chunk):
+        return len(chunk[0])
+
+    @classmethod
+    def from_sorted(cls, values, ids):
+        """Chunk already sorted values and ids arrays"""
+        return cls((values[i:i + CHUNK_SIZE], ids[i:i + CHUNK_SIZE]) for i in range(0, len(values), CHUNK_SIZE))
+
+    def arrays(self):
+        """Every (values, ids) as two arrays"""
+        if not self._chunks:
+            return np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int64)
+        return np.concatenate([values for values, _ in self._chunks]), np.concatenate([ids for _, ids in self._chunks])
+
+    @staticmethod
+    def _within(chunk, value, ordinal, side):
+        """Left / right position of (value, ordinal) within one chunk"""
+        values, ids = chunk
+        lo = int(np.searchsorted(values, value, 'left'))
+        hi = int(np.searchsorted(values, value, 'right'))
+        return lo + int(np.searchsorted(ids[lo:hi], ordinal, side))
+
+    def position(self, value, ordinal, side='left'):
+        """
+        First position not sorting before (side="left") or sorting after
+        (side="right") the pair (value, ordinal); ordinal may be -inf / inf
+        """
+        i = self._chunk_for((value, ordinal), side)
+        if i == len(self._chunks):
+            return len(self)
+        return int(self._offsets[i]) + self._within(self._chunks[i], value, ordinal, side)
+
+    def range(self, low=None, high=None):
+        """Positions [lo, hi) of the pairs with low <= value <= high"""
+        lo = 0 if low is None else self.position(low, -np.inf, 'left')
+        hi = len(self) if high is None else self.position(high, np.inf, 'right')
+        return lo, hi
+
+    def ids(self, start, stop):
+        """Ordinals at positions [start, stop)"""
+        start, stop = max(start, 0), min(stop, len(self))
+        parts = []
+        if start < stop:
+            for i in range(self._chunk_at(start), len(self._chunks)):
+                offset = int(self._offsets[i])
+                if offset >= stop:
+                    break
+                parts.append(self._chunks[i][1][max(start - offset, 0):stop - offset])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+
+    def inserted(self, value, ordinal):
+        """A new instance with (value, ordinal) added"""
+        if not self._chunks:
+            return NumericChunks([(np.array([value], dtype=np.float64), np.array([ordinal], dtype=np.int64))])
+        i = min(self._chunk_for((value, ordinal), 'left'), len(self._chunks) - 1)
+        values, ids = self._chunks[i]
+        pos = self._within(self._chunks[i], value, ordinal, 'left')
+        values, ids = np.insert(values, pos, value), np.insert(ids, pos, ordinal)
+        if len(values) > 2 * CHUNK_SIZE:
+            return self._replaced(i, [(values[:CHUNK_SIZE], ids[:CHUNK_SIZE]), (values[CHUNK_SIZE:], ids[CHUNK_SIZE:])])
+        return self._replaced(i, [(values, ids)])
+
+    def removed(self, value, ordinal):
+        """A new instance without (value, ordinal); KeyError if it is missing"""
+        i = self._chunk_for((value, ordinal), 'left')
+        if i == len(self._chunks):
+            raise KeyError(ordinal)
+        values, ids = self._chunks[i]
+        pos = self._within(self._chunks[i], value, ordinal, 'left')
+        if pos >= len(ids) or ids[pos] != ordinal or values[pos] != value:
+            raise KeyError(ordinal)
+        return self._replaced(i, [(np.delete(values, pos), np.delete(ids, pos))])
+
+
+class NumericIndex:
+    """
+    Sorted (value, ordinal) pairs for one numeric field
+    Ordinals are the store's stable integer ids for students
+    The pairs are kept in an immutable NumericChunks: every change builds
+    a new one, copying only the chunk it touched, and publishes it with one
+    assignment, so a reader holding snapshot() never sees a half-applied change
+    """
+
+    def __init__(self):
+        self._chunks = NumericChunks()
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def snapshot(self):
+        """The current NumericChunks; never modified after publishing"""
+        return self._chunks
+
+    def insert(self, value, ordinal):
+        """Insert one student"""
+        self._chunks = self._chunks.inserted(value, ordinal)
+
+    def remove(self, value, ordinal):
+        """Remove one student"""
+        self._chunks = self._chunks.removed(value, ordinal)
+
+    def move(self, old_value, new_value, ordinal):
+        """Re-position a student whose value changed, as one published change"""
+        if old_value != new_value:
+            self._chunks = self._chunks.removed(old_value, ordinal).inserted(new_value, ordinal)
+
+    def rebuild(self, values, ordinals):
+        """Replace the whole index with one sort (for bulk loads)"""
+        values = np.asarray(values, dtype=np.float64)
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        order = np.lexsort((ordinals, values))
+        self._chunks = NumericChunks.from_sorted(values[order], ordinals[order])
+
+
+class SubjectMembers:
+    """
+    Immutable set of reg_nos enrolled in one subject
+    Kept as a base frozenset plus small added / removed sets, so a change
+    copies only the pending changes; they are folded into the base once
+    they grow past SUBJECT_DELTA_SIZE or 1/16 of the base
+    """
+
+    def __init__(self, base=frozenset(), added=frozenset(), removed=frozenset()):
+        self._base = base
+        self._added = added
+        self._removed = removed
+
+    def changed(self, added=(), removed=()):
+        """A new member set with reg_nos added and removed"""
+        added, removed = frozenset(added), frozenset(removed)
+        new_added = (self._added - removed) | (added - self._base)
+        new_removed = (self._removed - added) | (removed & self._base)
+        if len(new_added) + len(new_removed) > max(SUBJECT_DELTA_SIZE, len(self._base) // 16):
+            return SubjectMembers((self._base - new_removed) | new_added)
+        return SubjectMembers(self._base, new_added, new_removed)
+
+    def members(self):
+        """Every member as a frozenset"""
+        if not self._added and not self._removed:
+            return self._base
+        return (self._base - self._removed) | self._added
+
+
+class StudentIndexes:
+    """
+    Secondary indexes kept up to date by a student store
+    - one NumericIndex per field in INDEXED_FIELDS
+    - a SortedChunks list of reg_nos
+    - an inverted index of subject -> SubjectMembers
+    Writes are serialized by the store; changed structures are replaced
+    rather than changed in place, so readers never need a lock, and the
+    reg_no list and subject sets only copy the part that changed
+    """
+
+    def __init__(self):
+        self.numeric = {field: NumericIndex() for field in INDEXED_FIELDS}
+        self.reg_nos = SortedChunks()
+        self.subjects = {}
+
+    def _change_subjects(self, added, removed=None):
+        """
+        Publish new member sets for the subjects that changed
+        added / removed: {subject: set of reg_nos}
+        """
+        removed = removed or {}
+        for subject in set(added) | set(removed):
+            members = self.subjects.get(subject, SubjectMembers())
+            self.subjects[subject] = members.changed(added.get(subject, ()), removed.get(subject, ()))
+
+    def add(self, ordinal, student):
+        """Index a newly added student"""
+        for field, index in self.numeric.items():
+            index.insert(student[field], ordinal)
+        self.reg_nos = self.reg_nos.inserted(student['reg_no'])
+        self._change_subjects({subject: {student['reg_no']} for subject in student['subjects']})
+
+    def add_batch(self, ordinals, students):
+        """
+        Index many newly added students
+        Large batches are merged with one sort instead of one shift per row
+        """
+        if len(ordinals) <= BATCH_REBUILD_SIZE:
+            for ordinal, student in zip(ordinals, students):
+                self.add(ordinal, student)
+            return
+
+        added = {}
+        for student in students:
+            for subject in student['subjects']:
+                added.setdefault(subject, set()).add(student['reg_no'])
+        self._change_subjects(added)
+        for field, index in self.numeric.items():
+            values, ids = index.snapshot().arrays()
+            values = np.concatenate([values, [student[field] for student in students]])
+            index.rebuild(values, np.concatenate([ids, ordinals]))
+        reg_nos = itertools.chain(self.reg_nos, (student['reg_no'] for student in students))
+        self.reg_nos = SortedChunks.from_sorted(sorted(reg_nos))
+
+    def update(self, ordinal, reg_no, old_values, new_values):
+        """
+        Re-index the fields that changed in an update
+        old_values: the student's INDEXED_FIELDS and subjects before the update
+        """
+        for field, index in self.numeric.items():
+            if field in new_values:
+                index.move(old_values[field], new_values[field], ordinal)
+        if 'subjects' in new_values:
+            self._change_subjects(
+                {subject: {reg_no} for subject in new_values['subjects']},
+                {subject: {reg_no} for subject in old_values['subjects'] if subject not in new_values['subjects']}
+            )
+
+    def update_batch(self, changes, columns):
+        """
+        Re-index many updates
+        changes: list of (ordinal, reg_no, old_values, new_values) as for update()
+        columns: callable returning {field: array} of INDEXED_FIELDS for
+        every student in ordinal order, with the updates already applied
+        Large batches re-sort the changed indexes instead of moving row by row
+        """
+        if len(changes) <= BATCH_REBUILD_SIZE:
+            for change in changes:
+                self.update(*change)
+            return
+
+        changed = set()
+        final_subjects = {}
+        first_subjects = {}
+        for ordinal, reg_no, old_values, new_values in changes:
+            changed.update(new_values)
+            if 'subjects' in new_values:
+                first_subjects.setdefault(reg_no, old_values['subjects'])
+                final_subjects[reg_no] = new_values['subjects']
+
+        # Only each student's first and last subject lists matter
+        added = {}
+        removed = {}
+        for reg_no, subjects in final_subjects.items():
+            for subject in set(first_subjects[reg_no]) - set(subjects):
+                removed.setdefault(subject, set()).add(reg_no)
+            for subject in subjects:
+                added.setdefault(subject, set()).add(reg_no)
+        self._change_subjects(added, removed)
+
+        fields = [field for field in INDEXED_FIELDS if field in changed]
+        if fields:
+            data = columns()
+            for field in fields:
+                self.numeric[field].rebuild(data[field], np.arange(len(data[field])))
+
+    def rebuild(self, ordinals, reg_nos, columns, subject_members):
+        """
+        Rebuild every index from full columns (for bulk loads)
+        subject_members: {subject: set of reg_nos}
+        """
+        for field, index in self.numeric.items():
+            index.rebuild(columns[field], ordinals)
+        self.reg_nos = SortedChunks.from_sorted(sorted(reg_nos))
+        self.subjects = {subject: SubjectMembers(frozenset(members)) for subject, members in subject_members.items()}
+
+
+def encode_cursor(sort, value, reg_no):
+    """Opaque cursor for the row a page ended on"""
+    raw = json.dumps([sort, value, reg_no], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort):
+    """
+    Decode a cursor made by encode_cursor; returns (value, reg_no)
+    Raises ValueError unless reg_no is a string and value is a string for
+    a reg_no sort or a finite number for a numeric sort
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, value, reg_no = json.loads(raw.decode('utf-8'))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("Cursor does not match sort order")
+    if not isinstance(reg_no, str):
+        raise ValueError("Invalid cursor")
+    if sort.lstrip('-') == 'reg_no':
+        if not isinstance(value, str):
+            raise ValueError("Invalid cursor")
+    elif isinstance(value, bool) or not isinstance(value, numbers.Real) or not math.isfinite(value):
+        raise ValueError("Invalid cursor")
+    return value, reg_no
+
+
+class IndexedQueryMixin:
+    """
+    Paginated roster queries for stores that keep StudentIndexes
+    The store provides:
+    - self._indexes: StudentIndexes
+    - _ordinal(reg_no): ordinal of a student, or None
+    - _matching(ordinals, ranges, subject): boolean array
+    - _record_by_ordinal(ordinal)
+    """
+
+    def subject_members(self, subjects):
+        """Set of reg_nos enrolled in any of the given subjects"""
+        members = set()
+        for subject in subjects:
+            entry = self._indexes.subjects.get(subject)
+            if entry is not None:
+                members |= entry.members()
+        return members
+
+    def query(self, sort='reg_no', descending=False, ranges=None, subject=None, after=None, limit=None):
+        """
+        Get one page of students in sort order
+        ranges: {field: (low, high)} inclusive bounds, None for open
+        after: (value, reg_no) of the last row of the previous page
+        limit: page size, None for everything
+        Returns (students, has_more)
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError("Cannot sort by %s" % sort)
+        ranges = dict(ranges or {})
+
+        if sort == 'reg_no':
+            positions, lookup = self._reg_no_positions(ranges.pop('reg_no', (None, None)), descending, after)
+        else:
+            positions, lookup = self._numeric_positions(sort, ranges.pop(sort, (None, None)), descending, after)
+
+        wanted = None if limit is None else limit + 1
+        chunk = SCAN_CHUNK if wanted is None else max(SCAN_CHUNK, wanted)
+        lo, hi = positions
+        position = hi if descending else lo
+        page = []
+        while wanted is None or len(page) < wanted:
+            if descending:
+                if position <= lo:
+                    break
+                i, j = max(lo, position - chunk), position
+                position = i
+                ordinals = np.asarray(lookup(i, j), dtype=np.int64)[::-1]
+            else:
+                if position >= hi:
+                    break
+                i, j = position, min(hi, position + chunk)
+                position = j
+                ordinals = np.asarray(lookup(i, j), dtype=np.int64)
+
+            if ranges or subject:
+                ordinals = ordinals[self._matching(ordinals, ranges, subject)]
+            page.extend(ordinals.tolist())
+
+        has_more = wanted is not None and len(page) >= wanted
+        if wanted is not None:
+            page = page[:limit]
+        return [self._record_by_ordinal(ordinal) for ordinal in page], has_more
+
+    def _reg_no_positions(self, bounds, descending, after):
+        """Position range and ordinal lookup for a reg_no sort"""
+        reg_nos = self._indexes.reg_nos
+        low, high = bounds
+        lo = 0 if low is None else reg_nos.bisect_left(low)
+        hi = len(reg_nos) if high is None else reg_nos.bisect_right(high)
+        if after is not None:
+            if descending:
+                hi = min(hi, reg_nos.bisect_left(after[1]))
+            else:
+                lo = max(lo, reg_nos.bisect_right(after[1]))
+
+        def lookup(i, j):
+            return [self._ordinal(reg_no) for reg_no in reg_nos.slice(i, j)]
+
+        return (lo, hi), lookup
+
+    def _numeric_positions(self, sort, bounds, descending, after):
+        """Position range and ordinal lookup for a numeric sort"""
+        # One snapshot of the index serves the whole query
+        chunks = self._indexes.numeric[sort].snapshot()
+        lo, hi = chunks.range(*bounds)
+        if after is not None:
+            value, reg_no = after
+            ordinal = self._ordinal(reg_no)
+            if ordinal is None:
+                raise ValueError("Invalid cursor")
+            if descending:
+                hi = min(hi, chunks.position(value, ordinal, 'left'))
+            else:
+                lo = max(lo, chunks.position(value, ordinal, 'right'))
+
+        def lookup(i, j):
+            return chunks.ids(i, j)
+
+        return (lo, hi), lookup
@@ -0,0 +1,314 @@
+# Student storage backends used by DataService
+# The default store keeps the STUDENTS dict-of-dicts from dummy_data.py
+
+import math
+import numbers
+import threading
+
+import numpy as np
+
+from services.student_indexes import INDEXED_FIELDS, IndexedQueryMixin, StudentIndexes
+
+# Fields stored for every student, in API order
+STUDENT_FIELDS = ['reg_no', 'password', 'name', 'email', 'attendance', 'assignments', 'marks', 'study_hours', 'cgpa', 'subjects']
+
+# Numeric fields that can be scanned as arrays
+NUMERIC_FIELDS = ['attendance', 'assignments', 'marks', 'study_hours', 'cgpa']
+
+# Fields stored as text
+TEXT_FIELDS = ['reg_no', 'password', 'name', 'email']
+
+# Fields a student can be read with (everything except the password)
+PUBLIC_FIELDS = [field for field in STUDENT_FIELDS if field != 'password']
+
+
+def check_numeric(fields):
+    """Raise ValueError if any numeric field in `fields` is not a finite number"""
+    for field in NUMERIC_FIELDS:
+        if field in fields:
+            value = fields[field]
+            if isinstance(value, bool) or not isinstance(value, numbers.Real):
+                raise ValueError("%s must be a number" % field)
+            if not math.isfinite(value):
+                raise ValueError("%s must be a finite number" % field)
+
+
+def check_fields(fields):
+    """Raise ValueError if any field in `fields` has the wrong type"""
+    check_numeric(fields)
+    for field in TEXT_FIELDS:
+        if field in fields and not isinstance(fields[field], str):
+            raise ValueError("%s must be a string" % field)
+    if 'subjects' in fields:
+        subjects = fields['subjects']
+        if not isinstance(subjects, list) or not all(isinstance(subject, str) for subject in subjects):
+            raise ValueError("subjects must be a list of strings")
+
+
+def check_new_student(student):
+    """Raise ValueError if a new student is missing fields or has bad values"""
+    missing = [field for field in STUDENT_FIELDS if field not in student]
+    if missing:
+        raise ValueError("Missing required fields: %s" % ', '.join(missing))
+    check_fields(student)
+
+
+def in_range(value, bounds):
+    """True if low <= value <= high, where None bounds are open"""
+    low, high = bounds
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+class DictStudentStore(IndexedQueryMixin):
+    """
+    Student store backed by a plain dict of reg_no -> student dict
+    Every scan is a Python loop, which is fine for small rosters
+    Student dicts are copy-on-write: an update builds a new dict and swaps
+    it in with one assignment, so a dict returned by get() never changes
+    and readers need no lock. Writers are serialized by a lock
+    """
+
+    name = 'dict'
+
+    def __init__(self, students=None):
+        self.generation = 0
+        self._write_lock = threading.Lock()
+        self._load(students if students is not None else {})
+
+    def _load(self, students):
+        """Take over a dict of students and build the indexes in one pass"""
+        self._students = students
+        # Per-student version, bumped on every write (missing means 1)
+        self._versions = {}
+
+        # Stable integer id per student, used by the secondary indexes
+        self._ordinals = {}
+        self._by_ordinal = []
+        subject_members = {}
+        for reg_no, student in self._students.items():
+            self._ordinals[reg_no] = len(self._by_ordinal)
+            self._by_ordinal.append(reg_no)
+            for subject in student['subjects']:
+                subject_members.setdefault(subject, set()).add(reg_no)
+
+        self._indexes = StudentIndexes()
+        reg_nos, columns = self.columns(INDEXED_FIELDS)
+        self._indexes.rebuild(range(len(reg_nos)), reg_nos, columns, subject_members)
+
+    def __contains__(self, reg_no):
+        return reg_no in self._students
+
+    def __len__(self):
+        return len(self._students)
+
+    def get(self, reg_no):
+        """Get a student dict by registration number"""
+        return self._students.get(reg_no)
+
+    def all(self):
+        """Get every student dict"""
+        # list() copies the values in one step, so a concurrent add
+        # cannot break the iteration
+        return list(self._students.values())
+
+    def _publish(self, reg_no, student):
+        """Make a new student dict visible to readers"""
+        if reg_no not in self._ordinals:
+            self._ordinals[reg_no] = len(self._by_ordinal)
+            self._by_ordinal.append(reg_no)
+        self._students[reg_no] = student
+
+    def add(self, student):
+        """Add a new student, returns False if the reg_no already exists"""
+        with self._write_lock:
+            reg_no = student.get('reg_no')
+            if not reg_no or reg_no in self._students:
+                return False
+            check_new_student(student)
+
+            student = dict(student)
+            self._versions[reg_no] = 1
+            self._publish(reg_no, student)
+            self._indexes.add(self._ordinals[reg_no], student)
+            self.generation += 1
+            return True
+
+    def add_many(self, students):
+        """
+        Add many students with one index merge
+        Returns a list with None for each added student, or an error message
+        """
+        with self._write_lock:
+            errors = []
+            added = []
+            for student in students:
+                reg_no = student.get('reg_no')
+                if not reg_no or reg_no in self._students:
+                    errors.append("Student already exists or invalid data")
+                    continue
+                try:
+                    check_new_student(student)
+                except ValueError as e:
+                    errors.append(str(e))
+                    continue
+
+                student = dict(student)
+                self._versions[reg_no] = 1
+                self._publish(reg_no, student)
+                added.append(student)
+                errors.append(None)
+
+            if added:
+                first = len(self._by_ordinal) - len(added)
+                self._indexes.add_batch(np.arange(first, len(self._by_ordinal)), added)
+                self.generation += 1
+            return errors
+
+    def _apply_update(self, reg_no, fields):
+        """Write one update's fields; returns the index change, or None if not found"""
+        student = self._students.get(reg_no)
+        if student is None:
+            return None
+
+        old_values = {field: student[field] for field in INDEXED_FIELDS}
+        old_values['subjects'] = student['subjects']
+        # The record is published before its version, so a reader that sees
+        # the new version always gets the new record
+        self._publish(reg_no, {**student, **fields})
+        self._versions[reg_no] = self._versions.get(reg_no, 1) + 1
+        return self._ordinals[reg_no], reg_no, old_values, fields
+
+    def update(self, reg_no, fields):
+        """Update some fields of an existing student, returns False if not found"""
+        check_fields(fields)
+        with self._write_lock:
+            change = self._apply_update(reg_no, fields)
+            if change is None:
+                return False
+            self._indexes.update(*change)
+            self.generation += 1
+            return True
+
+    def update_many(self, updates):
+        """
+        Apply many (reg_no, fields) updates with one index merge
+        Every update is checked before the first one is written, so a bad
+        value raises ValueError without applying any of them
+        Returns a list of booleans, False for students that were not found
+        """
+        for _, fields in updates:
+            check_fields(fields)
+        with self._write_lock:
+            changes = [self._apply_update(reg_no, fields) for reg_no, fields in updates]
+            applied = [change for change in changes if change is not None]
+            if applied:
+                self._indexes.update_batch(applied, lambda: self.columns(INDEXED_FIELDS)[1])
+                self.generation += 1
+            return [change is not None for change in changes]
+
+    def version(self, reg_no):
+        """Get the version of a student record, or None if not found"""
+        if reg_no not in self._students:
+            return None
+        return self._versions.get(reg_no, 1)
+
+    def columns(self, fields=NUMERIC_FIELDS):
+        """
+        Get numeric fields as arrays for vectorized scans
+        Returns (reg_nos, {field: array}) with rows in the same order
+        """
+        students = self.all()
+        reg_nos = [student['reg_no'] for student in students]
+        data = {
+            field: np.fromiter((student[field] for student in students), dtype=np.float64, count=len(students))
+            for field in fields
+        }
+        return reg_nos, data
+
+    def subject_mask(self, subject):
+        """Boolean array marking the columns() rows enrolled in a subject"""
+        students = self.all()
+        return np.fromiter(
+            (subject in student['subjects'] for student in students),
+            dtype=bool, count=len(students)
+        )
+
+    # ============ SNAPSHOTS ============
+
+    def snapshot_state(self):
+        """
+        Every student for a snapshot (see services/durability.py)
+        Safe to call while other threads write, since student dicts are
+        never changed once published
+        """
+        return {'students': self.all()}
+
+    def load_state(self, state):
+        """Replace the store's contents with a snapshot_state() copy"""
+        with self._write_lock:
+            self._load({student['reg_no']: student for student in state['students']})
+            self.generation += 1
+
+    # ============ INDEXED QUERY HOOKS ============
+
+    def _ordinal(self, reg_no):
+        return self._ordinals.get(reg_no)
+
+    def _record_by_ordinal(self, ordinal):
+        return self._students[self._by_ordinal[ordinal]]
+
+    def _matching(self, ordinals, ranges, subject):
+        """Check range and subject filters one student at a time"""
+        mask = np.zeros(len(ordinals), dtype=bool)
+        for i, ordinal in enumerate(ordinals.tolist()):
+            student = self._record_by_ordinal(ordinal)
+            mask[i] = (
+                (subject is None or subject in student['subjects'])
+                and all(in_range(student[field], bounds) for field, bounds in ranges.items())
+            )
+        return mask
+
+
+def create_student_store(kind, students=None, sqlite_path=None, data_dir=None,
+                         fsync_interval=0.05, snapshot_interval=300.0, shared_path=None):
+    """
+    Create a student store by name
+    students: initial dict of reg_no -> student dict
+    sqlite_path: database file for the sqlite store; it is only seeded
+    with `students` when empty, so saved edits survive restarts
+    data_dir: if set, the dict and columnar stores log every write there
+    and are restored from it on startup (see services/durability.py)
+    shared_path: table file for the shared store, seeded like sqlite
+    """
+    if kind in ('sqlite', 'shared'):
+        if kind == 'sqlite':
+            from services.sqlite_store import SQLiteStudentStore
+            store = SQLiteStudentStore(sqlite_path)
+        else:
+            from services.shared_store import SharedStudentStore
+            store = SharedStudentStore(shared_path)
+        if students and len(store) == 0:
+            # Workers starting together may both seed; duplicates are skipped
+            store.add_many([dict(student) for student in students.values()])
+        return store
+
+    if kind == 'dict':
+        store = DictStudentStore(None if data_dir else students)
+    elif kind == 'columnar':
+        from services.columnar_store import ColumnarStudentStore
+        store = ColumnarStudentStore()
+        if not data_dir:
+            store.add_many(list((students or {}).values()))
+    else:
+        raise ValueError("Unknown student store: %s" % kind)
+
+    if not data_dir:
+        return store
+
+    from services.durability import DurableStudentStore
+    durable = DurableStudentStore(store, data_dir, fsync_interval, snapshot_interval)
+    if not durable.recovered:
+        # First start: persist the seed data so later restarts do not need it
+        durable.add_many([dict(student) for student in (students or {}).values()])
+        durable.snapshot()
+    return durable
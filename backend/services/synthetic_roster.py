@@ -0,0 +1,183 @@
+# Synthetic rosters for scale testing
+# Builds STUDENTS / TEACHERS-shaped data with vectorized NumPy sampling from
+# a fixed seed, so the same arguments always give the same roster
+
+import csv
+import os
+
+import numpy as np
+
+from services.columnar_store import INT_FLAG_BITS, ColumnarStudentStore
+from services.student_store import STUDENT_FIELDS, DictStudentStore
+
+# Dataset the score correlations are fitted from
+SEED_DATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'student_data.csv'
+)
+
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Computer Science", "English", "History"]
+
+# Numeric fields generated as whole numbers (sent as JSON ints)
+INT_FIELDS = ['attendance', 'assignments', 'marks']
+
+# Students added to a store per add_many call when there is no bulk path
+CHUNK_SIZE = 100000
+
+
+def _fit(X, y):
+    """Least-squares coefficients (intercept last) and residual standard deviation"""
+    A = np.column_stack([X, np.ones(len(y))])
+    beta = np.linalg.lstsq(A, y, rcond=None)[0]
+    return beta, float(np.std(y - A @ beta))
+
+
+class SyntheticRoster:
+    """
+    A generated roster held as columns
+    Scores follow the seed dataset: previous marks are fitted on attendance,
+    and the final score (stored as marks) on study hours, attendance and
+    previous marks, each with the seed data's residual noise
+    """
+
+    def __init__(self, count, seed=42, seed_data_path=SEED_DATA_PATH):
+        rng = np.random.default_rng(seed)
+        seed_data = np.loadtxt(seed_data_path, delimiter=',', skiprows=1, ndmin=2)
+        study, attendance_seed, previous_seed, final_seed = seed_data.T
+        previous_fit, previous_noise = _fit(attendance_seed[:, None], previous_seed)
+        final_fit, final_noise = _fit(np.column_stack([study, attendance_seed, previous_seed]), final_seed)
+
+        self.count = count
+        study_hours = rng.integers(2, 22, count) / 2
+        attendance = rng.integers(50, 101, count)
+        previous = np.clip(previous_fit[0] * attendance + previous_fit[1] + rng.normal(0, previous_noise, count), 0, 100)
+        final = final_fit[:3] @ np.array([study_hours, attendance, previous]) + final_fit[3]
+        marks = np.clip(np.rint(final + rng.normal(0, final_noise, count)), 0, 100)
+
+        self.numeric = {
+            'attendance': attendance.astype(np.float64),
+            'assignments': np.clip(np.rint(study_hours * 1.2 + rng.normal(0, 2, count)), 0, 15),
+            'marks': marks,
+            'study_hours': study_hours,
+            'cgpa': np.clip(np.round(marks / 10 + rng.normal(0, 0.5, count), 1), 4, 10)
+        }
+
+        # Two different subjects per student
+        first = rng.integers(0, len(SUBJECTS), count)
+        second = (first + rng.integers(1, len(SUBJECTS), count)) % len(SUBJECTS)
+        self.subject_pairs = np.column_stack([first, second])
+
+    # ============ TEXT COLUMNS ============
+
+    def text(self):
+        """reg_no, password, name and email lists"""
+        numbers = range(self.count)
+        reg_nos = ["STU%07d" % i for i in numbers]
+        return {
+            'reg_no': reg_nos,
+            'password': ["pw@%d" % i for i in numbers],
+            'name': ["Student %d" % i for i in numbers],
+            'email': ["%s@school.com" % reg_no.lower() for reg_no in reg_nos]
+        }
+
+    def _numeric_lists(self):
+        """Numeric columns as Python lists, whole-number fields as ints"""
+        return {
+            field: (values.astype(np.int64) if field in INT_FIELDS else values).tolist()
+            for field, values in self.numeric.items()
+        }
+
+    def _columns(self, subjects):
+        """Every column as a list, in STUDENT_FIELDS order"""
+        columns = {**self.text(), **self._numeric_lists(), 'subjects': subjects}
+        return [columns[field] for field in STUDENT_FIELDS]
+
+    def students(self):
+        """Yield STUDENTS-shaped dicts in reg_no order"""
+        subjects = [[SUBJECTS[a], SUBJECTS[b]] for a, b in self.subject_pairs.tolist()]
+        for values in zip(*self._columns(subjects)):
+            yield dict(zip(STUDENT_FIELDS, values))
+
+    # ============ OUTPUTS ============
+
+    def columnar_state(self):
+        """The roster as a ColumnarStudentStore.load_state() snapshot"""
+        # Subject lists are interned as pairs of subject ids
+        set_ids = self.subject_pairs[:, 0] * len(SUBJECTS) + self.subject_pairs[:, 1]
+        used, subject_set = np.unique(set_ids, return_inverse=True)
+        int_flags = sum(INT_FLAG_BITS[field] for field in INT_FIELDS)
+        return {
+            'size': self.count,
+            'text': self.text(),
+            'numeric': self.numeric,
+            'int_flags': np.full(self.count, int_flags, dtype=np.uint8),
+            'subject_names': list(SUBJECTS),
+            'subject_sets': [(int(i) // len(SUBJECTS), int(i) % len(SUBJECTS)) for i in used],
+            'subject_set': subject_set.astype(np.int32)
+        }
+
+    def load_into(self, store):
+        """
+        Add the roster to a store
+        An empty dict or columnar store is filled in one step with a single
+        index build; every other store gets add_many calls of CHUNK_SIZE students
+        Returns the number of students that could not be added
+        """
+        if isinstance(store, ColumnarStudentStore) and len(store) == 0:
+            store.load_state(self.columnar_state())
+            return 0
+        if isinstance(store, DictStudentStore) and len(store) == 0:
+            store.load_state({'students': list(self.students())})
+            return 0
+        failed = 0
+        chunk = []
+        for student in self.students():
+            chunk.append(student)
+            if len(chunk) == CHUNK_SIZE:
+                failed += sum(error is not None for error in store.add_many(chunk))
+                chunk = []
+        if chunk:
+            failed += sum(error is not None for error in store.add_many(chunk))
+        return failed
+
+    def write_csv(self, path):
+        """Write a CSV that POST /api/students/import accepts"""
+        subjects = [SUBJECTS[a] + ';' + SUBJECTS[b] for a, b in self.subject_pairs.tolist()]
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(STUDENT_FIELDS)
+            writer.writerows(zip(*self._columns(subjects)))
+
+    def write_arrow(self, path):
+        """Write an Arrow IPC stream file like GET /api/students.arrow (needs pyarrow)"""
+        import pyarrow as pa
+
+        from services.arrow_export import encode_stream
+
+        text = self.text()
+        subject_names = np.array(SUBJECTS, dtype=object)
+        columns = {field: pa.array(values, type=pa.string()) for field, values in text.items()}
+        columns.update({field: pa.array(values) for field, values in self.numeric.items()})
+        columns['subjects'] = pa.array(subject_names[self.subject_pairs].tolist(), type=pa.list_(pa.string()))
+        table = pa.table({field: columns[field] for field in STUDENT_FIELDS})
+        with open(path, 'wb') as f:
+            f.write(encode_stream(table))
+
+
+def generate_teachers(count, seed=42):
+    """TEACHERS-shaped dict of `count` teachers with two subjects each"""
+    rng = np.random.default_rng(seed)
+    experience = rng.integers(1, 31, count).tolist()
+    first = rng.integers(0, len(SUBJECTS), count)
+    second = ((first + rng.integers(1, len(SUBJECTS), count)) % len(SUBJECTS)).tolist()
+    teachers = {}
+    for i, subject in enumerate(first.tolist()):
+        teacher_id = "TCH%04d" % i
+        teachers[teacher_id] = {
+            "teacher_id": teacher_id,
+            "name": "Teacher %d" % i,
+            "password": "teacher@%d" % i,
+            "email": "%s@school.com" % teacher_id.lower(),
+            "subjects": [SUBJECTS[subject], SUBJECTS[second[i]]],
+            "experience": experience[i]
+        }
+    return teachers
@@ -0,0 +1,76 @@
+# Shared fixtures for the backend tests
+# Run from backend/: python -m pytest -q
+
+import copy
+import os
+import random
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app import create_app
+from config import Config
+from dummy_data import STUDENTS
+from services.data_service import DataService
+from services.student_store import create_student_store
+
+SUBJECTS = ["Mathematics", "Physics", "Chemistry", "Computer Science", "English", "History"]
+
+STORE_KINDS = ['dict', 'columnar', 'sqlite', 'shared']
+
+
+def make_students(count, seed=7):
+    """
+    Synthetic students with few distinct cgpa / marks values, so sorted
+    pages have many ties that the reg_no tie-break has to order
+    """
+    rng = random.Random(seed)
+    students = {}
+    for i in range(count):
+        reg_no = "STU%04d" % rng.randrange(10000) if i % 5 else "STU%04d" % i
+        while reg_no in students:
+            reg_no = "STU%04d" % rng.randrange(10000)
+        students[reg_no] = {
+            "reg_no": reg_no,
+            "password": "pw@%d" % i,
+            "name": "Student %d" % i,
+            "email": "%s@school.com" % reg_no.lower(),
+            "attendance": rng.randrange(50, 101),
+            "assignments": rng.randrange(0, 16),
+            "marks": rng.randrange(30, 101, 10),
+            "study_hours": rng.randrange(0, 21) / 2,
+            "cgpa": rng.choice([6.5, 7.0, 7.5, 8.0, 9.1]),
+            "subjects": sorted(rng.sample(SUBJECTS, 2))
+        }
+    return students
+
+
+@pytest.fixture
+def make_store(tmp_path):
+    """Build a store of the given kind holding copies of `students`"""
+    def build(kind, students):
+        students = copy.deepcopy(students)
+        return create_student_store(
+            kind, students, sqlite_path=str(tmp_path / 'students.db'),
+            shared_path=str(tmp_path / ('table-%d' % len(os.listdir(tmp_path))))
+        )
+    return build
+
+
+@pytest.fixture
+def app(tmp_path):
+    """App over a private copy of the dummy roster, with no profiling token"""
+    app = create_app(Config(
+        PRELOAD=[], PROFILE_DIR=str(tmp_path / 'profiles'), PROFILE_TOKEN=None, RETRAIN_EVERY=0
+    ))
+    DataService.use_store(create_student_store('dict', copy.deepcopy(STUDENTS)))
+    yield app
+    DataService.use_store(None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
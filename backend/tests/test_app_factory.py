@@ -0,0 +1,70 @@
+# create_app(): settings belong to the app being built and never leak into the next one
+
+import pytest
+
+from app import create_app
+from config import Config
+from services.data_service import DataService
+from services.prediction_service import PredictionService
+
+
+def test_overrides_do_not_carry_over(tmp_path, monkeypatch):
+    monkeypatch.delenv('STUDENT_STORE', raising=False)
+    app = create_app(Config(
+        STUDENT_STORE='columnar', ROSTER_CACHE_SIZE=3, PREDICTION_CACHE_SIZE=7, PROFILE_DIR=str(tmp_path)
+    ))
+    assert app.config['STUDENT_STORE'] == 'columnar'
+    assert DataService.get_store().name == 'columnar'
+    assert DataService.roster_cache.stats()['max_entries'] == 3
+    assert PredictionService.cache.stats()['max_entries'] == 7
+
+    app = create_app()
+    assert app.config['STUDENT_STORE'] == 'dict'
+    assert DataService.get_store().name == 'dict'
+    assert DataService.roster_cache.stats()['max_entries'] == Config().ROSTER_CACHE_SIZE
+    assert PredictionService.cache.stats()['max_entries'] == Config().PREDICTION_CACHE_SIZE
+
+
+def test_environment_is_read_on_every_call(monkeypatch):
+    monkeypatch.setenv('BLUEPRINTS', 'auth')
+    monkeypatch.setenv('REPORT_CACHE_SIZE', '5')
+    app = create_app()
+    assert sorted(app.blueprints) == ['auth']
+    assert DataService.report_cache.stats()['max_entries'] == 5
+
+    monkeypatch.delenv('BLUEPRINTS')
+    monkeypatch.delenv('REPORT_CACHE_SIZE')
+    app = create_app()
+    assert sorted(app.blueprints) == ['auth', 'metrics', 'prediction', 'profiling', 'student', 'teacher']
+    assert DataService.report_cache.stats()['max_entries'] == 10000
+
+
+def test_each_app_has_its_own_profiler(tmp_path):
+    first = create_app(Config(PROFILE_TOKEN='first', PROFILE_SAMPLE_RATE=0.5, PROFILE_DIR=str(tmp_path / 'a')))
+    second = create_app(Config(PROFILE_DIR=str(tmp_path / 'b')))
+    assert first.extensions['profiler'] is not second.extensions['profiler']
+
+    response = first.test_client().get('/api/profiling', headers={'X-Profile-Token': 'first'})
+    assert response.status_code == 200
+    assert response.get_json()['sample_rate'] == 0.5
+    # The second app has no token, so the first app's token means nothing there
+    assert second.test_client().get('/api/profiling', headers={'X-Profile-Token': 'first'}).status_code == 403
+
+
+def test_config_rejects_unknown_settings():
+    with pytest.raises(ValueError, match='Unknown setting: STUDENT_STOR'):
+        Config(STUDENT_STOR='columnar')
+    with pytest.raises(ValueError, match='Unknown setting'):
+        Config(settings={})
+
+
+def test_unknown_blueprint_is_refused():
+    with pytest.raises(ValueError, match='Unknown blueprint: grades'):
+        create_app(Config(BLUEPRINTS=['auth', 'grades']))
+
+
+def test_environ_argument_replaces_os_environ():
+    settings = Config({'STUDENT_STORE': 'sqlite', 'PRELOAD': 'model, store'})
+    assert settings.STUDENT_STORE == 'sqlite'
+    assert settings.PRELOAD == ['model', 'store']
+    assert settings.settings()['METRICS_ENABLED'] is True
@@ -0,0 +1,143 @@
+# Bulk import and batch update: every bad row is reported with its line
+
+import json
+
+import pytest
+
+from conftest import STORE_KINDS, make_students
+from services.data_service import DataService
+
+CSV_HEADER = 'reg_no,password,name,email,attendance,assignments,marks,study_hours,cgpa,subjects\n'
+
+
+def csv_row(reg_no, cgpa='7.5', marks='70'):
+    return '%s,pw,Name %s,%s@school.com,90,5,%s,3,%s,Mathematics;Physics\n' % (reg_no, reg_no, reg_no.lower(), marks, cgpa)
+
+
+def ndjson(*records):
+    return ''.join((record if isinstance(record, str) else json.dumps(record)) + '\n' for record in records)
+
+
+def new_student(reg_no, **fields):
+    student = {
+        'reg_no': reg_no, 'password': 'pw', 'name': 'Name ' + reg_no, 'email': reg_no.lower() + '@school.com',
+        'attendance': 90, 'assignments': 5, 'marks': 70, 'study_hours': 3, 'cgpa': 7.5, 'subjects': ['Physics']
+    }
+    student.update(fields)
+    return student
+
+
+@pytest.fixture(params=[1, 1000])
+def chunk_size(request):
+    """Run each import with one row per chunk and with one chunk in total"""
+    old = DataService.settings.IMPORT_CHUNK_SIZE
+    DataService.settings.IMPORT_CHUNK_SIZE = request.param
+    yield request.param
+    DataService.settings.IMPORT_CHUNK_SIZE = old
+
+
+def test_csv_import_reports_bad_rows(client, chunk_size):
+    body = (
+        CSV_HEADER
+        + csv_row('STU500')
+        + csv_row('STU501', cgpa='high')
+        + csv_row('STU101')
+        + csv_row('STU502', marks='inf')
+        + 'STU503,pw,Too,many@school.com,90,5,70,3,7.5,Physics,extra\n'
+        + csv_row('STU504')
+        + 'STU505,pw,Short Row\n'
+    )
+    result = client.post('/api/students/import', data=body, content_type='text/csv').get_json()
+    assert result['success'] is True
+    assert result['added'] == 2
+    assert result['failed'] == 5
+    errors = {error['line']: error for error in result['errors']}
+    assert sorted(errors) == [3, 4, 5, 6, 8]
+    assert errors[3]['message'] == 'cgpa must be a number'
+    assert errors[4]['reg_no'] == 'STU101'
+    assert errors[5]['message'] == 'marks must be a finite number'
+    assert errors[6]['message'] == 'Row has more cells than the header'
+    assert errors[8]['message'].startswith('Missing required fields')
+
+    assert client.get('/api/student/STU500').status_code == 200
+    assert client.get('/api/student/STU504').status_code == 200
+    assert client.get('/api/student/STU501').status_code == 404
+
+
+def test_ndjson_import_reports_bad_lines(client, chunk_size):
+    body = ndjson(
+        new_student('STU600'),
+        '{not json',
+        '[1, 2]',
+        new_student('STU601', subjects='Physics'),
+        new_student('STU600'),
+        new_student('STU602')
+    )
+    result = client.post('/api/students/import', data=body, content_type='application/x-ndjson').get_json()
+    assert result['added'] == 2
+    assert [(error['line'], error['message']) for error in result['errors']] == [
+        (2, 'Invalid JSON'),
+        (3, 'Each line must be a JSON object'),
+        (4, 'subjects must be a list of strings'),
+        (5, 'Student already exists or invalid data')
+    ]
+
+
+def test_import_rejects_other_content_types(client):
+    response = client.post('/api/students/import', data='{}', content_type='application/json')
+    assert response.status_code == 415
+
+
+def test_imported_students_are_searchable(client):
+    client.get('/api/students/search?q=anita')
+    body = ndjson(new_student('STU700', name='Zephyrine Quill'))
+    client.post('/api/students/import', data=body, content_type='application/x-ndjson')
+    data = client.get('/api/students/search?q=zephyrine').get_json()['data']
+    assert [student['reg_no'] for student in data] == ['STU700']
+
+
+def test_batch_update_applies_every_row(client):
+    body = 'reg_no,cgpa,marks,email\nSTU101,9.1,,\nSTU102,,88,new@school.com\n'
+    result = client.put('/api/students/update', data=body, content_type='text/csv').get_json()
+    assert result == {'success': True, 'updated': 2, 'errors': []}
+    assert client.get('/api/student/STU101').get_json()['data']['cgpa'] == 9.1
+    # Empty cells leave the field unchanged
+    assert client.get('/api/student/STU101').get_json()['data']['marks'] == 78
+    assert client.get('/api/student/STU102').get_json()['data']['email'] == 'new@school.com'
+
+
+def test_batch_update_is_all_or_nothing(client):
+    body = ndjson(
+        {'reg_no': 'STU101', 'cgpa': 9.5},
+        {'reg_no': 'NOPE', 'cgpa': 5.0},
+        {'reg_no': 'STU102', 'name': 'Not updatable'},
+        {'reg_no': 'STU103', 'marks': 'many'},
+        {'reg_no': 'STU104', 'attendance': 1e999},
+        'null'
+    )
+    response = client.put('/api/students/update', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 400
+    result = response.get_json()
+    assert result['updated'] == 0
+    assert [(error['line'], error['reg_no'], error['message']) for error in result['errors']] == [
+        (2, 'NOPE', 'Student not found'),
+        (3, 'STU102', 'No fields to update'),
+        (4, 'STU103', 'marks must be a number'),
+        (5, 'STU104', 'attendance must be a finite number'),
+        (6, None, 'Each line must be a JSON object')
+    ]
+    # The valid first row was not applied either
+    assert client.get('/api/student/STU101').get_json()['data']['cgpa'] == 7.6
+
+
+@pytest.mark.parametrize('kind', STORE_KINDS)
+def test_store_batch_checks_every_row_first(kind, make_store):
+    students = make_students(5)
+    store = make_store(kind, students)
+    first, middle, last = list(students)[:3]
+    before = {reg_no: (store.get(reg_no), store.version(reg_no)) for reg_no in students}
+    generation = store.generation
+    with pytest.raises(ValueError, match='email must be a string'):
+        store.update_many([(first, {'cgpa': 9.9}), (middle, {'email': None}), (last, {'marks': 1})])
+    assert {reg_no: (store.get(reg_no), store.version(reg_no)) for reg_no in students} == before
+    assert store.generation == generation
@@ -0,0 +1,117 @@
+# ETag / 304 revalidation and gzip negotiation of cached responses
+
+import gzip
+
+import pytest
+
+from conftest import make_students
+from services.data_service import DataService
+from services.payload_cache import GZIP_MIN_SIZE
+
+CACHED_URLS = [
+    '/api/student/STU101',
+    '/api/student/STU101/report',
+    '/api/student/STU101/dashboard',
+    '/api/students',
+    '/api/students?sort=-cgpa&limit=2'
+]
+
+
+@pytest.mark.parametrize('url', CACHED_URLS)
+def test_matching_etag_gets_304(client, url):
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    again = client.get(url, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+
+
+@pytest.mark.parametrize('url', CACHED_URLS)
+def test_stale_etag_gets_full_body(client, url):
+    response = client.get(url, headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+
+
+def test_write_changes_student_etag(client):
+    etag = client.get('/api/student/STU101').headers['ETag']
+    other = client.get('/api/student/STU102').headers['ETag']
+    assert client.put('/api/student/update/STU101', json={'cgpa': 8.8}).status_code == 200
+
+    response = client.get('/api/student/STU101', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['data']['cgpa'] == 8.8
+    assert response.headers['ETag'] != etag
+    # Other students keep their cached payloads
+    assert client.get('/api/student/STU102', headers={'If-None-Match': other}).status_code == 304
+
+
+def test_write_changes_roster_etag(client):
+    etag = client.get('/api/students').headers['ETag']
+    assert client.put('/api/student/update/STU102', json={'marks': 55}).status_code == 200
+
+    response = client.get('/api/students', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_unknown_student_is_not_cached(client):
+    assert client.get('/api/student/NOPE').status_code == 404
+    assert 'ETag' not in client.get('/api/student/NOPE').headers
+
+
+def test_new_store_drops_cached_payloads(client, make_store):
+    assert len(client.get('/api/students?fields=reg_no').get_json()['data']) > 0
+    assert client.get('/api/student/STU101').status_code == 200
+    # A fresh store starts its generation count again, so a payload cached
+    # from the old store must not be served for it
+    DataService.use_store(make_store('dict', {}))
+    assert client.get('/api/students?fields=reg_no').get_json()['data'] == []
+    assert client.get('/api/student/STU101').status_code == 404
+
+
+# ============ GZIP NEGOTIATION ============
+
+@pytest.fixture
+def roster_client(client, make_store):
+    """Client over a roster large enough to be compressed"""
+    DataService.use_store(make_store('dict', make_students(60)))
+    return client
+
+
+def test_gzip_sent_only_when_accepted(roster_client):
+    plain = roster_client.get('/api/students')
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    zipped = roster_client.get('/api/students', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in zipped.headers['Vary']
+    assert len(zipped.data) < len(plain.data)
+    assert gzip.decompress(zipped.data) == plain.data
+
+
+def test_gzip_refused_with_zero_quality(roster_client):
+    response = roster_client.get('/api/students', headers={'Accept-Encoding': 'gzip;q=0, identity'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_gzip_variant_has_its_own_etag(roster_client):
+    plain = roster_client.get('/api/students').headers['ETag']
+    zipped = roster_client.get('/api/students', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    assert zipped != plain
+
+    # Each ETag only validates its own representation
+    assert roster_client.get('/api/students', headers={'Accept-Encoding': 'gzip', 'If-None-Match': zipped}).status_code == 304
+    assert roster_client.get('/api/students', headers={'Accept-Encoding': 'gzip', 'If-None-Match': plain}).status_code == 200
+    assert roster_client.get('/api/students', headers={'If-None-Match': zipped}).status_code == 200
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get('/api/student/STU101', headers={'Accept-Encoding': 'gzip'})
+    assert len(response.data) < GZIP_MIN_SIZE
+    assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,147 @@
+# Change log replay and crash recovery of the durable in-memory stores
+
+import os
+
+import pytest
+
+from conftest import make_students
+from services.durability import FRAME_HEADER, DurableStudentStore, read_segment
+from services.student_store import create_student_store
+
+STUDENTS = make_students(50)
+
+SEED = list(STUDENTS.values())[:40]
+LATE = list(STUDENTS.values())[40:]
+
+
+@pytest.fixture(params=['dict', 'columnar'])
+def kind(request):
+    return request.param
+
+
+def open_store(kind, data_dir):
+    """Open (or recover) a durable store without background snapshots"""
+    return DurableStudentStore(create_student_store(kind), str(data_dir), fsync_interval=0.01, snapshot_interval=3600)
+
+
+def contents(store):
+    return sorted((s['reg_no'], s['cgpa'], s['marks'], s['email']) for s in store.all())
+
+
+def segments(data_dir):
+    return sorted(name for name in os.listdir(data_dir) if name.startswith('wal-'))
+
+
+def test_first_start_is_not_recovered(kind, tmp_path):
+    store = open_store(kind, tmp_path)
+    assert not store.recovered
+    store.close()
+
+
+def test_log_replay_restores_every_write(kind, tmp_path):
+    store = open_store(kind, tmp_path)
+    store.add_many([dict(s) for s in SEED])
+    store.add(dict(LATE[0]))
+    store.update(SEED[0]['reg_no'], {'cgpa': 9.9})
+    store.update_many([(SEED[1]['reg_no'], {'marks': 31}), (SEED[2]['reg_no'], {'email': 'x@school.com'})])
+    # Failed writes are not logged
+    assert not store.update('NOPE', {'cgpa': 1.0})
+    assert not store.add(dict(SEED[3]))
+    expected = contents(store)
+    store.close()
+
+    recovered = open_store(kind, tmp_path)
+    assert recovered.recovered
+    assert contents(recovered) == expected
+    assert recovered.get(SEED[0]['reg_no'])['cgpa'] == 9.9
+    recovered.close()
+
+
+def test_snapshot_then_log_tail(kind, tmp_path):
+    store = open_store(kind, tmp_path)
+    store.add_many([dict(s) for s in SEED])
+    store.snapshot()
+    store.add_many([dict(s) for s in LATE])
+    store.update(SEED[5]['reg_no'], {'marks': 99})
+    expected = contents(store)
+    store.close()
+
+    # The snapshot dropped the segments it covers
+    assert len([name for name in os.listdir(tmp_path) if name.startswith('snapshot-')]) == 1
+    assert len(segments(tmp_path)) == 1
+
+    recovered = open_store(kind, tmp_path)
+    assert contents(recovered) == expected
+    recovered.close()
+
+
+def test_replay_is_idempotent_across_restarts(kind, tmp_path):
+    store = open_store(kind, tmp_path)
+    store.add_many([dict(s) for s in SEED])
+    store.update(SEED[0]['reg_no'], {'cgpa': 4.2})
+    expected = contents(store)
+    store.close()
+
+    for _ in range(3):
+        store = open_store(kind, tmp_path)
+        assert contents(store) == expected
+        store.close()
+
+
+def test_torn_frame_is_truncated(kind, tmp_path):
+    store = open_store(kind, tmp_path)
+    store.add_many([dict(s) for s in SEED])
+    store.update(SEED[0]['reg_no'], {'cgpa': 5.5})
+    expected = contents(store)
+    store.close()
+
+    path = os.path.join(tmp_path, segments(tmp_path)[-1])
+    good_size = os.path.getsize(path)
+    # A crash halfway through the next frame leaves a header and part of a payload
+    with open(path, 'ab') as f:
+        f.write(FRAME_HEADER.pack(500, 0) + b'partial')
+
+    recovered = open_store(kind, tmp_path)
+    assert contents(recovered) == expected
+    assert os.path.getsize(path) == good_size
+
+    # Writes after recovery go to a new segment and replay cleanly
+    recovered.add(dict(LATE[0]))
+    expected = contents(recovered)
+    recovered.close()
+    store = open_store(kind, tmp_path)
+    assert contents(store) == expected
+    store.close()
+
+
+def test_corrupt_frame_stops_replay(tmp_path):
+    store = open_store('dict', tmp_path)
+    store.add(dict(SEED[0]))
+    store.add(dict(SEED[1]))
+    store.add(dict(SEED[2]))
+    store.close()
+
+    path = os.path.join(tmp_path, segments(tmp_path)[-1])
+    records = list(read_segment(path))
+    assert [record[0] for record in records] == ['add', 'add', 'add']
+
+    # Flip one payload byte of the second record so its CRC no longer matches
+    with open(path, 'rb') as f:
+        data = bytearray(f.read())
+    length, _ = FRAME_HEADER.unpack_from(data, 0)
+    second = FRAME_HEADER.size + length
+    data[second + FRAME_HEADER.size + 5] ^= 0xFF
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    recovered = open_store('dict', tmp_path)
+    assert [s['reg_no'] for s in recovered.all()] == [SEED[0]['reg_no']]
+    assert os.path.getsize(path) == second
+    recovered.close()
+
+
+def test_flush_waits_for_fsync(tmp_path):
+    store = open_store('dict', tmp_path)
+    store.add(dict(SEED[0]))
+    assert store.flush(timeout=5)
+    store.close()
@@ -0,0 +1,105 @@
+# Online retraining: bad rows stay out of the fit and a failed refit never fails a write
+
+import math
+
+import numpy as np
+import pytest
+
+from services.model_training import OnlineTrainer, SufficientStats, load_training_csv
+from services.prediction_service import PredictionService
+
+
+def student(marks, study_hours=4, attendance=85):
+    return {'marks': marks, 'study_hours': study_hours, 'attendance': attendance}
+
+
+@pytest.mark.parametrize('x, y', [((1, 2, math.inf), 50), ((1, math.nan, 3), 50), ((1, 2, 3), -math.inf)])
+def test_stats_reject_non_finite_rows(x, y):
+    stats = SufficientStats()
+    with pytest.raises(ValueError, match='finite'):
+        stats.add(x, y)
+    assert stats.count == 0
+    assert not stats.xtx.any()
+
+
+def test_removing_a_row_restores_the_sums():
+    stats = SufficientStats()
+    stats.add((1, 2, 3), 40)
+    xtx, xty = stats.xtx.copy(), stats.xty.copy()
+    stats.add((4, 90, 70), 75)
+    stats.add((4, 90, 70), 75, weight=-1)
+    assert np.allclose(stats.xtx, xtx) and np.allclose(stats.xty, xty)
+
+
+def test_trainer_skips_non_finite_rows():
+    trainer = OnlineTrainer()
+    assert trainer.observe('STU1', student(60), student(70))
+    assert trainer.count == 1
+
+    # A non-finite row replaces the student's old row with nothing
+    assert trainer.observe('STU1', student(70), student(70, study_hours=math.inf))
+    assert trainer.count == 0
+    assert not trainer.observe('STU1', student(70, study_hours=math.inf), student(70, study_hours=math.nan))
+
+    # Once finite again the student is back in the fit, and the sums are clean
+    assert trainer.observe('STU1', student(70, study_hours=math.nan), student(70, study_hours=5))
+    assert trainer.count == 1
+    assert np.isfinite(trainer._stats.xtx).all()
+
+
+def test_training_csv_skips_non_finite_rows(tmp_path):
+    path = tmp_path / 'training.csv'
+    path.write_text(
+        'study_hours,attendance,previous_marks,final_score\n'
+        '4,85,70,75\n'
+        'inf,85,70,75\n'
+        '3,nan,60,65\n'
+        '5,90,80,85\n'
+    )
+    assert load_training_csv(str(path)).count == 2
+
+
+def test_failed_refit_keeps_model_and_write(client, monkeypatch):
+    PredictionService.settings.RETRAIN_EVERY = 1
+    live = client.get('/api/model').get_json()['active_version']
+
+    def broken_fit():
+        raise np.linalg.LinAlgError('SVD did not converge')
+    monkeypatch.setattr(PredictionService.get_trainer(), 'fit', broken_fit)
+
+    response = client.put('/api/student/update/STU101', json={'marks': 91})
+    assert response.status_code == 200
+    assert client.get('/api/student/STU101').get_json()['data']['marks'] == 91
+
+    model = client.get('/api/model').get_json()
+    assert model['active_version'] == live
+    assert model['last_retrain_error'] == 'SVD did not converge'
+
+    # The next successful refit clears the error
+    monkeypatch.undo()
+    assert client.put('/api/student/update/STU102', json={'marks': 40}).status_code == 200
+    model = client.get('/api/model').get_json()
+    assert model['active_version'] != live
+    assert model['last_retrain_error'] is None
+
+
+def test_manual_retrain_error_is_reported(client, monkeypatch):
+    def broken_fit():
+        raise ValueError('Fit produced non-finite coefficients')
+    monkeypatch.setattr(PredictionService.get_trainer(), 'fit', broken_fit)
+    live = client.get('/api/model').get_json()['active_version']
+
+    response = client.post('/api/model/retrain')
+    assert response.status_code == 500
+    assert response.get_json()['success'] is False
+    assert client.get('/api/model').get_json()['active_version'] == live
+
+
+def test_versions_stay_unique_across_reconfigure(client):
+    first = PredictionService.retrain()
+    PredictionService.configure(PredictionService.settings)
+    second = PredictionService.retrain()
+    assert second.version != first.version
+    versions = [model['version'] for model in client.get('/api/model').get_json()['versions']]
+    assert versions.count(first.version) == 1
+    assert versions[-2:] == [first.version, second.version]
@@ -0,0 +1,81 @@
+# Cursor pagination must give the same rows in the same order on every store
+
+import pytest
+
+from conftest import STORE_KINDS, make_students
+from services.data_service import DataService
+
+STUDENTS = make_students(240)
+
+QUERIES = [
+    {'sort': 'reg_no', 'descending': False},
+    {'sort': 'reg_no', 'descending': True},
+    {'sort': 'cgpa', 'descending': True},
+    {'sort': 'marks', 'descending': False},
+    {'sort': 'attendance', 'descending': True, 'ranges': {'cgpa': (7.0, 8.0)}},
+    {'sort': 'cgpa', 'descending': False, 'ranges': {'marks': (50, None)}, 'subject': 'Physics'},
+    {'sort': 'reg_no', 'descending': False, 'ranges': {'attendance': (None, 70)}, 'subject': 'History'}
+]
+
+
+def expected_order(query):
+    """
+    Every matching reg_no in sort order; ties in a numeric sort keep the
+    order students were added in, reversed for a descending sort
+    """
+    low_high = query.get('ranges', {})
+    rows = [
+        (position, s) for position, s in enumerate(STUDENTS.values())
+        if all((low is None or s[f] >= low) and (high is None or s[f] <= high) for f, (low, high) in low_high.items())
+        and (query.get('subject') is None or query['subject'] in s['subjects'])
+    ]
+    sort = query['sort']
+    rows.sort(key=lambda row: (row[1][sort], row[0]), reverse=query['descending'])
+    return [s['reg_no'] for _, s in rows]
+
+
+def all_pages(query, limit):
+    """Follow next_cursor from the first page to the last"""
+    reg_nos = []
+    cursor = None
+    while True:
+        page, cursor = DataService.query_students(cursor=cursor, limit=limit, **query)
+        assert len(page) <= limit
+        reg_nos.extend(student['reg_no'] for student in page)
+        if cursor is None:
+            return reg_nos
+
+
+@pytest.fixture(params=STORE_KINDS)
+def store(request, make_store):
+    store = make_store(request.param, STUDENTS)
+    DataService.use_store(store)
+    yield store
+    DataService.use_store(None)
+
+
+@pytest.mark.parametrize('query', QUERIES)
+@pytest.mark.parametrize('limit', [1, 7, 50])
+def test_pages_match_sorted_roster(store, query, limit):
+    assert all_pages(query, limit) == expected_order(query)
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_unpaged_query_matches_sorted_roster(store, query):
+    students, cursor = DataService.query_students(**query)
+    assert cursor is None
+    assert [s['reg_no'] for s in students] == expected_order(query)
+
+
+def test_cursor_survives_writes_between_pages(store):
+    first, cursor = DataService.query_students(sort='cgpa', limit=20)
+    reg_nos = [s['reg_no'] for s in first]
+    # Move a student that was already returned to the far end of the order
+    moved = reg_nos[0]
+    store.update(moved, {'cgpa': 9.9})
+    while cursor is not None:
+        page, cursor = DataService.query_students(sort='cgpa', cursor=cursor, limit=20)
+        reg_nos.extend(s['reg_no'] for s in page)
+    assert reg_nos[-1] == moved
+    assert reg_nos.count(moved) == 2
+    assert sorted(set(reg_nos)) == sorted(STUDENTS)
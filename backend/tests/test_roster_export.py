@@ -0,0 +1,93 @@
+# Arrow and Parquet roster exports return the same rows as the JSON roster
+
+import io
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from conftest import STORE_KINDS, make_students
+from services import arrow_export
+from services.data_service import DataService
+
+STUDENTS = make_students(150)
+
+QUERIES = [
+    '',
+    'sort=-cgpa',
+    'sort=marks&min_attendance=70&fields=reg_no,name,marks,subjects',
+    'subject=History&sort=-reg_no&fields=reg_no,cgpa',
+    'min_cgpa=20',
+    # Text-only projections read no numeric column at all
+    'fields=reg_no,name',
+    'fields=name&sort=-reg_no',
+    'fields=email,subjects&subject=Physics'
+]
+
+
+@pytest.fixture(params=STORE_KINDS)
+def export_client(request, client, make_store):
+    DataService.use_store(make_store(request.param, STUDENTS))
+    return client
+
+
+def json_rows(client, query):
+    return client.get('/api/students?' + query).get_json()['data']
+
+
+def numbers_as_floats(rows):
+    """Arrow sends numeric fields as float64"""
+    return [{field: float(value) if field in arrow_export.NUMERIC_FIELDS else value
+             for field, value in row.items()} for row in rows]
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_streamed_arrow_matches_json(export_client, query):
+    response = export_client.get('/api/students.arrow?' + query)
+    assert response.status_code == 200
+    # Streamed: no length is known up front and there is no ETag to revalidate
+    assert 'Content-Length' not in response.headers
+    assert 'ETag' not in response.headers
+    assert response.headers['Cache-Control'] == 'no-cache'
+    table = pa.ipc.open_stream(response.data).read_all()
+    assert table.to_pylist() == numbers_as_floats(json_rows(export_client, query))
+
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_parquet_matches_json(export_client, query):
+    response = export_client.get('/api/students.parquet?' + query)
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.data))
+    assert table.to_pylist() == numbers_as_floats(json_rows(export_client, query))
+
+
+def test_arrow_pages_follow_the_cursor(export_client):
+    rows = []
+    url = '/api/students.arrow?sort=-marks&limit=40'
+    while url:
+        response = export_client.get(url)
+        assert 'ETag' in response.headers
+        rows.extend(pa.ipc.open_stream(response.data).read_all().to_pylist())
+        cursor = response.headers.get('X-Next-Cursor')
+        url = '/api/students.arrow?sort=-marks&limit=40&cursor=' + cursor if cursor else None
+    assert rows == numbers_as_floats(json_rows(export_client, 'sort=-marks'))
+
+
+def test_stream_is_sent_in_batches(make_store):
+    DataService.use_store(make_store('columnar', STUDENTS))
+    fields = ['reg_no', 'name', 'cgpa', 'subjects']
+    reg_nos, columns, rows = DataService.get_roster_columns(['cgpa'], 'cgpa', True)
+    batches = arrow_export.roster_batches(reg_nos, columns, rows, fields, DataService.get_roster_fields, batch_rows=32)
+    chunks = list(arrow_export.stream_batches(arrow_export.roster_schema(fields), batches))
+    # One chunk per batch, then the end-of-stream marker
+    assert len(chunks) == -(-len(STUDENTS) // 32) + 1
+    table = pa.ipc.open_stream(b''.join(chunks)).read_all()
+    assert table.column('cgpa').to_pylist() == sorted((s['cgpa'] for s in STUDENTS.values()), reverse=True)
+    DataService.use_store(None)
+
+
+def test_bad_query_is_refused(client):
+    response = client.get('/api/students.arrow?min_cgpa=nan')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
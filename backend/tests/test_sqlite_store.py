@@ -0,0 +1,33 @@
+# SQLite store connections: one per live thread, closed when the thread exits
+
+import gc
+import threading
+
+from conftest import make_students
+
+
+def run_in_threads(store, count):
+    """Read from the store in `count` short-lived threads, one after another"""
+    sizes = []
+    for _ in range(count):
+        thread = threading.Thread(target=lambda: sizes.append(len(store)))
+        thread.start()
+        thread.join()
+    assert sizes == [len(store)] * count
+
+
+def test_exited_threads_release_their_connections(make_store):
+    store = make_store('sqlite', make_students(5))
+    run_in_threads(store, 50)
+    gc.collect()
+    # Only the connection of the thread that built the store is left
+    assert len(store._connections) == 1
+    assert len(store) == 5
+    store.close()
+
+
+def test_close_after_threads_exit(make_store):
+    store = make_store('sqlite', make_students(5))
+    run_in_threads(store, 3)
+    store.close()
+    assert store._connections == set()
@@ -0,0 +1,137 @@
+# Chunked copy-on-write indexes: same answers as a plain sorted list, and
+# a write shares every chunk it did not touch
+
+import random
+
+import numpy as np
+import pytest
+
+from conftest import make_students
+from services import student_indexes
+from services.data_service import DataService
+from services.student_indexes import NumericChunks, NumericIndex, SortedChunks, SubjectMembers
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    """Tiny chunks, so a few hundred entries split and merge many times"""
+    monkeypatch.setattr(student_indexes, 'CHUNK_SIZE', 4)
+    monkeypatch.setattr(student_indexes, 'SUBJECT_DELTA_SIZE', 2)
+
+
+def test_sorted_chunks_match_sorted_list():
+    rng = random.Random(1)
+    keys = sorted(rng.sample(range(10000), 50))
+    chunks = SortedChunks.from_sorted(["K%05d" % k for k in keys])
+    reference = ["K%05d" % k for k in keys]
+    for _ in range(300):
+        key = "K%05d" % rng.randrange(10000)
+        if key not in reference:
+            chunks = chunks.inserted(key)
+            reference = sorted(reference + [key])
+        probe = "K%05d" % rng.randrange(10000)
+        assert chunks.bisect_left(probe) == np.searchsorted(reference, probe, 'left')
+        assert chunks.bisect_right(probe) == np.searchsorted(reference, probe, 'right')
+        start, stop = sorted(rng.sample(range(len(reference) + 2), 2))
+        assert chunks.slice(start, stop) == reference[start:stop]
+    assert list(chunks) == reference
+    assert len(chunks) == len(reference)
+
+
+def test_numeric_index_matches_sorted_pairs():
+    rng = random.Random(2)
+    index = NumericIndex()
+    values = {}
+    for ordinal in range(40):
+        values[ordinal] = float(rng.randrange(10))
+    index.rebuild(list(values.values()), list(values))
+    for step in range(400):
+        ordinal = rng.randrange(60)
+        new = float(rng.randrange(10))
+        if ordinal not in values:
+            index.insert(new, ordinal)
+        elif step % 7 == 0:
+            index.remove(values.pop(ordinal), ordinal)
+            continue
+        else:
+            index.move(values[ordinal], new, ordinal)
+        values[ordinal] = new
+
+        pairs = sorted((value, ordinal) for ordinal, value in values.items())
+        chunks = index.snapshot()
+        got_values, got_ids = chunks.arrays()
+        assert list(zip(got_values.tolist(), got_ids.tolist())) == pairs
+
+        low, high = sorted(rng.sample(range(-1, 11), 2))
+        lo, hi = chunks.range(low, high)
+        assert chunks.ids(lo, hi).tolist() == [o for v, o in pairs if low <= v <= high]
+        probe = (float(rng.randrange(10)), rng.randrange(60))
+        assert chunks.position(*probe, 'left') == sum(pair < probe for pair in pairs)
+        assert chunks.position(*probe, 'right') == sum(pair <= probe for pair in pairs)
+
+
+def test_removing_a_missing_pair_raises():
+    chunks = NumericChunks.from_sorted(np.array([1.0, 2.0]), np.array([0, 1]))
+    with pytest.raises(KeyError):
+        chunks.removed(1.0, 1)
+
+
+def test_writes_share_untouched_chunks():
+    chunks = SortedChunks.from_sorted(["K%03d" % i for i in range(0, 200, 2)])
+    after = chunks.inserted("K101")
+    assert list(chunks) == ["K%03d" % i for i in range(0, 200, 2)]
+    shared = sum(any(a is b for b in chunks._chunks) for a in after._chunks)
+    assert shared == len(after._chunks) - 1
+
+    numeric = NumericChunks.from_sorted(np.arange(100.0), np.arange(100))
+    moved = numeric.removed(50.0, 50).inserted(75.5, 50)
+    assert numeric.arrays()[1].tolist() == list(range(100))
+    shared = sum(any(a is b for b in numeric._chunks) for a in moved._chunks)
+    assert shared >= len(moved._chunks) - 2
+
+
+def test_subject_members_fold_deltas():
+    members = SubjectMembers(frozenset({'A', 'B', 'C'}))
+    reference = {'A', 'B', 'C'}
+    rng = random.Random(3)
+    names = [chr(ord('A') + i) for i in range(12)]
+    for _ in range(200):
+        added = set(rng.sample(names, rng.randrange(3)))
+        removed = set(rng.sample(names, rng.randrange(3))) - added
+        old = members
+        old_members = old.members()
+        members = members.changed(added, removed)
+        reference = (reference - removed) | added
+        assert members.members() == reference
+        # The old set is never changed by a later write
+        assert old.members() == old_members
+
+
+@pytest.mark.parametrize('kind', ['dict', 'columnar'])
+def test_single_writes_keep_queries_exact(kind, make_store):
+    students = make_students(30)
+    store = make_store(kind, students)
+    DataService.use_store(store)
+    rng = random.Random(4)
+    extra = make_students(60, seed=11)
+    for reg_no, student in extra.items():
+        if reg_no in students:
+            continue
+        store.add(dict(student))
+        students[reg_no] = student
+        target = rng.choice(list(students))
+        fields = {'cgpa': rng.choice([6.5, 7.0, 9.9]), 'subjects': [rng.choice(['Physics', 'History'])]}
+        store.update(target, fields)
+        students[target] = {**students[target], **fields}
+
+    order = {reg_no: position for position, reg_no in enumerate(students)}
+    for sort in ('reg_no', 'cgpa', 'marks'):
+        for subject in (None, 'Physics', 'History'):
+            page, cursor = DataService.query_students(sort=sort, subject=subject)
+            # Ties keep the order students were added in
+            expected = sorted(
+                (s for s in students.values() if subject is None or subject in s['subjects']),
+                key=lambda s: (s[sort], order[s['reg_no']])
+            )
+            assert [s['reg_no'] for s in page] == [s['reg_no'] for s in expected]
+    DataService.use_store(None)
@@ -0,0 +1,169 @@
+# Malformed input must be answered with a JSON 400, never a 500
+
+import base64
+import json
+
+import pytest
+
+from services.search_index import student_words
+from services.student_indexes import decode_cursor, encode_cursor
+from services.student_store import check_numeric
+
+
+def raw_cursor(payload):
+    """A cursor carrying any JSON payload, bypassing encode_cursor"""
+    raw = json.dumps(payload).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), float('-inf')])
+def test_check_numeric_rejects_non_finite(value):
+    with pytest.raises(ValueError, match='cgpa must be a finite number'):
+        check_numeric({'cgpa': value})
+
+
+@pytest.mark.parametrize('value', ['8', True, None, [1]])
+def test_check_numeric_rejects_non_numbers(value):
+    with pytest.raises(ValueError, match='marks must be a number'):
+        check_numeric({'marks': value})
+
+
+@pytest.mark.parametrize('sort, value', [('cgpa', 7.5), ('-marks', 60), ('reg_no', 'STU101'), ('-reg_no', 'STU103')])
+def test_cursor_round_trip(sort, value):
+    assert decode_cursor(encode_cursor(sort, value, 'STU101'), sort) == (value, 'STU101')
+
+
+@pytest.mark.parametrize('sort, payload', [
+    ('cgpa', ['cgpa', 'high', 'STU101']),
+    ('cgpa', ['cgpa', True, 'STU101']),
+    ('cgpa', ['cgpa', None, 'STU101']),
+    ('cgpa', ['cgpa', 7.5, 101]),
+    ('cgpa', ['cgpa', 7.5, None]),
+    ('-cgpa', ['-cgpa', [7.5], 'STU101']),
+    ('reg_no', ['reg_no', 101, 'STU101']),
+    ('-reg_no', ['-reg_no', None, 'STU101'])
+])
+def test_decode_cursor_rejects_wrong_types(sort, payload):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(raw_cursor(payload), sort)
+
+
+@pytest.mark.parametrize('cursor', ['!!!', raw_cursor({'a': 1}), raw_cursor(['cgpa', 7.5]), 'WyJjZ3BhIiwgMWU5OTk5LCAiUyJd'])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, 'cgpa')
+
+
+def test_decode_cursor_rejects_other_sort():
+    with pytest.raises(ValueError, match='does not match'):
+        decode_cursor(encode_cursor('cgpa', 7.5, 'STU101'), 'marks')
+
+
+@pytest.mark.parametrize('query', [
+    'sort=cgpa&limit=2&cursor=' + raw_cursor(['cgpa', 'x', 'STU101']),
+    'sort=cgpa&limit=2&cursor=' + raw_cursor(['cgpa', 7.5, 5]),
+    'sort=reg_no&cursor=' + raw_cursor(['reg_no', 5, 'STU101']),
+    'sort=marks&cursor=' + encode_cursor('cgpa', 7.5, 'STU101'),
+    'cursor=not-a-cursor',
+    'min_cgpa=nan',
+    'max_marks=inf',
+    'min_attendance=ten',
+    'limit=0',
+    'limit=%C2%B2',
+    'limit=1001',
+    'fields=password',
+    'sort=name'
+])
+def test_roster_rejects_bad_query(client, query):
+    response = client.get('/api/students?' + query)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+@pytest.mark.parametrize('body', ['{"cgpa": NaN}', '{"marks": Infinity}', '{"attendance": "high"}'])
+def test_update_rejects_bad_numbers(client, body):
+    response = client.put('/api/student/update/STU101', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    assert client.get('/api/students?fields=reg_no,cgpa,marks,attendance&limit=1').get_json()['data'] == [
+        {'reg_no': 'STU101', 'cgpa': 7.6, 'marks': 78, 'attendance': 85}
+    ]
+
+
+def test_add_rejects_non_finite_numbers(client):
+    student = {
+        'reg_no': 'STU900', 'password': 'pw', 'name': 'New Student', 'email': 'new@school.com',
+        'attendance': 90, 'assignments': 5, 'marks': 70, 'study_hours': 3, 'cgpa': 'NaN', 'subjects': []
+    }
+    body = json.dumps(student).replace('"NaN"', 'NaN')
+    response = client.post('/api/student/add', data=body, content_type='application/json')
+    assert response.status_code == 400
+    assert client.get('/api/student/STU900').status_code == 404
+
+
+# ============ AT-RISK RANKING ============
+
+@pytest.mark.parametrize('k', ['0', '-1', '1001', 'ten', '2.5', '%C2%B2', '1%C2%B9', ''])
+def test_at_risk_rejects_bad_k(client, k):
+    response = client.get('/api/students/at-risk?k=' + k)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'k must be between 1 and 1000'
+
+
+def test_at_risk_accepts_good_k(client):
+    response = client.get('/api/students/at-risk?k=2')
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 2
+
+
+# ============ SEARCH ============
+
+@pytest.mark.parametrize('query', [
+    'q=',
+    'q=%20%20',
+    'q=' + 'a' * 101,
+    'q=ani&limit=0',
+    'q=ani&limit=101',
+    'q=ani&limit=five',
+    'q=ani&limit=%C2%B2',
+    'q=ani&limit=-3'
+])
+def test_search_rejects_bad_query(client, query):
+    response = client.get('/api/students/search?' + query)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_search_accepts_good_limit(client):
+    response = client.get('/api/students/search?q=stu&limit=2')
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 2
+
+
+@pytest.mark.parametrize('field, value', [
+    ('name', None), ('name', 42), ('email', None), ('email', ['a@school.com']),
+    ('reg_no', 900), ('password', None), ('subjects', ['Physics', None]), ('subjects', 'Physics')
+])
+def test_add_rejects_non_text_fields(client, field, value):
+    student = {
+        'reg_no': 'STU900', 'password': 'pw', 'name': 'New Student', 'email': 'new@school.com',
+        'attendance': 90, 'assignments': 5, 'marks': 70, 'study_hours': 3, 'cgpa': 7.0, 'subjects': []
+    }
+    student[field] = value
+    response = client.post('/api/student/add', json=student)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    # The search index never sees the bad record
+    assert client.get('/api/students/search?q=stu').status_code == 200
+
+
+def test_update_rejects_non_text_email(client):
+    client.get('/api/students/search?q=anita')
+    response = client.put('/api/student/update/STU101', json={'email': None})
+    assert response.status_code == 400
+    assert client.get('/api/students/search?q=anita').get_json()['data'][0]['email'] == 'anita@school.com'
+
+
+def test_search_words_skip_missing_and_non_text_values():
+    assert student_words({'reg_no': 'STU1', 'name': None, 'email': 7}) == ({'stu1'}, set())
+    assert student_words({'name': 'Anita Sharma'}) == ({'anita', 'sharma'}, {'anita', 'sharma'})
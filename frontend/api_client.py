@@ -0,0 +1,120 @@
+# HTTP client for the Flask backend, used by streamlit_app.py
+# One pooled requests.Session is shared by every page run, GET responses are
+# cached for a short TTL, and independent GETs can be fetched in parallel
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+# Backend API URL
+API_URL = "http://localhost:5000/api"
+
+# Seconds a cached GET response is reused before it is fetched again
+CACHE_TTL = 30
+
+# Students listed for a search
+SEARCH_LIMIT = 20
+
+# Connections kept open to the backend, and the (connect, read) timeout
+POOL_SIZE = 8
+TIMEOUT = (3, 15)
+
+
+@st.cache_resource
+def get_session():
+    """One keep-alive session shared by every user and rerun"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class _NotCached(Exception):
+    """Carries a non-200 response out of _get_ok, so st.cache_data does not store it"""
+
+    def __init__(self, result):
+        super().__init__(result[0])
+        self.result = result
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def _get_ok(path):
+    """GET an API path; only 200 responses are returned and cached"""
+    response = get_session().get(f"{API_URL}{path}", timeout=TIMEOUT)
+    if response.status_code != 200:
+        raise _NotCached((response.status_code, response.json()))
+    return response.status_code, response.json()
+
+
+def get_json(path):
+    """
+    GET an API path
+    Returns: (status_code, json body); 200 responses are cached for
+    CACHE_TTL seconds, errors are fetched again on the next call
+    Raises requests.exceptions.RequestException if the backend is unreachable
+    """
+    try:
+        return _get_ok(path)
+    except _NotCached as e:
+        return e.result
+
+
+def get_many(paths):
+    """
+    GET several independent API paths at once
+    Returns: a list of (status_code, json body), in the order of `paths`
+    """
+    if len(paths) < 2:
+        return [get_json(path) for path in paths]
+
+    # Worker threads need the script context to use the Streamlit cache
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=min(len(paths), POOL_SIZE),
+                            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as pool:
+        return list(pool.map(get_json, paths))
+
+
+def _send(method, path, payload):
+    """Send a write request; cached GETs are dropped after a successful write"""
+    response = get_session().request(method, f"{API_URL}{path}", json=payload, timeout=TIMEOUT)
+    if response.ok:
+        invalidate()
+    return response.status_code, response.json()
+
+
+def invalidate():
+    """Drop every cached GET response"""
+    _get_ok.clear()
+
+
+# ============ API CALLS ============
+
+def login(role, username, password):
+    """Log in as a student or teacher; returns (status_code, json body)"""
+    response = get_session().post(
+        f"{API_URL}/login",
+        json={'role': role, 'username': username, 'password': password},
+        timeout=TIMEOUT
+    )
+    return response.status_code, response.json()
+
+
+def add_student(student):
+    """Add a student; returns (status_code, json body)"""
+    return _send('POST', "/student/add", student)
+
+
+def update_student(reg_no, fields):
+    """Update a student; returns (status_code, json body)"""
+    return _send('PUT', f"/student/update/{reg_no}", fields)
+
+
+def search_students(query, limit=SEARCH_LIMIT):
+    """Find students by name, reg_no or email; returns (status_code, json body)"""
+    return get_json("/students/search?" + urlencode({'q': query, 'limit': limit}))
@@ -2,12 +2,11 @@ import streamlit as st
 import requests
 import pandas as pd
 
+import api_client
+
 # Configure page
 st.set_page_config(page_title="Student Performance Management", layout="wide")
 
-# Backend API URL
-API_URL = "http://localhost:5000/api"
-
 # ============ SESSION STATE MANAGEMENT ============
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
@@ -43,13 +42,9 @@ def login_page():
             if st.button("🔓 Login as Student", use_container_width=True):
                 if reg_no and password:
                     try:
-                        response = requests.post(
-                            f"{API_URL}/login",
-                            json={'role': 'student', 'username': reg_no, 'password': password}
-                        )
+                        status, data = api_client.login('student', reg_no, password)
                         
-                        if response.status_code == 200:
-                            data = response.json()
+                        if status == 200:
                             st.session_state.logged_in = True
                             st.session_state.role = 'student'
                             st.session_state.user_id = reg_no
@@ -78,13 +73,9 @@ def login_page():
             if st.button("🔓 Login as Teacher", use_container_width=True):
                 if teacher_id and password:
                     try:
-                        response = requests.post(
-                            f"{API_URL}/login",
-                            json={'role': 'teacher', 'username': teacher_id, 'password': password}
-                        )
+                        status, data = api_client.login('teacher', teacher_id, password)
                         
-                        if response.status_code == 200:
-                            data = response.json()
+                        if status == 200:
                             st.session_state.logged_in = True
                             st.session_state.role = 'teacher'
                             st.session_state.user_id = teacher_id
@@ -115,11 +106,12 @@ def student_dashboard():
     st.write("---")
     
     try:
-        # Fetch student data
-        response = requests.get(f"{API_URL}/student/{st.session_state.user_id}")
+        # Fetch student data and report in one request
+        status, body = api_client.get_json(f"/student/{st.session_state.user_id}/dashboard")
         
-        if response.status_code == 200:
-            student_data = response.json()['data']
+        if status == 200:
+            dashboard_data = body['data']
+            student_data = dashboard_data['student']
             
             # Display academic details
             col1, col2, col3 = st.columns(3)
@@ -161,22 +153,20 @@ def student_dashboard():
             # Display performance report with suggestions
             st.subheader("📊 Performance Report & Suggestions")
             
-            report_response = requests.get(f"{API_URL}/student/{st.session_state.user_id}/report")
-            if report_response.status_code == 200:
-                report_data = report_response.json()['data']
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write("**Performance Metrics:**")
-                    st.write(f"  • Attendance: {report_data['attendance']}%")
-                    st.write(f"  • Marks: {report_data['marks']}")
-                    st.write(f"  • CGPA: {report_data['cgpa']}")
-                    st.write(f"  • Study Hours: {report_data['study_hours']}")
-                
-                with col2:
-                    st.write("**Suggestions for Improvement:**")
-                    for suggestion in report_data['suggestions']:
-                        st.write(f"  {suggestion}")
+            report_data = dashboard_data['report']
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write("**Performance Metrics:**")
+                st.write(f"  • Attendance: {report_data['attendance']}%")
+                st.write(f"  • Marks: {report_data['marks']}")
+                st.write(f"  • CGPA: {report_data['cgpa']}")
+                st.write(f"  • Study Hours: {report_data['study_hours']}")
+            
+            with col2:
+                st.write("**Suggestions for Improvement:**")
+                for suggestion in report_data['suggestions']:
+                    st.write(f"  {suggestion}")
         else:
             st.error("❌ Unable to fetch student data.")
     
@@ -184,6 +174,23 @@ def student_dashboard():
         st.error("❌ Cannot connect to backend.")
 
 # ============ TEACHER DASHBOARD ============
+def student_search(label, key):
+    """
+    Search box with a pick list of the matching students
+    Returns the picked reg_no, or None until a student is found
+    """
+    query = st.text_input(label, key=f"{key}_query", placeholder="Name, registration number or email")
+    if not query.strip():
+        return None
+    
+    status, body = api_client.search_students(query.strip())
+    if status != 200 or not body['data']:
+        st.info("ℹ️ No matching students.")
+        return None
+    
+    options = {s['reg_no']: f"{s['name']} ({s['reg_no']})" for s in body['data']}
+    return st.selectbox("Select Student", list(options), format_func=options.get, key=key)
+
 def teacher_dashboard():
     """Display teacher dashboard"""
     st.title(f"👨‍🏫 Teacher Dashboard - {st.session_state.user_name}")
@@ -200,11 +207,19 @@ def teacher_dashboard():
     st.write("---")
     
     try:
-        # Fetch teacher data
-        response = requests.get(f"{API_URL}/teacher/{st.session_state.user_id}")
+        # Fetch teacher profile and the roster in one request; every tab shares it
+        # The selected student's suggestions (from the last run) are fetched alongside
+        paths = [f"/teacher/{st.session_state.user_id}/dashboard"]
+        suggestions_reg_no = st.session_state.get('suggestions_student')
+        if suggestions_reg_no:
+            paths.append(f"/student/{suggestions_reg_no}/suggestions")
+        results = api_client.get_many(paths)
+        status, body = results[0]
         
-        if response.status_code == 200:
-            teacher_data = response.json()['data']
+        if status == 200:
+            dashboard_data = body['data']
+            teacher_data = dashboard_data['teacher']
+            students_data = dashboard_data['students']
             
             # Display teacher profile
             st.subheader("👤 Teacher Profile")
@@ -230,17 +245,11 @@ def teacher_dashboard():
             with tab1:
                 st.subheader("📊 View All Students")
                 
-                students_response = requests.get(f"{API_URL}/students")
-                if students_response.status_code == 200:
-                    students_data = students_response.json()['data']
-                    
-                    # Create dataframe for better display
-                    df = pd.DataFrame(students_data)
-                    st.dataframe(df, use_container_width=True)
-                    
-                    st.info(f"ℹ️ Total Students: {len(students_data)}")
-                else:
-                    st.error("❌ Unable to fetch student list.")
+                # Create dataframe for better display
+                df = pd.DataFrame(students_data)
+                st.dataframe(df, use_container_width=True)
+                
+                st.info(f"ℹ️ Total Students: {len(students_data)}")
             
             # TAB 2: Add new student
             with tab2:
@@ -283,91 +292,75 @@ def teacher_dashboard():
                                 'subjects': subjects
                             }
                             
-                            add_response = requests.post(
-                                f"{API_URL}/student/add",
-                                json=student_payload
-                            )
+                            add_status, add_body = api_client.add_student(student_payload)
                             
-                            if add_response.status_code == 201:
+                            if add_status == 201:
                                 st.success("✅ Student added successfully!")
                             else:
-                                st.error(f"❌ Error: {add_response.json()['message']}")
+                                st.error(f"❌ Error: {add_body['message']}")
             
             # TAB 3: Update student
             with tab3:
                 st.subheader("✏️ Update Student Information")
                 
-                students_response = requests.get(f"{API_URL}/students")
-                if students_response.status_code == 200:
-                    students_data = students_response.json()['data']
-                    student_names = {s['reg_no']: f"{s['name']} ({s['reg_no']})" for s in students_data}
+                selected_reg_no = student_search("Search Student", 'update_student')
+                
+                with st.form("update_student_form"):
+                    col1, col2 = st.columns(2)
                     
-                    selected_student_display = st.selectbox("Select Student", list(student_names.values()))
-                    selected_reg_no = [k for k, v in student_names.items() if v == selected_student_display][0]
+                    with col1:
+                        attendance = st.number_input("Attendance %", 0, 100, 80)
+                        marks = st.number_input("Marks", 0, 100, 75)
                     
-                    with st.form("update_student_form"):
-                        col1, col2 = st.columns(2)
-                        
-                        with col1:
-                            attendance = st.number_input("Attendance %", 0, 100, 80)
-                            marks = st.number_input("Marks", 0, 100, 75)
-                        
-                        with col2:
-                            assignments = st.number_input("Assignments", 0, 15, 8)
-                            study_hours = st.number_input("Study Hours", 0.0, 10.0, 4.0)
-                        
-                        cgpa = st.number_input("CGPA", 0.0, 10.0, 7.5)
-                        email = st.text_input("Email")
+                    with col2:
+                        assignments = st.number_input("Assignments", 0, 15, 8)
+                        study_hours = st.number_input("Study Hours", 0.0, 10.0, 4.0)
+                    
+                    cgpa = st.number_input("CGPA", 0.0, 10.0, 7.5)
+                    email = st.text_input("Email")
+                    
+                    submit = st.form_submit_button("💾 Update Student", use_container_width=True)
+                    
+                    if submit and not selected_reg_no:
+                        st.error("❌ Search for a student first.")
+                    elif submit:
+                        update_payload = {
+                            'attendance': attendance,
+                            'marks': marks,
+                            'assignments': assignments,
+                            'study_hours': study_hours,
+                            'cgpa': cgpa,
+                            'email': email
+                        }
                         
-                        submit = st.form_submit_button("💾 Update Student", use_container_width=True)
+                        update_status, update_body = api_client.update_student(selected_reg_no, update_payload)
                         
-                        if submit:
-                            update_payload = {
-                                'attendance': attendance,
-                                'marks': marks,
-                                'assignments': assignments,
-                                'study_hours': study_hours,
-                                'cgpa': cgpa,
-                                'email': email
-                            }
-                            
-                            update_response = requests.put(
-                                f"{API_URL}/student/update/{selected_reg_no}",
-                                json=update_payload
-                            )
-                            
-                            if update_response.status_code == 200:
-                                st.success("✅ Student updated successfully!")
-                            else:
-                                st.error(f"❌ Error: {update_response.json()['message']}")
+                        if update_status == 200:
+                            st.success("✅ Student updated successfully!")
+                        else:
+                            st.error(f"❌ Error: {update_body['message']}")
             
             # TAB 4: View suggestions
             with tab4:
                 st.subheader("💡 View Student Improvement Suggestions")
                 
-                students_response = requests.get(f"{API_URL}/students")
-                if students_response.status_code == 200:
-                    students_data = students_response.json()['data']
-                    student_names = {s['reg_no']: f"{s['name']} ({s['reg_no']})" for s in students_data}
-                    
-                    selected_student_display = st.selectbox("Select Student to View Suggestions", list(student_names.values()))
-                    selected_reg_no = [k for k, v in student_names.items() if v == selected_student_display][0]
+                selected_reg_no = student_search("Search Student to View Suggestions", 'suggestions_student')
+                
+                if st.button("📋 Get Suggestions", disabled=not selected_reg_no):
+                    if selected_reg_no == suggestions_reg_no:
+                        suggestions_status, suggestions_data = results[1]
+                    else:
+                        suggestions_status, suggestions_data = api_client.get_json(f"/student/{selected_reg_no}/suggestions")
                     
-                    if st.button("📋 Get Suggestions"):
-                        suggestions_response = requests.get(
-                            f"{API_URL}/student/{selected_reg_no}/suggestions"
-                        )
+                    if suggestions_status == 200:
                         
-                        if suggestions_response.status_code == 200:
-                            suggestions_data = suggestions_response.json()
-                            
-                            st.write(f"**Student:** {suggestions_data['name']} ({suggestions_data['reg_no']})")
-                            st.write("**Improvement Suggestions:**")
-                            
-                            for suggestion in suggestions_data['suggestions']:
-                                st.write(f"  {suggestion}")
-                        else:
-                            st.error("❌ Unable to fetch suggestions.")
+                        st.write(f"**Student:** {suggestions_data['name']} ({suggestions_data['reg_no']})")
+                        st.write("**Improvement Suggestions:**")
+                        
+                        for suggestion in suggestions_data['suggestions']:
+                            st.write(f"  {suggestion}")
+                    else:
+                        st.error("❌ Unable to fetch suggestions.")
         else:
             st.error("❌ Unable to fetch teacher data.")
     
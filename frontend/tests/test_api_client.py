@@ -0,0 +1,63 @@
+# The frontend GET cache keeps 200 responses only
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_client
+
+
+class FakeResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    """Answers each path from a queue of (status, body) pairs and counts the calls"""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def get(self, url, timeout=None):
+        path = url[len(api_client.API_URL):]
+        self.calls.append(path)
+        return FakeResponse(*self.answers[path].pop(0))
+
+
+@pytest.fixture
+def session(monkeypatch):
+    session = FakeSession({})
+    monkeypatch.setattr(api_client, 'get_session', lambda: session)
+    api_client.invalidate()
+    yield session
+    api_client.invalidate()
+
+
+def test_ok_responses_are_cached(session):
+    session.answers['/student/STU101'] = [(200, {'success': True})]
+    assert api_client.get_json('/student/STU101') == (200, {'success': True})
+    assert api_client.get_json('/student/STU101') == (200, {'success': True})
+    assert session.calls == ['/student/STU101']
+
+
+@pytest.mark.parametrize('status', [404, 500, 503])
+def test_errors_are_fetched_again(session, status):
+    session.answers['/student/STU101'] = [(status, {'success': False}), (200, {'success': True})]
+    assert api_client.get_json('/student/STU101') == (status, {'success': False})
+    assert api_client.get_json('/student/STU101') == (200, {'success': True})
+    assert session.calls == ['/student/STU101', '/student/STU101']
+
+
+def test_invalidate_drops_cached_responses(session):
+    session.answers['/students'] = [(200, {'count': 1}), (200, {'count': 2})]
+    assert api_client.get_json('/students')[1] == {'count': 1}
+    api_client.invalidate()
+    assert api_client.get_json('/students')[1] == {'count': 2}